@@ -1,18 +1,18 @@
-from app import app, db
+from app import app
+from app.startup import prepare_database
+from app.services.task_queue import start_workers
 import os
 
-# Create database tables before running the app
-with app.app_context():
-    db.create_all()
-    print("Database tables created successfully")
-
-@app.errorhandler(404)
-def not_found(error):
-    return {'error': 'Not found', 'message': 'The requested resource was not found'}, 404
-
-@app.errorhandler(500)
-def server_error(error):
-    return {'error': 'Server error', 'message': 'An internal server error occurred'}, 500
-
+# Development server; WSGI servers load wsgi.py instead
 if __name__ == '__main__':
-    app.run(debug=True) 
\ No newline at end of file
+    # Create database tables (and add columns/indexes missing from older databases) and
+    # re-enqueue tasks that were left pending/in progress by a previous run
+    prepare_database()
+    
+    # Start the task workers right away so recovered tasks are processed without waiting for a
+    # first request. The debug reloader's parent process only watches files; the server runs in
+    # its child (WERKZEUG_RUN_MAIN). Set WORKER_COUNT=0 to leave processing to worker.py processes.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_workers()
+    
+    app.run(debug=True)
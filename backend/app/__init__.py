@@ -1,16 +1,89 @@
 from flask import Flask
 from flask_cors import CORS
-from flask_sqlalchemy import SQLAlchemy
 import os
+from app.storage import RoutingSQLAlchemy, configure_storage
 
 app = Flask(__name__)
 CORS(app)
 
 # Configure database
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///data.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///data.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-db = SQLAlchemy(app)
+# SQLite connection settings (see app/storage.py): WAL lets API readers run while a worker
+# commits, busy_timeout makes writers wait for the lock instead of failing with
+# "database is locked"; cache_size is in KiB and mmap_size in bytes
+app.config['SQLITE_JOURNAL_MODE'] = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLITE_BUSY_TIMEOUT'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))
+app.config['SQLITE_CACHE_SIZE'] = int(os.environ.get('SQLITE_CACHE_SIZE', 64 * 1024))
+app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+
+# Connection pool of each engine (API requests and task workers have separate engines)
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 5))
+app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+
+# Number of data records inserted per transaction during task ingest
+app.config['INGEST_BATCH_SIZE'] = int(os.environ.get('INGEST_BATCH_SIZE', 5000))
+
+# Number of background worker threads processing queued tasks
+app.config['WORKER_COUNT'] = int(os.environ.get('WORKER_COUNT', 4))
+
+# Responses larger than COMPRESSION_MIN_SIZE bytes are gzip/brotli-compressed when the client accepts it
+app.config['COMPRESSION_MIN_SIZE'] = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+app.config['COMPRESSION_LEVEL'] = int(os.environ.get('COMPRESSION_LEVEL', 6))
+
+# HTTP caching of completed tasks: Cache-Control max-age and the size of the in-process response body cache
+app.config['HTTP_CACHE_MAX_AGE'] = int(os.environ.get('HTTP_CACHE_MAX_AGE', 3600))
+app.config['RESPONSE_CACHE_MAX_BYTES'] = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+# In-memory column store of recently viewed completed tasks (0 disables it)
+app.config['HOT_CACHE_MAX_BYTES'] = int(os.environ.get('HOT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+# Largest filter_params.num_records (rows generated per source) a task may ask for
+app.config['MAX_NUM_RECORDS'] = int(os.environ.get('MAX_NUM_RECORDS', 5000000))
+
+# Simulated pending/in-progress waits in process_task (disable for benchmarks)
+app.config['SIMULATE_DELAYS'] = os.environ.get('SIMULATE_DELAYS', '1').lower() not in ('0', 'false', 'no')
+
+# Durable job queue: a claimed job's lease lasts JOB_LEASE_SECONDS and is renewed while the
+# task runs; failed jobs are retried up to JOB_MAX_ATTEMPTS times with exponential backoff
+app.config['JOB_LEASE_SECONDS'] = int(os.environ.get('JOB_LEASE_SECONDS', 60))
+app.config['JOB_MAX_ATTEMPTS'] = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+app.config['JOB_RETRY_BACKOFF'] = float(os.environ.get('JOB_RETRY_BACKOFF', 5))
+app.config['JOB_POLL_INTERVAL'] = float(os.environ.get('JOB_POLL_INTERVAL', 1))
+
+# Port on which worker.py processes serve their metrics (unset: not served)
+app.config['WORKER_METRICS_PORT'] = int(os.environ.get('WORKER_METRICS_PORT', 0)) or None
+
+# Seconds between checks for task changes made by other processes (for event streams)
+app.config['EVENT_RELAY_INTERVAL'] = float(os.environ.get('EVENT_RELAY_INTERVAL', 1))
+
+# Reuse of identical datasets: entries expire after DATASET_CACHE_TTL seconds and
+# at most DATASET_CACHE_MAX_ENTRIES are kept (least recently used are evicted first)
+app.config['DATASET_CACHE_TTL'] = int(os.environ.get('DATASET_CACHE_TTL', 3600))
+app.config['DATASET_CACHE_MAX_ENTRIES'] = int(os.environ.get('DATASET_CACHE_MAX_ENTRIES', 100))
+
+# Retention (retention.py): finished tasks older than RETENTION_DAYS days are deleted,
+# after being archived to ARCHIVE_DIR as gzipped JSON lines when it is set
+app.config['RETENTION_DAYS'] = int(os.environ.get('RETENTION_DAYS', 30))
+app.config['ARCHIVE_DIR'] = os.environ.get('ARCHIVE_DIR') or None
+
+# Data files backing the sources, as "name=path" pairs separated by commas.
+# By default source_a/source_b read data/source_a.json and data/source_b.csv when those files exist,
+# and fall back to simulated data otherwise.
+data_dir = os.environ.get('DATA_DIR', os.path.join(os.path.dirname(app.root_path), '..', 'data'))
+app.config['SOURCE_FILES'] = {
+    'source_a': os.path.join(data_dir, 'source_a.json'),
+    'source_b': os.path.join(data_dir, 'source_b.csv')
+}
+for pair in filter(None, os.environ.get('SOURCE_FILES', '').split(',')):
+    name, path = pair.split('=', 1)
+    app.config['SOURCE_FILES'][name.strip()] = path.strip()
+
+# Pooled engines, SQLite pragmas and the worker engine (app/storage.py)
+configure_storage(app)
+db = RoutingSQLAlchemy(app)
 
 # Import routes after app is initialized to avoid circular imports
-from app.routes import main_routes, task_routes, data_routes 
\ No newline at end of file
+from app.routes import main_routes, task_routes, data_routes, analytics_routes 
\ No newline at end of file
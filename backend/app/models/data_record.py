@@ -1,52 +1,72 @@
 from app import db
 from datetime import datetime
+from app.models.dimension import Source, Category, Brand, Platform, Location, PaymentMethod
 
 class DataRecord(db.Model):
+    # Composite indexes backing the server-side filters on /api/tasks/<id>/data
+    __table_args__ = (
+        db.Index('ix_data_record_task_purchase_date', 'task_id', 'purchase_date'),
+        db.Index('ix_data_record_task_category_brand', 'task_id', 'category_id', 'brand_id'),
+        db.Index('ix_data_record_task_platform', 'task_id', 'platform_id'),
+        db.Index('ix_data_record_task_source', 'task_id', 'source_id')
+    )
+    
+    # Text dimensions are stored as small integer keys into the lookup tables (app/models/dimension.py)
     id = db.Column(db.Integer, primary_key=True)
     task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False)
-    source = db.Column(db.String(50), nullable=False)  # e.g., "source_a" or "source_b"
-    category = db.Column(db.String(100))
-    brand = db.Column(db.String(100))
+    source_id = db.Column(db.Integer, db.ForeignKey('dim_source.id'), nullable=False)  # e.g., "source_a" or "source_b"
+    category_id = db.Column(db.Integer, db.ForeignKey('dim_category.id'))
+    brand_id = db.Column(db.Integer, db.ForeignKey('dim_brand.id'))
     price = db.Column(db.Float)
     purchase_date = db.Column(db.DateTime)
     quantity = db.Column(db.Integer, default=1)
     rating = db.Column(db.Float, nullable=True)
-    platform = db.Column(db.String(50))
-    location = db.Column(db.String(100), nullable=True)
-    payment_method = db.Column(db.String(50), nullable=True)
+    platform_id = db.Column(db.Integer, db.ForeignKey('dim_platform.id'))
+    location_id = db.Column(db.Integer, db.ForeignKey('dim_location.id'), nullable=True)
+    payment_method_id = db.Column(db.Integer, db.ForeignKey('dim_payment_method.id'), nullable=True)
     product_id = db.Column(db.String(20), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def __init__(self, task_id, source, category=None, brand=None, price=None, 
-                 purchase_date=None, quantity=1, rating=None, platform=None, 
-                 location=None, payment_method=None, product_id=None):
+    source_entry = db.relationship(Source)
+    category_entry = db.relationship(Category)
+    brand_entry = db.relationship(Brand)
+    platform_entry = db.relationship(Platform)
+    location_entry = db.relationship(Location)
+    payment_method_entry = db.relationship(PaymentMethod)
+    
+    def __init__(self, task_id, source_id, category_id=None, brand_id=None, price=None,
+                 purchase_date=None, quantity=1, rating=None, platform_id=None,
+                 location_id=None, payment_method_id=None, product_id=None):
         self.task_id = task_id
-        self.source = source
-        self.category = category
-        self.brand = brand
+        self.source_id = source_id
+        self.category_id = category_id
+        self.brand_id = brand_id
         self.price = price
         self.purchase_date = purchase_date
         self.quantity = quantity
         self.rating = rating
-        self.platform = platform
-        self.location = location
-        self.payment_method = payment_method
+        self.platform_id = platform_id
+        self.location_id = location_id
+        self.payment_method_id = payment_method_id
         self.product_id = product_id
-        
+    
     def to_dict(self):
+        def name(entry):
+            return entry.name if entry else None
+        
         return {
             'id': self.id,
             'task_id': self.task_id,
-            'source': self.source,
-            'category': self.category,
-            'brand': self.brand,
+            'source': name(self.source_entry),
+            'category': name(self.category_entry),
+            'brand': name(self.brand_entry),
             'price': self.price,
             'purchase_date': self.purchase_date.isoformat() if self.purchase_date else None,
             'quantity': self.quantity,
             'rating': self.rating,
-            'platform': self.platform,
-            'location': self.location,
-            'payment_method': self.payment_method,
+            'platform': name(self.platform_entry),
+            'location': name(self.location_entry),
+            'payment_method': name(self.payment_method_entry),
             'product_id': self.product_id,
             'created_at': self.created_at.isoformat()
-        } 
\ No newline at end of file
+        }
@@ -0,0 +1,23 @@
+from app import db
+from datetime import datetime
+
+class DatasetCacheEntry(db.Model):
+    """Maps a canonical filter_params hash to the task whose data records hold that dataset"""
+    params_hash = db.Column(db.String(64), primary_key=True)
+    task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    hits = db.Column(db.Integer, default=0)
+    
+    def __init__(self, params_hash, task_id):
+        self.params_hash = params_hash
+        self.task_id = task_id
+        
+    def to_dict(self):
+        return {
+            'params_hash': self.params_hash,
+            'task_id': self.task_id,
+            'created_at': self.created_at.isoformat(),
+            'last_used_at': self.last_used_at.isoformat(),
+            'hits': self.hits
+        }
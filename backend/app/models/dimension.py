@@ -0,0 +1,37 @@
+from app import db
+
+class DimensionMixin:
+    """Lookup table holding each distinct value of one text dimension of data records once"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True)
+    
+    def __init__(self, name):
+        self.name = name
+
+class Source(DimensionMixin, db.Model):
+    __tablename__ = 'dim_source'
+
+class Category(DimensionMixin, db.Model):
+    __tablename__ = 'dim_category'
+
+class Brand(DimensionMixin, db.Model):
+    __tablename__ = 'dim_brand'
+
+class Platform(DimensionMixin, db.Model):
+    __tablename__ = 'dim_platform'
+
+class Location(DimensionMixin, db.Model):
+    __tablename__ = 'dim_location'
+
+class PaymentMethod(DimensionMixin, db.Model):
+    __tablename__ = 'dim_payment_method'
+
+# DataRecord field -> lookup table; the record stores `<field>_id`
+DIMENSION_MODELS = {
+    'source': Source,
+    'category': Category,
+    'brand': Brand,
+    'platform': Platform,
+    'location': Location,
+    'payment_method': PaymentMethod
+}
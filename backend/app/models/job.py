@@ -0,0 +1,51 @@
+from app import db
+from datetime import datetime
+
+class Job(db.Model):
+    """Durable queue entry for processing a task; claimed by workers under a time-limited lease"""
+    __table_args__ = (
+        db.Index('ix_job_status_available_at', 'status', 'available_at'),
+        # Per-owner running jobs and latest claim, used to share workers fairly between owners
+        db.Index('ix_job_owner_status', 'owner', 'status'),
+        db.Index('ix_job_owner_claimed_at', 'owner', 'claimed_at')
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False, index=True)
+    status = db.Column(db.String(20), default='queued')  # queued, running, done, failed
+    attempts = db.Column(db.Integer, default=0)
+    max_attempts = db.Column(db.Integer, default=3)
+    available_at = db.Column(db.DateTime, default=datetime.utcnow)  # not claimable before this (retry backoff)
+    priority = db.Column(db.Integer, default=0)  # copied from the task; higher is claimed first
+    owner = db.Column(db.String(100), nullable=True)  # copied from the task; owners take turns within a priority
+    claimed_at = db.Column(db.DateTime, nullable=True)  # last time a worker claimed this job
+    lease_token = db.Column(db.String(36), nullable=True)
+    lease_owner = db.Column(db.String(100), nullable=True)
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __init__(self, task_id, max_attempts=3, priority=0, owner=None):
+        self.task_id = task_id
+        self.max_attempts = max_attempts
+        self.priority = priority
+        self.owner = owner
+        
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'task_id': self.task_id,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'priority': self.priority,
+            'owner': self.owner,
+            'claimed_at': self.claimed_at.isoformat() if self.claimed_at else None,
+            'lease_owner': self.lease_owner,
+            'lease_expires_at': self.lease_expires_at.isoformat() if self.lease_expires_at else None,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat()
+        }
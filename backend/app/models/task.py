@@ -3,26 +3,57 @@ from datetime import datetime
 import json
 
 class Task(db.Model):
+    # Indexes backing the paginated task listing (newest first, optionally by status)
+    __table_args__ = (
+        db.Index('ix_task_status_created_at', 'status', 'created_at'),
+        db.Index('ix_task_created_at', 'created_at')
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     status = db.Column(db.String(20), default='pending')  # pending, in_progress, completed, failed
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     filter_params = db.Column(db.Text, nullable=False)  # JSON string with filter parameters
+    params_hash = db.Column(db.String(64), index=True)  # hash of the canonical filter parameters
+    dataset_task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=True)  # task whose records this task reuses
+    stage_timings = db.Column(db.Text, nullable=True)  # JSON object: processing stage -> seconds
+    progress = db.Column(db.Text, nullable=True)  # JSON object: source -> rows_fetched, rows_stored, done
+    rollup_built_at = db.Column(db.DateTime, nullable=True)  # when the rollup cube of this task's records was built
+    virtual = db.Column(db.Boolean, default=False)  # rows are regenerated from filter_params (incl. seed), never stored
+    priority = db.Column(db.Integer, default=0)  # higher priorities are processed first
+    owner = db.Column(db.String(100), nullable=True)  # who submitted the task; owners share the workers fairly
     
     # Relationship to data records
     data_records = db.relationship('DataRecord', backref='task', lazy=True)
     
+    @property
+    def data_task_id(self):
+        """Task id under which this task's data records are stored"""
+        return self.dataset_task_id or self.id
+    
     def __init__(self, name, filter_params):
         self.name = name
         self.filter_params = json.dumps(filter_params) if isinstance(filter_params, dict) else filter_params
         
-    def to_dict(self):
+    def to_summary_dict(self):
+        """The columns shown in the task list, without the JSON fields"""
         return {
             'id': self.id,
             'name': self.name,
             'status': self.status,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
-            'filter_params': json.loads(self.filter_params) if self.filter_params else {}
+            'dataset_task_id': self.dataset_task_id,
+            'virtual': bool(self.virtual),
+            'priority': self.priority,
+            'owner': self.owner
+        }
+        
+    def to_dict(self):
+        return {
+            **self.to_summary_dict(),
+            'filter_params': json.loads(self.filter_params) if self.filter_params else {},
+            'stage_timings': json.loads(self.stage_timings) if self.stage_timings else None,
+            'progress': json.loads(self.progress) if self.progress else None
         } 
\ No newline at end of file
@@ -0,0 +1,22 @@
+from app import db
+
+class TaskRollup(db.Model):
+    """
+    One cell of a task's rollup cube: sales, quantity and order count of its
+    records per category x brand x month x platform x source
+    """
+    __table_args__ = (
+        db.Index('ix_task_rollup_task_month', 'task_id', 'month'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False)  # task that owns the data records
+    category = db.Column(db.String(100))
+    brand = db.Column(db.String(100))
+    month = db.Column(db.String(7))  # YYYY-MM
+    platform = db.Column(db.String(50))
+    source = db.Column(db.String(50))
+    total_sales = db.Column(db.Float, default=0)
+    total_quantity = db.Column(db.Integer, default=0)
+    order_count = db.Column(db.Integer, default=0)
+
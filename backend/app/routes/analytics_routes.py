@@ -0,0 +1,46 @@
+from flask import request, jsonify
+from app import app
+from app.models.task import Task
+from app.services.rollups import ensure_rollups, query_rollups
+
+# Most tasks a single analytics request may combine
+MAX_ANALYTICS_TASKS = 100
+
+@app.route('/api/analytics', methods=['GET'])
+def get_analytics():
+    """
+    Sales, quantity and order counts of several completed tasks, read from their
+    rollup cubes (never from data_record), sliced by filters and grouped by dimensions
+    """
+    try:
+        task_ids = list(dict.fromkeys(
+            int(value) for value in request.args.get('task_ids', '').split(',') if value.strip()
+        ))
+    except ValueError:
+        return jsonify({'error': 'Bad request', 'message': 'task_ids must be a comma-separated list of task ids'}), 400
+    if not task_ids:
+        return jsonify({'error': 'Bad request', 'message': 'task_ids is required'}), 400
+    if len(task_ids) > MAX_ANALYTICS_TASKS:
+        return jsonify({'error': 'Bad request', 'message': f'At most {MAX_ANALYTICS_TASKS} tasks per request'}), 400
+    
+    found = {task.id: task for task in Task.query.filter(Task.id.in_(task_ids))}
+    missing = [task_id for task_id in task_ids if task_id not in found]
+    if missing:
+        return jsonify({'error': 'Not found', 'message': f"Unknown task ids: {', '.join(map(str, missing))}"}), 404
+    tasks = [found[task_id] for task_id in task_ids]
+    
+    unfinished = [task.id for task in tasks if task.status != 'completed']
+    if unfinished:
+        return jsonify({'error': 'Conflict',
+                        'message': f"Tasks are not completed: {', '.join(map(str, unfinished))}"}), 409
+    
+    ensure_rollups(tasks)
+    try:
+        rows = query_rollups(tasks, request.args)
+    except ValueError as e:
+        return jsonify({'error': 'Bad request', 'message': str(e)}), 400
+    
+    return jsonify({
+        'tasks': [{'id': task.id, 'name': task.name, 'dataset_task_id': task.dataset_task_id} for task in tasks],
+        'rows': rows
+    })
@@ -1,37 +1,173 @@
-from flask import request, jsonify
+import json
+from flask import request, jsonify, Response, stream_with_context, g
 from app import app, db
 from app.models.task import Task
 from app.models.data_record import DataRecord
-from sqlalchemy import and_, or_
+from app.services.aggregates import compute_aggregates
+from app.services.record_export import parse_fields, projected_query, fetch_rows, serialize_row, stream_ndjson
+from app.services.wire_formats import encode_columnar, encode_binary, BINARY_FORMATS
+from app.services.record_filters import apply_record_filters, explain_query
+from app.services.http_cache import cached_task_response
+from app.services.hot_cache import get_task_columns
+from app.services.metrics import ROWS_SERVED
+
+# Largest page a client may request with `limit`
+MAX_PAGE_SIZE = 10000
+
+# Values accepted by the `format` argument of /data
+OUTPUT_FORMATS = ('json', 'ndjson', 'columnar', *BINARY_FORMATS)
+
+def int_arg(name):
+    """An optional integer query argument; raises ValueError if it is not a number"""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+
+def counted(lines, route):
+    """Pass streamed ndjson lines through, counting them as served rows once the stream ends"""
+    served = 0
+    try:
+        for line in lines:
+            served += 1
+            yield line
+    finally:
+        ROWS_SERVED.inc(served, route=route, format='ndjson')
+
+def partial_results_refused(task):
+    """
+    A task's rows are committed batch by batch while it is in progress; they are
+    only served before completion when the client asks for partial results
+    """
+    if task.status == 'completed' or request.args.get('partial', '').lower() in ('1', 'true'):
+        return None
+    return jsonify({
+        'error': 'Conflict',
+        'message': f"Task {task.id} is {task.status}; pass partial=1 for the rows stored so far"
+    }), 409
 
 @app.route('/api/tasks/<int:task_id>/data', methods=['GET'])
 def get_task_data(task_id):
     # Ensure task exists
     task = Task.query.get_or_404(task_id)
+    refused = partial_results_refused(task)
+    if refused:
+        return refused
     
-    # Get filter parameters from request
-    company = request.args.get('company')
-    car_model = request.args.get('car_model')
-    year_from = request.args.get('year_from')
-    year_to = request.args.get('year_to')
+    # Pagination, projection and output format
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        after = int_arg('after')
+        limit = int_arg('limit')
+    except ValueError as e:
+        return jsonify({'error': 'Bad request', 'message': str(e)}), 400
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+    output_format = request.args.get('format', 'json')
+    if output_format not in OUTPUT_FORMATS:
+        return jsonify({'error': 'Bad request',
+                        'message': f"Unknown format {output_format!r}; use one of {', '.join(OUTPUT_FORMATS)}"}), 400
     
-    # Build query
-    query = DataRecord.query.filter_by(task_id=task_id)
+    # Build a column-only query for the requested fields
+    query = projected_query(fields).filter(DataRecord.task_id == task.data_task_id)
     
-    # Apply additional filters if provided
-    if company:
-        query = query.filter(DataRecord.company == company)
-    if car_model:
-        query = query.filter(DataRecord.car_model == car_model)
-    if year_from:
-        query = query.filter(DataRecord.sale_date >= f"{year_from}-01-01")
-    if year_to:
-        query = query.filter(DataRecord.sale_date <= f"{year_to}-12-31")
+    # Apply server-side filters (category, brand, platform, source, location, purchase_date range)
+    try:
+        query = apply_record_filters(query, request.args)
+    except ValueError as e:
+        return jsonify({'error': 'Bad request', 'message': str(e)}), 400
     
-    # Get data
-    data_records = query.all()
+    # Show how SQLite will run the query instead of running it
+    if request.args.get('explain'):
+        if task.virtual:
+            return jsonify({'error': 'Bad request',
+                            'message': f'Task {task.id} is virtual; its rows are generated, not queried'}), 400
+        return jsonify(explain_query(query))
+    
+    # Stream newline-delimited JSON straight from the cursor (or from memory for virtual tasks)
+    if output_format == 'ndjson':
+        route = request.url_rule.rule
+        if task.virtual:
+            # Uncached virtual tasks are streamed chunk by chunk as they are generated
+            columns = get_task_columns(task, build=False)
+            rows = (json.dumps(serialize_row(row, fields)) + '\n'
+                    for row in columns.iter_rows(request.args, fields, after))
+            return Response(counted(rows, route), mimetype='application/x-ndjson')
+        return Response(stream_with_context(counted(stream_ndjson(query, fields, after), route)),
+                        mimetype='application/x-ndjson')
+    
+    # Completed tasks never change: serve them with ETags and from the response cache
+    return cached_task_response(task, lambda: render_page(task, query, fields, after, limit, output_format))
+
+def render_page(task, query, fields, after, limit, output_format):
+    """Run the data query and serialize one page in the requested format"""
+    # Hot tasks are filtered and paginated in memory instead of in SQLite
+    columns = get_task_columns(task)
+    if columns is not None:
+        rows, next_cursor = columns.fetch_rows(request.args, fields, after, limit)
+    else:
+        rows, next_cursor = fetch_rows(query, after, limit)
+    g.rows_served = len(rows)
+    
+    # Columnar JSON: one array per field, text columns dictionary-encoded
+    if output_format == 'columnar':
+        return jsonify({
+            'task': task.to_dict(),
+            'format': 'columnar',
+            'count': len(rows),
+            'columns': encode_columnar(rows, fields),
+            'next_cursor': next_cursor,
+            'partial': task.status != 'completed'
+        })
+    
+    # Arrow IPC stream or Parquet file (optional pandas/pyarrow dependency)
+    if output_format in BINARY_FORMATS:
+        try:
+            body = encode_binary(rows, fields, output_format)
+        except ImportError:
+            return jsonify({'error': 'Not acceptable',
+                            'message': f'format={output_format} requires pandas and pyarrow'}), 406
+        response = Response(body, mimetype=BINARY_FORMATS[output_format])
+        if next_cursor is not None:
+            response.headers['X-Next-Cursor'] = str(next_cursor)
+        if task.status != 'completed':
+            response.headers['X-Partial-Results'] = 'true'
+        return response
     
     return jsonify({
         'task': task.to_dict(),
-        'data': [record.to_dict() for record in data_records]
-    }) 
\ No newline at end of file
+        'data': [serialize_row(row, fields) for row in rows],
+        'next_cursor': next_cursor,
+        'partial': task.status != 'completed'
+    })
+
+@app.route('/api/tasks/<int:task_id>/aggregates', methods=['GET'])
+def get_task_aggregates(task_id):
+    """Pre-aggregated chart data (monthly, category and platform rollups) for a task"""
+    task = Task.query.get_or_404(task_id)
+    refused = partial_results_refused(task)
+    if refused:
+        return refused
+    
+    def render():
+        try:
+            # Hot tasks are aggregated in memory, others with SQL GROUP BY
+            columns = get_task_columns(task)
+            if columns is not None:
+                aggregates = columns.aggregates(request.args)
+            else:
+                aggregates = compute_aggregates(task.data_task_id, request.args)
+        except ValueError as e:
+            return jsonify({'error': 'Bad request', 'message': str(e)}), 400
+        g.rows_served = aggregates['summary']['record_count']
+        
+        return jsonify({
+            'task': task.to_dict(),
+            **aggregates,
+            'partial': task.status != 'completed'
+        })
+    
+    return cached_task_response(task, render)
\ No newline at end of file
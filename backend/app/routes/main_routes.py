@@ -1,5 +1,12 @@
-from flask import jsonify
+import time
+from flask import jsonify, request, g, Response
 from app import app
+from app.services.task_queue import get_queue_stats
+from app.services.result_cache import get_cache_stats
+from app.services.metrics import render_metrics, REQUEST_SECONDS, REQUESTS, ROWS_SERVED
+from app.services.compression import compress_response
+from app.services.http_cache import get_response_cache_stats
+from app.services.hot_cache import get_hot_cache_stats
 
 @app.route('/', methods=['GET'])
 def index():
@@ -8,18 +15,80 @@ def index():
         'status': 'success',
         'message': 'Data Sourcing and Visualization API',
         'api_endpoints': {
-            'GET /api/tasks': 'Get all tasks',
+            'GET /api/tasks': 'Get a page of tasks, newest first (filters: status, name; pagination: limit, after)',
+            'GET /api/tasks/summary': 'Get task counts per status',
             'GET /api/tasks/<task_id>': 'Get a specific task by ID',
             'POST /api/tasks': 'Create a new task',
-            'GET /api/tasks/<task_id>/data': 'Get data for a specific task'
+            'POST /api/tasks/batch': 'Create many tasks in one transaction (queued behind interactive tasks by default)',
+            'GET /api/tasks/<task_id>/data': 'Get data for a specific task',
+            'GET /api/tasks/<task_id>/aggregates': 'Get chart aggregates for a specific task',
+            'GET /api/tasks/events': 'Stream status changes of all tasks (Server-Sent Events)',
+            'GET /api/tasks/<task_id>/events': 'Stream status changes of a specific task (Server-Sent Events)',
+            'GET /api/analytics': 'Compare several completed tasks using their pre-computed rollups',
+            'GET /api/queue': 'Get task queue depth and worker pool status',
+            'GET /api/cache': 'Get dataset, response and hot task cache hit/miss statistics',
+            'GET /api/metrics': 'Get processing and request metrics (Prometheus text format)'
         },
         'version': '1.0.0'
     })
 
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """
+    Time every response, labelled by route pattern so ids do not create new series.
+    Views that return records set g.rows_served (streamed responses count their own).
+    """
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, method=request.method)
+        REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+        rows = g.pop('rows_served', None)
+        if rows is not None and response.status_code == 200:
+            ROWS_SERVED.inc(rows, route=route, format=request.args.get('format', 'json'))
+    return response
+
+@app.after_request
+def compress(response):
+    """gzip/brotli-compress response bodies for clients that accept it"""
+    return compress_response(response, request.headers.get('Accept-Encoding'),
+                             app.config['COMPRESSION_MIN_SIZE'], app.config['COMPRESSION_LEVEL'])
+
+@app.errorhandler(404)
+def not_found(error):
+    return {'error': 'Not found', 'message': 'The requested resource was not found'}, 404
+
+@app.errorhandler(500)
+def server_error(error):
+    return {'error': 'Server error', 'message': 'An internal server error occurred'}, 500
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint to verify API is working"""
     return jsonify({
         'status': 'healthy',
         'message': 'API is running'
-    }) 
\ No newline at end of file
+    })
+
+@app.route('/api/queue', methods=['GET'])
+def queue_status():
+    """Task queue depth and worker pool usage"""
+    return jsonify(get_queue_stats())
+
+@app.route('/api/cache', methods=['GET'])
+def cache_status():
+    """Dataset, response body and hot task cache entries and hit/miss counters"""
+    return jsonify({
+        **get_cache_stats(),
+        'responses': get_response_cache_stats(),
+        'hot_tasks': get_hot_cache_stats()
+    })
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Stage timings, row counts and request durations in Prometheus text format"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
\ No newline at end of file
@@ -1,33 +1,204 @@
-from flask import request, jsonify
+from flask import request, jsonify, Response
 from app import app, db
 from app.models.task import Task
-from app.services.task_queue import queue_task
+from app.services.task_queue import queue_task, queue_tasks
+from app.services.task_events import subscribe, unsubscribe, event_stream, publish_task_event
+from app.services.http_cache import cached_task_response
+from app.services.virtual_tasks import wants_virtual, prepare_virtual_params, parse_seed
+from app.services.source_registry import SOURCES
+from app.services.task_listing import list_tasks, count_tasks_by_status, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.routes.data_routes import int_arg
 import json
 
+# Tasks created one at a time are interactive and go ahead of batch submissions by default;
+# clients may pass any priority in PRIORITY_RANGE (higher is processed first)
+INTERACTIVE_PRIORITY = 0
+BATCH_PRIORITY = -10
+PRIORITY_RANGE = (-100, 100)
+
+# Largest number of tasks accepted by POST /api/tasks/batch
+MAX_BATCH_SIZE = 500
+
 @app.route('/api/tasks', methods=['GET'])
 def get_tasks():
-    tasks = Task.query.all()
-    return jsonify([task.to_dict() for task in tasks])
+    """One page of tasks, newest first, optionally filtered by status and name"""
+    try:
+        limit = int_arg('limit')
+        limit = DEFAULT_PAGE_SIZE if limit is None else max(1, min(limit, MAX_PAGE_SIZE))
+        tasks, next_cursor = list_tasks(request.args, limit)
+    except ValueError as e:
+        return jsonify({'error': 'Bad request', 'message': str(e)}), 400
+    
+    return jsonify({
+        'tasks': [task.to_summary_dict() for task in tasks],
+        'next_cursor': next_cursor
+    })
+
+@app.route('/api/tasks/summary', methods=['GET'])
+def get_task_summary():
+    """Task counts per status (accepts the same filters as the listing)"""
+    try:
+        return jsonify(count_tasks_by_status(request.args))
+    except ValueError as e:
+        return jsonify({'error': 'Bad request', 'message': str(e)}), 400
 
 @app.route('/api/tasks/<int:task_id>', methods=['GET'])
 def get_task(task_id):
     task = Task.query.get_or_404(task_id)
-    return jsonify(task.to_dict())
+    # The task JSON changes with updated_at, so even unfinished tasks can answer 304
+    return cached_task_response(task, lambda: jsonify(task.to_dict()), etag_unfinished=True)
+
+def parse_priority(value, default):
+    """A task priority from the request body; raises ValueError if it is not an integer in range"""
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"priority must be an integer, got {value!r}")
+    low, high = PRIORITY_RANGE
+    if not low <= value <= high:
+        raise ValueError(f"priority must be between {low} and {high}")
+    return value
+
+def parse_filter_params(filter_params):
+    """
+    Reject filter_params that could only fail once the task runs (and be retried
+    until it runs out of attempts): unknown data sources, malformed years, and
+    num_records or seed out of range. Returns filter_params; raises ValueError.
+    """
+    if not isinstance(filter_params, dict):
+        raise ValueError("filter_params must be a JSON object")
+    
+    data_sources = filter_params.get('data_sources')
+    if data_sources is not None:
+        if not isinstance(data_sources, list) or not all(isinstance(source, str) for source in data_sources):
+            raise ValueError("data_sources must be a list of source names")
+        unknown = [source for source in data_sources if source not in SOURCES]
+        if unknown:
+            raise ValueError(f"Unknown data source: {', '.join(unknown)} "
+                             f"(available: {', '.join(sorted(SOURCES))})")
+    
+    for name in ('year_from', 'year_to'):
+        value = filter_params.get(name)
+        if value not in (None, ''):
+            try:
+                int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be a year, got {value!r}")
+    
+    num_records = filter_params.get('num_records')
+    if num_records not in (None, ''):
+        high = app.config['MAX_NUM_RECORDS']
+        try:
+            count = int(num_records)
+        except (TypeError, ValueError):
+            count = None
+        if isinstance(num_records, (bool, float)) or count is None or not 1 <= count <= high:
+            raise ValueError(f"num_records must be an integer from 1 to {high}, got {num_records!r}")
+    
+    if filter_params.get('seed') not in (None, ''):
+        parse_seed(filter_params['seed'])
+    return filter_params
+
+def request_owner(data):
+    """Who submits the task: the `owner` in the body, otherwise the client address"""
+    owner = (data.get('owner') if isinstance(data, dict) else None) or request.remote_addr or 'anonymous'
+    return str(owner)[:100]
+
+def build_task(spec, owner, default_priority):
+    """A new (unsaved) task from a task description; raises ValueError if it is invalid"""
+    if not isinstance(spec, dict):
+        raise ValueError("a task must be a JSON object")
+    filter_params = parse_filter_params(spec.get('filter_params', {}))
+    priority = parse_priority(spec.get('priority'), default_priority)
+    
+    # Virtual tasks store only their parameters and seed; rows are regenerated on read
+    virtual = wants_virtual(filter_params)
+    if virtual:
+        filter_params = prepare_virtual_params(filter_params)
+    
+    task = Task(
+        name=spec.get('name', 'New Task'),
+        filter_params=filter_params
+    )
+    task.virtual = virtual
+    task.priority = priority
+    task.owner = owner
+    return task
 
 @app.route('/api/tasks', methods=['POST'])
 def create_task():
-    data = request.json
+    data = request.get_json(silent=True)
     
     # Create new task
-    task = Task(
-        name=data.get('name', 'New Task'),
-        filter_params=data.get('filter_params', {})
-    )
+    try:
+        task = build_task(data, request_owner(data), INTERACTIVE_PRIORITY)
+    except ValueError as e:
+        return jsonify({'error': 'Bad request', 'message': str(e)}), 400
     
     db.session.add(task)
     db.session.commit()
+    publish_task_event(task)
     
     # Start processing task in background
-    queue_task(task.id)
+    queue_task(task)
+    
+    return jsonify(task.to_dict()), 201
+
+@app.route('/api/tasks/batch', methods=['POST'])
+def create_tasks():
+    """
+    Create many tasks in one transaction. The body is {"tasks": [...], "owner": ...,
+    "priority": ...}; each task takes the same fields as POST /api/tasks and may
+    override the batch priority. Nothing is created if any task is invalid.
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Bad request', 'message': 'The body must be a JSON object'}), 400
+    specs = data.get('tasks')
+    if not isinstance(specs, list) or not specs:
+        return jsonify({'error': 'Bad request', 'message': 'tasks must be a non-empty list'}), 400
+    if len(specs) > MAX_BATCH_SIZE:
+        return jsonify({'error': 'Bad request',
+                        'message': f'At most {MAX_BATCH_SIZE} tasks per batch, got {len(specs)}'}), 400
+    
+    owner = request_owner(data)
+    tasks = []
+    try:
+        default_priority = parse_priority(data.get('priority'), BATCH_PRIORITY)
+        for index, spec in enumerate(specs):
+            try:
+                tasks.append(build_task(spec, owner, default_priority))
+            except ValueError as e:
+                raise ValueError(f"tasks[{index}]: {e}")
+    except ValueError as e:
+        return jsonify({'error': 'Bad request', 'message': str(e)}), 400
+    
+    # One commit for all tasks and their jobs
+    queue_tasks(tasks)
+    for task in tasks:
+        publish_task_event(task)
     
-    return jsonify(task.to_dict()), 201 
\ No newline at end of file
+    return jsonify({'tasks': [task.to_summary_dict() for task in tasks]}), 201
+
+def sse_response(subscription, initial=None):
+    """Wrap an event stream in a text/event-stream response that unsubscribes when closed"""
+    response = Response(event_stream(subscription, initial), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # disable proxy buffering (nginx)
+    response.call_on_close(lambda: unsubscribe(subscription))
+    return response
+
+@app.route('/api/tasks/events', methods=['GET'])
+def task_events():
+    """Server-Sent Events stream of status changes for all tasks"""
+    return sse_response(subscribe())
+
+@app.route('/api/tasks/<int:task_id>/events', methods=['GET'])
+def task_status_events(task_id):
+    """Server-Sent Events stream for one task, starting with its current state"""
+    subscription = subscribe(task_id)
+    task = Task.query.get(task_id)
+    if task is None:
+        unsubscribe(subscription)
+        return jsonify({'error': 'Not found', 'message': 'The requested resource was not found'}), 404
+    return sse_response(subscription, task.to_dict())
\ No newline at end of file
@@ -0,0 +1,99 @@
+from sqlalchemy import func
+from app import db
+from app.models.data_record import DataRecord
+from app.services.dimensions import dimension_column, lookup_names
+from app.services.record_filters import apply_record_filters
+
+# Sales value of a single record (unit price times quantity)
+ORDER_VALUE = DataRecord.price * DataRecord.quantity
+
+def money(value):
+    """
+    A SUM or AVG rounded to cents, always a float (NULL, i.e. no priced rows,
+    is 0.0) so the body matches the in-memory path (hot_cache.format_aggregates)
+    """
+    return round(float(value or 0), 2)
+
+def compute_aggregates(task_id, filters=None):
+    """
+    Compute the chart rollups for a task with SQL GROUP BY instead of
+    shipping every row to the browser. Dimensions are grouped by their
+    lookup ids and named afterwards.
+    """
+    filters = filters or {}
+    source_id, category_id, platform_id, brand_id = (
+        dimension_column(field) for field in ('source', 'category', 'platform', 'brand')
+    )
+
+    def grouped(*columns):
+        query = db.session.query(*columns).filter(DataRecord.task_id == task_id)
+        return apply_record_filters(query, filters)
+
+    # Overall totals and per-source record counts
+    record_count, total_sales = grouped(func.count(DataRecord.id), func.sum(ORDER_VALUE)).one()
+    task_record_count = (db.session.query(func.count(DataRecord.id))
+                         .filter(DataRecord.task_id == task_id)
+                         .scalar())
+    source_rows = grouped(source_id, func.count(DataRecord.id)).group_by(source_id).all()
+    source_names = lookup_names('source', [key for key, _ in source_rows])
+    source_counts = {source_names[key]: count for key, count in source_rows}
+
+    # Sales by month (purchase_date is stored as ISO text in SQLite)
+    month = func.strftime('%Y-%m', DataRecord.purchase_date)
+    monthly_rows = grouped(month, func.sum(ORDER_VALUE)).group_by(month).order_by(month).all()
+
+    # Sales by category, largest first
+    category_total = func.sum(ORDER_VALUE)
+    category_rows = (grouped(category_id, category_total)
+                     .group_by(category_id)
+                     .order_by(category_total.desc())
+                     .all())
+    category_names = lookup_names('category', [key for key, _ in category_rows])
+
+    # Online vs Store comparison, by platform name (no platform first)
+    platform_rows = (grouped(platform_id,
+                             func.sum(ORDER_VALUE),
+                             func.avg(ORDER_VALUE),
+                             func.sum(DataRecord.quantity),
+                             func.count(DataRecord.id))
+                     .group_by(platform_id)
+                     .all())
+    platform_names = lookup_names('platform', [row[0] for row in platform_rows])
+    platform_rows = sorted(
+        ((platform_names[key], *values) for key, *values in platform_rows),
+        key=lambda row: (row[0] is not None, row[0] or '')
+    )
+
+    # Brand options for the filter dropdown ignore the active filters
+    brand_ids = [key for (key,) in db.session.query(brand_id)
+                 .filter(DataRecord.task_id == task_id, brand_id.isnot(None))
+                 .distinct()]
+    brands = sorted(lookup_names('brand', brand_ids).values())
+
+    return {
+        'summary': {
+            'record_count': record_count,
+            'task_record_count': task_record_count,
+            'total_sales': money(total_sales),
+            'source_counts': source_counts
+        },
+        'monthly_sales': [
+            {'month': month_key, 'sales': money(sales)}
+            for month_key, sales in monthly_rows if month_key
+        ],
+        'category_sales': [
+            {'category': category_names[category], 'total_sales': money(sales)}
+            for category, sales in category_rows
+        ],
+        'platforms': [
+            {
+                'platform': platform,
+                'total_sales': money(sales),
+                'avg_order_value': money(avg_value),
+                'total_items': items or 0,
+                'order_count': count
+            }
+            for platform, sales, avg_value, items, count in platform_rows
+        ],
+        'brands': brands
+    }
@@ -0,0 +1,59 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+def accepted_encodings(accept_encoding):
+    """Encodings listed in an Accept-Encoding header (ignoring q=0)"""
+    encodings = set()
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0'):
+            continue
+        if name:
+            encodings.add(name.strip().lower())
+    return encodings
+
+def choose_encoding(accept_encoding):
+    """Prefer brotli when both sides support it, then gzip"""
+    encodings = accepted_encodings(accept_encoding or '')
+    if brotli is not None and 'br' in encodings:
+        return 'br'
+    if 'gzip' in encodings:
+        return 'gzip'
+    return None
+
+def compress_response(response, accept_encoding, min_size, level):
+    """
+    Compress a buffered response body in place when the client accepts it.
+    Streamed responses (NDJSON, event streams) and small bodies are left alone.
+    """
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code >= 300
+            or 'Content-Encoding' in response.headers):
+        return response
+    
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < min_size:
+        return response
+    
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=min(level, 11))
+    else:
+        compressed = gzip.compress(body, compresslevel=min(level, 9))
+    
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    
+    # A strong ETag identifies exact bytes, so each encoding gets its own
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f'{etag}-{encoding}')
+    return response
@@ -47,6 +47,34 @@ def filter_record(record, filter_params):
             
     return True
 
+def make_record_filter(filter_params):
+    """
+    Build a predicate equivalent to filter_record, with the parameters parsed once.
+    Years are compared on the first four characters of the ISO purchase_date
+    (or on a datetime's year) so the date does not have to be parsed per record.
+    """
+    year_range = None
+    if 'year_from' in filter_params and 'year_to' in filter_params:
+        year_range = (int(filter_params['year_from']), int(filter_params['year_to']))
+    companies = set(filter_params.get('companies') or [])
+    categories = set(filter_params.get('categories') or [])
+    
+    def predicate(record):
+        if year_range:
+            purchase_date = record.get('purchase_date')
+            if not purchase_date:
+                return False
+            year = purchase_date.year if isinstance(purchase_date, datetime) else int(purchase_date[:4])
+            if year < year_range[0] or year > year_range[1]:
+                return False
+        if companies and record.get('brand') not in companies:
+            return False
+        if categories and record.get('category') not in categories:
+            return False
+        return True
+    
+    return predicate
+
 def fetch_data_from_source_a(filter_params):
     """
     Simulate fetching data from Source A (JSON file) - Online store data
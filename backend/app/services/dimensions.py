@@ -0,0 +1,92 @@
+import threading
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert
+from app import db
+from app.models.data_record import DataRecord
+from app.models.dimension import DIMENSION_MODELS
+from app.storage import RoutingSession
+
+# Text fields of DataRecord stored as keys into a lookup table
+DIMENSION_FIELDS = list(DIMENSION_MODELS)
+
+# Process-wide name <-> id maps per dimension. Lookup rows are never updated or
+# deleted, so a mapping stays valid once it has been committed.
+ids_by_name = {field: {} for field in DIMENSION_FIELDS}
+names_by_id = {field: {} for field in DIMENSION_FIELDS}
+cache_lock = threading.Lock()
+
+# Session.info key of the (field, id, name) rows a session read after inserting
+# lookup rows; they only reach the process-wide maps once its transaction commits
+PENDING_KEY = 'pending_dimensions'
+
+def dimension_column(field):
+    """The DataRecord foreign key column of a dimension"""
+    return getattr(DataRecord, f'{field}_id')
+
+def remember(field, pairs):
+    with cache_lock:
+        for dimension_id, name in pairs:
+            ids_by_name[field][name] = dimension_id
+            names_by_id[field][dimension_id] = name
+
+def cache_pairs(field, pairs):
+    """
+    Remember (id, name) pairs read from the database, or hold them until commit
+    if this session has inserted lookup rows its transaction could still roll back
+    """
+    pending = db.session.info.get(PENDING_KEY)
+    if pending is None:
+        remember(field, pairs)
+    else:
+        pending.extend((field, dimension_id, name) for dimension_id, name in pairs)
+    return pairs
+
+@event.listens_for(RoutingSession, 'after_commit')
+def remember_pending(session):
+    for field, dimension_id, name in session.info.pop(PENDING_KEY, ()):
+        remember(field, [(dimension_id, name)])
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def forget_pending(session):
+    session.info.pop(PENDING_KEY, None)
+
+def lookup_ids(field, names):
+    """Map names to ids (names that were never stored are left out)"""
+    known = ids_by_name[field]
+    ids = {name: known[name] for name in names if name in known}
+    missing = {name for name in names if name not in ids}
+    if missing:
+        model = DIMENSION_MODELS[field]
+        pairs = db.session.query(model.id, model.name).filter(model.name.in_(missing)).all()
+        ids.update((name, dimension_id) for dimension_id, name in cache_pairs(field, pairs))
+    return ids
+
+def ensure_ids(field, names):
+    """
+    Map names to ids, adding names that are not in the lookup table yet.
+    New names are inserted in the caller's transaction (an ingest batch is
+    committed as a whole); their ids are cached once it commits, so an id is
+    never cached for a row that a rollback removes.
+    """
+    names = {name for name in names if name is not None}
+    ids = lookup_ids(field, names)
+    missing = names - set(ids)
+    if missing:
+        model = DIMENSION_MODELS[field]
+        # Another worker may add the same name concurrently; the unique index keeps one
+        db.session.execute(insert(model.__table__).on_conflict_do_nothing(),
+                           [{'name': name} for name in missing])
+        db.session.info.setdefault(PENDING_KEY, [])
+        ids.update(lookup_ids(field, missing))
+    return ids
+
+def lookup_names(field, ids):
+    """Map ids to names (None stays None)"""
+    known = names_by_id[field]
+    names = {dimension_id: known.get(dimension_id) for dimension_id in ids}
+    missing = {dimension_id for dimension_id, name in names.items() if dimension_id is not None and name is None}
+    if missing:
+        model = DIMENSION_MODELS[field]
+        pairs = db.session.query(model.id, model.name).filter(model.id.in_(missing)).all()
+        names.update(cache_pairs(field, pairs))
+    return names
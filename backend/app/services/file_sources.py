@@ -0,0 +1,85 @@
+import csv
+import json
+import mmap
+import os
+from app.services.data_source import make_record_filter
+
+# Numeric columns converted from their text form (CSV) after a row passes the filters
+FLOAT_COLUMNS = ('price', 'rating')
+INT_COLUMNS = ('quantity',)
+
+def normalize_record(record):
+    """Convert empty strings to None and numeric text to numbers"""
+    for key, value in record.items():
+        if value == '':
+            record[key] = None
+    for key in FLOAT_COLUMNS:
+        if isinstance(record.get(key), str):
+            record[key] = float(record[key])
+    for key in INT_COLUMNS:
+        if isinstance(record.get(key), str):
+            record[key] = int(record[key])
+    return record
+
+def read_json_lines(path, filter_params):
+    """
+    Stream records from a JSON-lines file, memory-mapped so only the pages
+    being read are resident. Records failing the filters are skipped as they are read.
+    """
+    predicate = make_record_filter(filter_params)
+    
+    # mmap cannot map an empty file
+    if os.path.getsize(path) == 0:
+        return
+    
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for line in iter(mapped.readline, b''):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if predicate(record):
+                yield normalize_record(record)
+
+def read_json_array(path, filter_params):
+    """Read a file holding a single JSON array (loaded whole, intended for small sample files)"""
+    predicate = make_record_filter(filter_params)
+    with open(path) as f:
+        records = json.load(f)
+    for record in records:
+        if predicate(record):
+            yield normalize_record(record)
+
+def read_json(path, filter_params):
+    """Dispatch on the file layout: a JSON array or JSON lines"""
+    with open(path, 'rb') as f:
+        head = f.read(64).lstrip()
+    if head.startswith(b'['):
+        return read_json_array(path, filter_params)
+    return read_json_lines(path, filter_params)
+
+def read_csv(path, filter_params):
+    """
+    Stream records from a CSV file with a header row. The filters run on the raw
+    text values; numbers are only converted for rows that are kept.
+    """
+    predicate = make_record_filter(filter_params)
+    with open(path, newline='', buffering=1024 * 1024) as f:
+        for record in csv.DictReader(f):
+            if predicate(record):
+                yield normalize_record(record)
+
+# Readers by file extension
+FILE_READERS = {
+    '.json': read_json,
+    '.jsonl': read_json_lines,
+    '.ndjson': read_json_lines,
+    '.csv': read_csv
+}
+
+def file_reader_for(path):
+    """Return the reader function for a file path, based on its extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FILE_READERS:
+        raise ValueError(f"Unsupported data source file type: {path}")
+    return FILE_READERS[extension]
@@ -0,0 +1,593 @@
+import json
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+from sqlalchemy import bindparam
+from app import app, db
+from app.models.task import Task
+from app.models.data_record import DataRecord
+from app.models.dimension import DIMENSION_MODELS
+from app.services.dimensions import lookup_names
+from app.services.record_export import RECORD_FIELDS, STREAM_BATCH_SIZE, projected_query
+from app.services.result_cache import DEFAULT_DATA_SOURCES
+from app.services.synthetic_data import generate_chunks
+from app.services.record_filters import COLUMN_FILTERS, purchase_date_range
+
+# Column kinds of the in-memory store (every other record field is dictionary-encoded text)
+INTEGER_FIELDS = ('id', 'task_id', 'quantity')
+FLOAT_FIELDS = ('price', 'rating')
+DATE_FIELDS = ('purchase_date',)
+
+# Rough in-memory size of one record, used to skip tasks that could never fit the budget
+ESTIMATED_ROW_BYTES = 80
+
+# Rows read from SQLite per round trip while loading a task
+LOAD_BATCH_SIZE = 50000
+
+# Tasks remembered as too large for the budget (with their size), most recently seen kept
+MAX_OVERSIZED_ENTRIES = 1000
+
+def virtual_batches(task_id, created_at, filter_params):
+    """
+    Regenerate a virtual task's records from its seed and parameters as batches
+    of {field: values} (one per generated chunk), numbered in the order
+    process_task would have stored them
+    """
+    next_id = 1
+    for source in filter_params.get('data_sources', DEFAULT_DATA_SOURCES):
+        chunks = generate_chunks(source, filter_params, int(filter_params['num_records']),
+                                 seed=filter_params.get('seed'))
+        for chunk in chunks:
+            size = len(chunk['category'])
+            batch = {field: [None] * size if values is None else values for field, values in chunk.items()}
+            batch.update(id=np.arange(next_id, next_id + size), task_id=np.full(size, task_id),
+                         source=[source] * size, created_at=[created_at] * size)
+            next_id += size
+            yield batch
+
+def estimated_virtual_bytes(filter_params):
+    """Hot cache memory a virtual task with these parameters needs (at most num_records per source)"""
+    data_sources = filter_params.get('data_sources') or DEFAULT_DATA_SOURCES
+    return int(filter_params['num_records']) * len(data_sources) * ESTIMATED_ROW_BYTES
+
+def load_sql():
+    """qmark SQL reading every field of one task's records (lookup ids for dimensions)"""
+    query = (projected_query(RECORD_FIELDS)
+             .filter(DataRecord.task_id == bindparam('task_id'))
+             .order_by(DataRecord.id))
+    return str(query.statement.compile(dialect=db.engine.dialect))
+
+class TextColumn:
+    """Dictionary-encoded text: int32 codes into `dictionary`, -1 for NULL"""
+    def __init__(self):
+        self.positions = {None: 0}
+        self.chunks = []
+
+    def extend(self, values):
+        positions = self.positions
+        self.chunks.append(np.array([positions.setdefault(value, len(positions)) for value in values],
+                                    dtype=np.int32) - 1)
+
+    def finish(self, convert=None):
+        self.codes = np.concatenate(self.chunks) if self.chunks else np.empty(0, dtype=np.int32)
+        del self.chunks
+        dictionary = list(self.positions)[1:]
+        self.dictionary = [convert(value) for value in dictionary] if convert else dictionary
+        self.positions = {value: code for code, value in enumerate(self.dictionary)}
+        # Object lookup table whose last slot (index -1) is None
+        self.lookup = np.array(self.dictionary + [None], dtype=object)
+
+    def code_of(self, value):
+        return self.positions.get(value)
+
+    def take(self, indices):
+        return self.lookup[self.codes[indices]].tolist()
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + sum(sys.getsizeof(value) for value in self.dictionary)
+
+class TaskColumns:
+    """All data records of one task held column-wise in NumPy arrays"""
+    def __init__(self, key):
+        self.key = key
+        self.numbers = {}
+        self.text = {}
+
+    @classmethod
+    def encode(cls, key, batches, convert=None):
+        """
+        Build the store from batches of {field: values}, column by column.
+        convert(field, column) may return a function applied to each distinct
+        value of a text column.
+        """
+        store = cls(key)
+        numbers = {field: [] for field in INTEGER_FIELDS + FLOAT_FIELDS + DATE_FIELDS}
+        text = {field: TextColumn() for field in RECORD_FIELDS if field not in numbers}
+
+        for batch in batches:
+            for field, values in batch.items():
+                if field in text:
+                    text[field].extend(values)
+                elif field in DATE_FIELDS:
+                    numbers[field].append(np.array(values, dtype='datetime64[us]'))
+                else:
+                    numbers[field].append(np.array(values, dtype=np.float64))
+
+        for field, chunks in numbers.items():
+            empty = np.empty(0, dtype='datetime64[us]' if field in DATE_FIELDS else np.float64)
+            column = np.concatenate(chunks) if chunks else empty
+            # Integer columns stay integers unless they contain NULLs
+            if field in INTEGER_FIELDS and not np.isnan(column).any():
+                column = column.astype(np.int64)
+            store.numbers[field] = column
+        for field, column in text.items():
+            column.finish(convert(field, column) if convert else None)
+            store.text[field] = column
+        return store
+
+    @classmethod
+    def load(cls, key):
+        """Read a task's records from SQLite in batches"""
+        def batches():
+            cursor = db.session.connection().connection.cursor()
+            try:
+                cursor.execute(load_sql(), (key[0],))
+                while True:
+                    rows = cursor.fetchmany(LOAD_BATCH_SIZE)
+                    if not rows:
+                        return
+                    yield dict(zip(RECORD_FIELDS, zip(*rows)))
+            finally:
+                cursor.close()
+
+        def convert(field, column):
+            # Dimensions were read as lookup ids; created_at is stored as text by SQLite,
+            # serve it as a datetime like the ORM does
+            if field in DIMENSION_MODELS:
+                return lookup_names(field, list(column.positions)).get
+            return datetime.fromisoformat if field == 'created_at' else None
+
+        return cls.encode(key, batches(), convert)
+
+    @classmethod
+    def generate(cls, key, task):
+        """Regenerate all of a virtual task's records (see virtual_batches)"""
+        return cls.encode(key, virtual_batches(task.id, task.created_at, json.loads(task.filter_params)))
+
+    @property
+    def size(self):
+        return len(self.numbers['id'])
+
+    @property
+    def nbytes(self):
+        return (sum(column.nbytes for column in self.numbers.values())
+                + sum(column.nbytes for column in self.text.values()))
+
+    def mask(self, args):
+        """Boolean selection for the /data filters (same semantics as apply_record_filters)"""
+        selected = np.ones(self.size, dtype=bool)
+        for name in COLUMN_FILTERS:
+            value = args.get(name)
+            if not value:
+                continue
+            column = self.text[name]
+            codes = [column.code_of(item.strip()) for item in value.split(',') if item.strip()]
+            selected &= np.isin(column.codes, [code for code in codes if code is not None])
+
+        # NaT compares False, so records without a purchase date drop out like NULLs in SQL
+        start, end = purchase_date_range(args)
+        if start:
+            selected &= self.numbers['purchase_date'] >= np.datetime64(start, 'us')
+        if end:
+            selected &= self.numbers['purchase_date'] < np.datetime64(end, 'us')
+        return selected
+
+    def take(self, field, indices):
+        """Python values of one field for the given row indices"""
+        if field in self.text:
+            return self.text[field].take(indices)
+        column = self.numbers[field][indices]
+        if field in DATE_FIELDS:
+            return column.astype('datetime64[us]').astype(object).tolist()
+        values = column.tolist()
+        if column.dtype.kind == 'f':
+            values = [None if value != value else value for value in values]
+            if field in INTEGER_FIELDS:
+                values = [None if value is None else int(value) for value in values]
+        return values
+
+    def selection(self, args, after=None):
+        """Row indices matching the filters, after the `after` cursor, in id order"""
+        selected = self.mask(args)
+        if after is not None:
+            selected &= self.numbers['id'] > after
+        return np.flatnonzero(selected)
+
+    def fetch_rows(self, args, fields, after=None, limit=None):
+        """In-memory counterpart of record_export.fetch_rows: (row tuples, next_cursor)"""
+        indices = self.selection(args, after)
+
+        next_cursor = None
+        if limit is not None and len(indices) > limit:
+            indices = indices[:limit]
+            next_cursor = int(self.numbers['id'][indices[-1]])
+        columns = [self.take(field, indices) for field in fields]
+        return list(zip(*columns)), next_cursor
+
+    def iter_rows(self, args, fields, after=None):
+        """All matching rows in batches of STREAM_BATCH_SIZE (for ndjson streaming)"""
+        indices = self.selection(args, after)
+        for start in range(0, len(indices), STREAM_BATCH_SIZE):
+            batch = indices[start:start + STREAM_BATCH_SIZE]
+            yield from zip(*[self.take(field, batch) for field in fields])
+
+    def count_by(self, field):
+        """Number of rows per value of a text column"""
+        column = self.text[field]
+        counts = np.bincount(column.codes + 1, minlength=len(column.dictionary) + 1)
+        return {value: int(count) for value, count in zip([None] + column.dictionary, counts) if count}
+
+    def summarize(self):
+        """Rows per source and the rollup cube cells (what process_task needs of a virtual task)"""
+        return self.count_by('source'), self.rollup_cells()
+
+    def rollup_cells(self):
+        """In-memory counterpart of the GROUP BY in rollups.build_rollup: one dict per cell"""
+        names = ['category', 'brand', 'platform', 'source']
+        months = self.numbers['purchase_date'].astype('datetime64[M]')
+        month_values, month_codes = np.unique(months, return_inverse=True)
+        codes = [self.text[name].codes + 1 for name in names] + [month_codes]
+        shape = [len(self.text[name].dictionary) + 1 for name in names] + [max(len(month_values), 1)]
+        cells, cell_index = np.unique(np.ravel_multi_index(codes, shape), return_inverse=True)
+
+        quantity = self.numbers['quantity'].astype(np.float64)
+        sales = np.bincount(cell_index, weights=np.nan_to_num(self.numbers['price'] * quantity))
+        quantities = np.bincount(cell_index, weights=np.nan_to_num(quantity))
+        counts = np.bincount(cell_index)
+
+        lookups = [[None] + self.text[name].dictionary for name in names]
+        month_names = [None if np.isnat(month) else str(month) for month in month_values]
+        rows = []
+        for cell, total_sales, total_quantity, order_count in zip(cells, sales, quantities, counts):
+            *dimension_codes, month_code = np.unravel_index(cell, shape)
+            row = {name: lookup[code] for name, lookup, code in zip(names, lookups, dimension_codes)}
+            row.update(month=month_names[month_code] if month_names else None,
+                       total_sales=float(total_sales),
+                       total_quantity=int(total_quantity),
+                       order_count=int(order_count))
+            rows.append(row)
+        return rows
+
+    def aggregate_totals(self, args):
+        """
+        The sums behind aggregates(), keyed by name so that the totals of several
+        stores can be added up (see add_totals)
+        """
+        selected = self.mask(args)
+        price = self.numbers['price']
+        quantity = self.numbers['quantity'].astype(np.float64)
+        order_value = np.where(selected, price * quantity, np.nan)
+        # SUM ignores NULLs in SQL
+        sales = np.nan_to_num(order_value)
+
+        def grouped(column):
+            """Sales and row counts per code of a text column (index 0 is NULL)"""
+            codes = column.codes + 1
+            size = len(column.dictionary) + 1
+            return (np.bincount(codes, weights=sales, minlength=size),
+                    np.bincount(codes, weights=selected, minlength=size),
+                    codes, size)
+
+        _, source_counts, _, _ = grouped(self.text['source'])
+        source_names = [None] + self.text['source'].dictionary
+
+        # Sales by month
+        months = self.numbers['purchase_date'].astype('datetime64[M]')
+        dated = selected & ~np.isnat(months)
+        month_values, month_index = np.unique(months[dated], return_inverse=True)
+        month_sales = np.bincount(month_index, weights=sales[dated], minlength=len(month_values))
+
+        # Sales by category
+        category_sales, category_counts, _, _ = grouped(self.text['category'])
+        category_names = [None] + self.text['category'].dictionary
+
+        # Online vs Store comparison
+        platform_sales, platform_counts, platform_codes, size = grouped(self.text['platform'])
+        valued = selected & ~np.isnan(order_value)
+        platform_valued = np.bincount(platform_codes, weights=valued, minlength=size)
+        platform_items = np.bincount(platform_codes, weights=np.where(selected, quantity, 0), minlength=size)
+        platform_names = [None] + self.text['platform'].dictionary
+
+        return {
+            'record_count': int(selected.sum()),
+            'task_record_count': self.size,
+            'total_sales': float(sales.sum()),
+            'source_counts': {
+                source_names[code]: int(source_counts[code]) for code in np.flatnonzero(source_counts)
+            },
+            'monthly_sales': {str(month): float(total) for month, total in zip(month_values, month_sales)},
+            'category_sales': {
+                category_names[code]: float(category_sales[code]) for code in np.flatnonzero(category_counts)
+            },
+            # platform -> [total sales, orders with a value, items, orders]
+            'platforms': {
+                platform_names[code]: [float(platform_sales[code]), int(platform_valued[code]),
+                                       int(platform_items[code]), int(platform_counts[code])]
+                for code in np.flatnonzero(platform_counts)
+            },
+            'brands': {brand for brand in self.text['brand'].dictionary if brand is not None}
+        }
+
+    def aggregates(self, args):
+        """In-memory counterpart of aggregates.compute_aggregates"""
+        return format_aggregates(self.aggregate_totals(args))
+
+def add_totals(totals, other):
+    """Add the aggregate_totals of another store to `totals` (in place)"""
+    for name in ('record_count', 'task_record_count', 'total_sales'):
+        totals[name] += other[name]
+    for name in ('source_counts', 'monthly_sales', 'category_sales'):
+        for key, value in other[name].items():
+            totals[name][key] = totals[name].get(key, 0) + value
+    for platform, values in other['platforms'].items():
+        current = totals['platforms'].setdefault(platform, [0.0, 0, 0, 0])
+        totals['platforms'][platform] = [a + b for a, b in zip(current, values)]
+    totals['brands'] |= other['brands']
+    return totals
+
+def format_aggregates(totals):
+    """The /aggregates response fields from aggregate_totals"""
+    # Categories largest first; NULL platform first, like ORDER BY in SQLite
+    categories = sorted(totals['category_sales'].items(), key=lambda item: -item[1])
+    platforms = sorted(totals['platforms'], key=lambda name: (name is not None, name or ''))
+    return {
+        'summary': {
+            'record_count': totals['record_count'],
+            'task_record_count': totals['task_record_count'],
+            'total_sales': round(totals['total_sales'], 2),
+            'source_counts': totals['source_counts']
+        },
+        'monthly_sales': [
+            {'month': month, 'sales': round(total, 2)}
+            for month, total in sorted(totals['monthly_sales'].items())
+        ],
+        'category_sales': [
+            {'category': category, 'total_sales': round(total, 2)}
+            for category, total in categories
+        ],
+        'platforms': [
+            {
+                'platform': platform,
+                'total_sales': round(sales, 2),
+                'avg_order_value': round(sales / valued, 2) if valued else 0.0,
+                'total_items': items,
+                'order_count': orders
+            }
+            for platform in platforms
+            for sales, valued, items, orders in [totals['platforms'][platform]]
+        ],
+        'brands': sorted(totals['brands'])
+    }
+
+class ChunkedColumns:
+    """
+    A virtual task that is not kept in the hot cache: every request regenerates
+    its rows one generated chunk at a time, so memory stays at one chunk and a
+    first page stops after the chunk that fills it. Offers the TaskColumns
+    methods the routes and process_task use.
+    """
+    def __init__(self, key, task):
+        self.key = key
+        # Read now: streamed responses iterate after the request's session is gone
+        self.task_id = task.id
+        self.created_at = task.created_at
+        self.filter_params = json.loads(task.filter_params)
+
+    def parts(self):
+        for batch in virtual_batches(self.task_id, self.created_at, self.filter_params):
+            yield TaskColumns.encode(self.key, [batch])
+
+    def fetch_rows(self, args, fields, after=None, limit=None):
+        rows, ids = [], []
+        for part in self.parts():
+            indices = part.selection(args, after)
+            if limit is not None:
+                indices = indices[:limit + 1 - len(rows)]
+            rows.extend(zip(*[part.take(field, indices) for field in fields]))
+            ids.extend(part.numbers['id'][indices].tolist())
+            if limit is not None and len(rows) > limit:
+                break
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = int(ids[limit - 1])
+        return rows, next_cursor
+
+    def iter_rows(self, args, fields, after=None):
+        for part in self.parts():
+            yield from part.iter_rows(args, fields, after)
+
+    def aggregates(self, args):
+        totals = TaskColumns.encode(self.key, []).aggregate_totals(args)
+        for part in self.parts():
+            add_totals(totals, part.aggregate_totals(args))
+        return format_aggregates(totals)
+
+    def summarize(self):
+        """Rows per source and rollup cube cells, merged over the chunks in one pass"""
+        counts, cells = {}, {}
+        for part in self.parts():
+            for source, count in part.count_by('source').items():
+                counts[source] = counts.get(source, 0) + count
+            for cell in part.rollup_cells():
+                key = tuple(cell[name] for name in ('category', 'brand', 'platform', 'source', 'month'))
+                if key in cells:
+                    for name in ('total_sales', 'total_quantity', 'order_count'):
+                        cells[key][name] += cell[name]
+                else:
+                    cells[key] = cell
+        return counts, list(cells.values())
+
+class HotCache:
+    """LRU of TaskColumns keyed by dataset_key, bounded by memory use"""
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.loading = set()
+        self.oversized = OrderedDict()  # key -> measured or estimated bytes
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            store = self.entries.get(key)
+            if store is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return store
+
+    def put(self, store):
+        max_bytes = app.config['HOT_CACHE_MAX_BYTES']
+        nbytes = store.nbytes
+        with self.lock:
+            if nbytes > max_bytes:
+                self.remember_oversized(store.key, nbytes)
+                return
+            if store.key in self.entries:
+                return
+            self.oversized.pop(store.key, None)
+            self.entries[store.key] = store
+            self.size += nbytes
+            self.loads += 1
+            while self.size > max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.nbytes
+                self.evictions += 1
+
+    def remember_oversized(self, key, nbytes):
+        """Record that a task needs `nbytes`; the caller holds the lock"""
+        self.oversized[key] = nbytes
+        self.oversized.move_to_end(key)
+        while len(self.oversized) > MAX_OVERSIZED_ENTRIES:
+            self.oversized.popitem(last=False)
+
+    def mark_oversized(self, key, nbytes):
+        with self.lock:
+            self.remember_oversized(key, nbytes)
+
+    def too_large(self, key):
+        """
+        Whether a task is known not to fit the current budget. The size is kept,
+        not the verdict, so raising HOT_CACHE_MAX_BYTES makes the task loadable again.
+        """
+        nbytes = self.oversized.get(key)
+        return nbytes is not None and nbytes > app.config['HOT_CACHE_MAX_BYTES']
+
+    def fits(self, key, estimate):
+        """Whether a task estimated at `estimate` bytes may be generated into the cache"""
+        with self.lock:
+            return estimate <= app.config['HOT_CACHE_MAX_BYTES'] and not self.too_large(key)
+
+    def start_loading(self, key):
+        """Claim the load of a task; False if it is already loading or does not fit"""
+        with self.lock:
+            if key in self.loading or key in self.entries or self.too_large(key):
+                return False
+            self.loading.add(key)
+            return True
+
+    def finish_loading(self, key):
+        with self.lock:
+            self.loading.discard(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'tasks': [task_id for task_id, _ in self.entries],
+                'bytes': self.size,
+                'max_bytes': app.config['HOT_CACHE_MAX_BYTES'],
+                'hits': self.hits,
+                'misses': self.misses,
+                'loads': self.loads,
+                'evictions': self.evictions,
+                'oversized': len(self.oversized),
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None
+            }
+
+hot_cache = HotCache()
+
+def get_hot_cache_stats():
+    return hot_cache.stats()
+
+def dataset_key(task):
+    """
+    Cache key of the records a task reads: the id and creation time of the task
+    that owns them. SQLite may hand a deleted task's id to a new task (see
+    app/services/retention.py), and the creation time tells the two apart.
+    Returns None if the owning task no longer exists.
+    """
+    owner = task if task.dataset_task_id is None else Task.query.get(task.dataset_task_id)
+    return (owner.id, owner.created_at) if owner is not None else None
+
+def load_task_columns(key):
+    """Background loader: read a task into the hot cache unless it would not fit the budget"""
+    task_id = key[0]
+    with app.app_context():
+        try:
+            estimate = DataRecord.query.filter_by(task_id=task_id).count() * ESTIMATED_ROW_BYTES
+            if estimate > app.config['HOT_CACHE_MAX_BYTES']:
+                hot_cache.mark_oversized(key, estimate)
+                return
+            hot_cache.put(TaskColumns.load(key))
+        except Exception as e:
+            print(f"Error loading task {task_id} into the hot cache: {e}")
+        finally:
+            db.session.remove()
+            hot_cache.finish_loading(key)
+
+def get_task_columns(task, build=True):
+    """
+    The in-memory columns of a completed task, or None. The first request for a
+    task starts loading it in the background and is answered from SQLite.
+    Virtual tasks have no stored rows: their columns are regenerated right away
+    on a miss and kept. A virtual task that does not fit the budget, or any
+    uncached one with build=False (streaming), gets ChunkedColumns instead.
+    """
+    if task.virtual:
+        key = dataset_key(task)
+        store = hot_cache.get(key)
+        if store is not None:
+            return store
+        estimate = estimated_virtual_bytes(json.loads(task.filter_params))
+        if not build or not hot_cache.fits(key, estimate):
+            return ChunkedColumns(key, task)
+        store = TaskColumns.generate(key, task)
+        hot_cache.put(store)
+        return store
+
+    if task.status != 'completed' or app.config['HOT_CACHE_MAX_BYTES'] <= 0:
+        return None
+    key = dataset_key(task)
+    if key is None:
+        return None
+    store = hot_cache.get(key)
+    if store is None and hot_cache.start_loading(key):
+        loader = threading.Thread(target=load_task_columns, args=(key,),
+                                  name=f"hot-cache-load-{task.data_task_id}", daemon=True)
+        loader.start()
+    return store
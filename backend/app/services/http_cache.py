@@ -0,0 +1,152 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import request, Response, g
+from app import app
+from app.services.compression import choose_encoding, compress_response
+
+# Status after which a task's records (and therefore its responses) never change
+IMMUTABLE_STATUS = 'completed'
+
+class BodyCache:
+    """LRU of serialized response bodies, bounded by their total size in bytes"""
+    def __init__(self):
+        self.entries = OrderedDict()  # key -> (body, headers, rows served)
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body, headers, rows=None):
+        max_bytes = app.config['RESPONSE_CACHE_MAX_BYTES']
+        # A body larger than a quarter of the budget would just flush everything else
+        if len(body) > max_bytes // 4:
+            return
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = (body, headers, rows)
+            self.size += len(body)
+            while self.size > max_bytes and self.entries:
+                _, (evicted, _, _) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'max_bytes': app.config['RESPONSE_CACHE_MAX_BYTES'],
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None
+            }
+
+body_cache = BodyCache()
+
+def get_response_cache_stats():
+    return body_cache.stats()
+
+def task_etag(task):
+    """
+    Strong validator for a response about `task`: the task row version plus
+    the exact request (path and query arguments)
+    """
+    args = '&'.join(f'{key}={value}' for key, value in sorted(request.args.items(multi=True)))
+    version = f"{task.id}:{task.data_task_id}:{task.status}:{task.updated_at.isoformat()}"
+    return hashlib.sha256(f"{version}|{request.path}?{args}".encode('utf-8')).hexdigest()[:32]
+
+def matching_etag(if_none_match, etag, encoding):
+    """
+    The validator in an If-None-Match header that matches the current response,
+    or None. Compressed variants carry an encoding suffix (see compress_response):
+    a validator matches when its suffix is the encoding this request would be
+    served with, or when it has none (small bodies are never compressed). The
+    304 repeats the matched validator, which is the one its 200 response carried.
+    """
+    if not if_none_match:
+        return None
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return f'{etag}-{encoding}' if encoding else etag
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        base, _, suffix = candidate.partition('-')
+        if base == etag and suffix in ('', encoding or ''):
+            return candidate
+    return None
+
+def cache_headers(response, task, etag=None):
+    """ETag, Cache-Control and Vary for a response about `task`"""
+    if etag:
+        response.set_etag(etag)
+    if task.status == IMMUTABLE_STATUS:
+        response.headers['Cache-Control'] = f"public, max-age={app.config['HTTP_CACHE_MAX_AGE']}"
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+def cached_task_response(task, build, etag_unfinished=False):
+    """
+    Serve the response built by `build()` (any Flask view return value) with
+    ETag / If-None-Match handling.
+
+    Completed tasks get a strong ETag, a cacheable Cache-Control and their
+    compressed body kept in the in-process LRU, so repeat views skip the
+    query and serialization entirely. Unfinished tasks are built fresh on
+    every request; with etag_unfinished=True (responses derived only from the
+    task row, whose updated_at changes with it) they still get an ETag so
+    polling clients receive 304s.
+    """
+    if task.status != IMMUTABLE_STATUS and not etag_unfinished:
+        response = app.make_response(build())
+        return cache_headers(response, task) if response.status_code == 200 else response
+
+    etag = task_etag(task)
+    accept_encoding = request.headers.get('Accept-Encoding')
+    encoding = choose_encoding(accept_encoding)
+    validator = matching_etag(request.headers.get('If-None-Match'), etag, encoding)
+    if validator:
+        return cache_headers(Response(status=304), task, validator)
+
+    if task.status != IMMUTABLE_STATUS:
+        response = app.make_response(build())
+        return cache_headers(response, task, etag) if response.status_code == 200 else response
+
+    # Bodies are cached per content encoding, already compressed
+    key = (task.id, etag, encoding)
+    entry = body_cache.get(key)
+    if entry is not None:
+        body, headers, g.rows_served = entry
+        return Response(body, headers=headers)
+
+    response = app.make_response(build())
+    if response.status_code != 200:
+        return response
+    cache_headers(response, task, etag)
+    compress_response(response, accept_encoding,
+                      app.config['COMPRESSION_MIN_SIZE'], app.config['COMPRESSION_LEVEL'])
+    body_cache.put(key, response.get_data(), list(response.headers.items()), g.get('rows_served'))
+    return response
@@ -0,0 +1,261 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, func, insert, literal
+from sqlalchemy.orm import aliased
+from app import app, db
+from app.storage import use_worker_engine
+from app.models.job import Job
+from app.models.task import Task
+from app.models.data_record import DataRecord
+from app.models.task_rollup import TaskRollup
+
+# Statuses of jobs that still have work to do
+OPEN_JOB_STATUSES = ('queued', 'running')
+
+def worker_identity():
+    """Name identifying this worker thread across processes and hosts"""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+def new_job(task):
+    """A queued job for a task, carrying its priority and owner. The caller adds and commits it."""
+    return Job(task.id, max_attempts=app.config['JOB_MAX_ATTEMPTS'],
+               priority=task.priority or 0, owner=task.owner)
+
+def enqueue_job(task):
+    """Persist a job for a task so any worker process can pick it up"""
+    job = new_job(task)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+def claimable():
+    """
+    Jobs that are queued and due, or running under a lease that has expired
+    with attempts left (see fail_abandoned_jobs for the others)
+    """
+    now = datetime.utcnow()
+    return or_(
+        and_(Job.status == 'queued', Job.available_at <= now),
+        and_(Job.status == 'running', Job.lease_expires_at < now, Job.attempts < Job.max_attempts)
+    )
+
+def fail_abandoned_jobs():
+    """
+    Fail jobs whose worker died during the last attempt (crash, OOM, kill)
+    without settling the job: the lease expired and no attempts are left.
+    Their tasks are failed as well and any rows stored so far removed.
+    Returns the failed task ids.
+    """
+    now = datetime.utcnow()
+    abandoned = (Job.query
+                 .filter(Job.status == 'running', Job.lease_expires_at < now,
+                         Job.attempts >= Job.max_attempts)
+                 .all())
+    failed = []
+    for job in abandoned:
+        # Conditional on the lease, so only one worker fails each job
+        settled = (Job.query
+                   .filter_by(id=job.id, lease_token=job.lease_token, status='running')
+                   .update({Job.status: 'failed', Job.lease_token: None, Job.lease_expires_at: None,
+                            Job.last_error: f"Lease expired on the last attempt (worker {job.lease_owner})"},
+                           synchronize_session=False))
+        if not settled:
+            continue
+        DataRecord.query.filter_by(task_id=job.task_id).delete()
+        TaskRollup.query.filter_by(task_id=job.task_id).delete()
+        task = Task.query.get(job.task_id)
+        if task:
+            task.status = 'failed'
+            task.rollup_built_at = None
+        failed.append(job.task_id)
+    db.session.commit()
+    return failed
+
+def dispatch_order():
+    """
+    Order in which claimable jobs are handed out: highest priority first; within
+    a priority the owner with the fewest running jobs, then the owner served
+    least recently, so a large batch from one owner cannot hold up the others;
+    finally the oldest job of that owner.
+    """
+    other = aliased(Job)
+    running = (db.session.query(func.count(other.id))
+               .filter(other.owner == Job.owner, other.status == 'running')
+               .scalar_subquery())
+    last_claimed = (db.session.query(func.max(other.claimed_at))
+                    .filter(other.owner == Job.owner)
+                    .scalar_subquery())
+    # SQLite sorts NULL first: owners that were never served go before the others
+    return Job.priority.desc(), running, last_claimed, Job.id
+
+def claim_job(owner):
+    """
+    Atomically claim the next claimable job (see dispatch_order). The claim is a
+    single UPDATE, so concurrent workers (threads or processes) can never claim
+    the same job. Returns (job, lease_token) or (None, None).
+    """
+    token = str(uuid.uuid4())
+    now = datetime.utcnow()
+    next_job = (db.session.query(Job.id)
+                .filter(claimable())
+                .order_by(*dispatch_order())
+                .limit(1)
+                .scalar_subquery())
+    
+    claimed = (Job.query
+               .filter(Job.id == next_job, claimable())
+               .update({
+                   Job.status: 'running',
+                   Job.lease_token: token,
+                   Job.lease_owner: owner,
+                   Job.lease_expires_at: now + timedelta(seconds=app.config['JOB_LEASE_SECONDS']),
+                   Job.heartbeat_at: now,
+                   Job.claimed_at: now,
+                   Job.attempts: Job.attempts + 1
+               }, synchronize_session=False))
+    db.session.commit()
+    
+    if not claimed:
+        return None, None
+    return Job.query.filter_by(lease_token=token).one(), token
+
+def heartbeat(job_id, token):
+    """Extend a lease; returns False if the lease was lost to another worker"""
+    now = datetime.utcnow()
+    extended = (Job.query
+                .filter_by(id=job_id, lease_token=token, status='running')
+                .update({
+                    Job.heartbeat_at: now,
+                    Job.lease_expires_at: now + timedelta(seconds=app.config['JOB_LEASE_SECONDS'])
+                }, synchronize_session=False))
+    db.session.commit()
+    return bool(extended)
+
+def complete_job(job_id, token):
+    """Mark a claimed job as done"""
+    (Job.query
+     .filter_by(id=job_id, lease_token=token)
+     .update({Job.status: 'done', Job.lease_token: None, Job.lease_expires_at: None},
+             synchronize_session=False))
+    db.session.commit()
+
+def fail_job(job_id, token, error):
+    """
+    Record a failed attempt. The job is retried with exponential backoff until
+    max_attempts is reached. Returns True if a retry was scheduled.
+    """
+    job = Job.query.filter_by(id=job_id, lease_token=token).first()
+    if job is None:
+        return False
+    
+    job.last_error = str(error)
+    job.lease_token = None
+    job.lease_expires_at = None
+    retry = job.attempts < job.max_attempts
+    if retry:
+        backoff = app.config['JOB_RETRY_BACKOFF'] * (2 ** (job.attempts - 1))
+        job.status = 'queued'
+        job.available_at = datetime.utcnow() + timedelta(seconds=backoff)
+    else:
+        job.status = 'failed'
+    db.session.commit()
+    return retry
+
+class LeaseLost(Exception):
+    """Raised in a worker whose job may have been taken over by another worker"""
+
+class LeaseKeeper:
+    """
+    Background thread that heartbeats a job's lease while it is being processed.
+    check() raises LeaseLost once the lease was taken over, or could not be
+    renewed before it expired; the task must then be abandoned without writing.
+    Writes that must not outlive the lease call confirm() in their transaction.
+    """
+    def __init__(self, job_id, token):
+        self.job_id = job_id
+        self.token = token
+        self.stopped = threading.Event()
+        self.lost = threading.Event()
+        self.expires_at = time.monotonic() + app.config['JOB_LEASE_SECONDS']
+        self.thread = threading.Thread(target=self.run, name=f"lease-{job_id}", daemon=True)
+        
+    def run(self):
+        interval = app.config['JOB_LEASE_SECONDS'] / 3
+        use_worker_engine()
+        with app.app_context():
+            while not self.stopped.wait(interval):
+                try:
+                    renewed_at = time.monotonic()
+                    if not heartbeat(self.job_id, self.token):
+                        print(f"Lost the lease on job {self.job_id}")
+                        self.lost.set()
+                        return
+                    self.expires_at = renewed_at + app.config['JOB_LEASE_SECONDS']
+                except Exception as e:
+                    print(f"Heartbeat failed for job {self.job_id}: {e}")
+                finally:
+                    db.session.remove()
+    
+    def check(self):
+        """Raise LeaseLost unless this worker still holds the lease"""
+        if self.lost.is_set() or time.monotonic() > self.expires_at:
+            raise LeaseLost(f"Lost the lease on job {self.job_id}")
+    
+    def confirm(self):
+        """
+        check(), then confirm the lease in the database inside the caller's
+        transaction. The UPDATE takes SQLite's write lock, which is held until
+        the caller commits, so no other worker can claim the job before the
+        caller's writes are committed.
+        """
+        self.check()
+        held = (Job.query
+                .filter_by(id=self.job_id, lease_token=self.token, status='running')
+                .update({Job.heartbeat_at: datetime.utcnow()}, synchronize_session=False))
+        if not held:
+            self.lost.set()
+            raise LeaseLost(f"Lost the lease on job {self.job_id}")
+    
+    def __enter__(self):
+        self.thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+def recover_jobs():
+    """
+    Re-enqueue tasks stranded by a restart: pending/in_progress tasks without an
+    open job get a new one. Every process runs this at startup, so the jobs are
+    added by one INSERT ... SELECT ... WHERE NOT EXISTS: processes starting at
+    the same time cannot queue two jobs for a task. Running jobs whose lease
+    expired are reclaimed by workers automatically. Returns the number of
+    recovered tasks.
+    """
+    def open_job(*statuses):
+        return (db.session.query(Job.id)
+                .filter(Job.task_id == Task.id, Job.status.in_(statuses))
+                .exists())
+    
+    stranded = (db.session.query(Task.id, literal(app.config['JOB_MAX_ATTEMPTS']),
+                                 func.coalesce(Task.priority, 0), Task.owner)
+                .filter(Task.status.in_(('pending', 'in_progress')), ~open_job(*OPEN_JOB_STATUSES)))
+    recovered = db.session.execute(
+        insert(Job.__table__).from_select(['task_id', 'max_attempts', 'priority', 'owner'], stranded)
+    ).rowcount
+    # A task left in progress waits for its new job; skip any a worker has claimed meanwhile
+    (Task.query
+     .filter(Task.status == 'in_progress', ~open_job('running'))
+     .update({Task.status: 'pending'}, synchronize_session=False))
+    db.session.commit()
+    return recovered
+
+def get_job_counts():
+    """Number of jobs per status"""
+    rows = db.session.query(Job.status, db.func.count(Job.id)).group_by(Job.status).all()
+    return dict(rows)
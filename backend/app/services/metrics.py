@@ -0,0 +1,133 @@
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds (seconds) of the duration histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+metrics_lock = threading.Lock()
+registry = []
+
+def format_labels(labels, extra=None):
+    """Render a Prometheus label set, e.g. {stage="fetch",le="0.5"}"""
+    pairs = list(labels) + list(extra or [])
+    if not pairs:
+        return ''
+    rendered = ','.join(f'{name}="{str(value)}"'.replace('\n', ' ') for name, value in pairs)
+    return '{' + rendered + '}'
+
+class Counter:
+    """Monotonic counter with optional labels"""
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.values = {}
+        registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with metrics_lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for key, value in sorted(self.values.items()):
+            lines.append(f'{self.name}{format_labels(key)} {value}')
+        return lines
+
+class Histogram:
+    """Cumulative-bucket histogram of durations with optional labels"""
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}  # labels -> [bucket counts..., sum, count]
+        registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with metrics_lock:
+            series = self.series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for key, series in sorted(self.series.items()):
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{format_labels(key, [("le", bound)])} {count}')
+            lines.append(f'{self.name}_bucket{format_labels(key, [("le", "+Inf")])} {series[-1]}')
+            lines.append(f'{self.name}_sum{format_labels(key)} {series[-2]}')
+            lines.append(f'{self.name}_count{format_labels(key)} {series[-1]}')
+        return lines
+
+# Task processing
+TASK_STAGE_SECONDS = Histogram('task_stage_duration_seconds', 'Time spent per task in each stage of process_task')
+TASK_ROWS = Counter('task_rows_total', 'Rows stored by process_task per source')
+TASKS_PROCESSED = Counter('tasks_processed_total', 'Tasks finished by process_task per final status')
+
+# HTTP
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'Time to produce a response per route')
+REQUESTS = Counter('http_requests_total', 'Responses per route, method and status code')
+ROWS_SERVED = Counter('http_rows_served_total', 'Records returned (or aggregated, for /aggregates) per route and format')
+
+class StageTimer:
+    """Accumulates per-stage durations for one task; export() feeds the stage histogram"""
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def export(self):
+        """Observe this task's total per stage (a stage may have run once per batch)"""
+        for name, seconds in self.timings.items():
+            TASK_STAGE_SECONDS.observe(seconds, stage=name)
+
+    def rounded(self):
+        """Timings in seconds, rounded for storage"""
+        return {name: round(seconds, 4) for name, seconds in self.timings.items()}
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format"""
+    with metrics_lock:
+        lines = []
+        for metric in registry:
+            lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Answers every GET with render_metrics()"""
+    def do_GET(self):
+        body = render_metrics().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+def serve_metrics(port, host='0.0.0.0'):
+    """
+    Serve this process's metrics over HTTP from a background thread. Worker
+    processes (worker.py) serve no API, so their stage timings and row counts
+    would otherwise never reach a scraper. Returns the server (port 0 picks a free one).
+    """
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name=f"metrics-{server.server_address[1]}", daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,97 @@
+import json
+from datetime import datetime
+from itertools import islice
+from app import db
+from app.models.data_record import DataRecord
+from app.models.dimension import DIMENSION_MODELS
+from app.services.dimensions import dimension_column, lookup_names
+
+# Fields returned by DataRecord.to_dict, in the same order
+RECORD_FIELDS = ['id', 'task_id', 'source', 'category', 'brand', 'price', 'purchase_date',
+                 'quantity', 'rating', 'platform', 'location', 'payment_method',
+                 'product_id', 'created_at']
+
+# Rows fetched from SQLite per round trip while streaming
+STREAM_BATCH_SIZE = 1000
+
+def parse_fields(fields_arg):
+    """Turn a comma-separated `fields` argument into a list of record fields"""
+    if not fields_arg:
+        return list(RECORD_FIELDS)
+    
+    fields = [field.strip() for field in fields_arg.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in RECORD_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def projected_query(fields):
+    """
+    Column-only query for the requested fields (no DataRecord objects are built).
+    Dimension fields select their lookup ids; fetch_rows and stream_ndjson
+    turn them into names (joining the lookup tables in SQL would make SQLite
+    join every row of the task before sorting by id).
+    """
+    columns = [
+        dimension_column(field).label(field) if field in DIMENSION_MODELS else getattr(DataRecord, field)
+        for field in fields
+    ]
+    return db.session.query(*columns)
+
+def decode_dimensions(rows, fields):
+    """Replace the lookup ids of dimension fields in projected rows by their names"""
+    positions = [(index, field) for index, field in enumerate(fields) if field in DIMENSION_MODELS]
+    if not positions:
+        return rows
+    names = {field: lookup_names(field, {row[index] for row in rows}) for index, field in positions}
+    decoded = []
+    for row in rows:
+        row = list(row)
+        for index, field in positions:
+            row[index] = names[field][row[index]]
+        decoded.append(tuple(row))
+    return decoded
+
+def query_fields(query):
+    return [column['name'] for column in query.column_descriptions]
+
+def serialize_row(row, fields):
+    """Convert a projected row into the same JSON shape as DataRecord.to_dict"""
+    return {
+        field: value.isoformat() if isinstance(value, datetime) else value
+        for field, value in zip(fields, row)
+    }
+
+def fetch_rows(query, after=None, limit=None):
+    """
+    Keyset pagination of a projected_query on DataRecord.id: returns
+    (rows, next_cursor), with dimension names in the rows.
+    next_cursor is None once the last page has been reached.
+    """
+    fields = query_fields(query)
+    if after is not None:
+        query = query.filter(DataRecord.id > after)
+    query = query.order_by(DataRecord.id)
+    
+    if limit is None:
+        return decode_dimensions(query.all(), fields), None
+    
+    # Always select the id so the cursor can be computed even if it was not projected
+    rows = query.add_columns(DataRecord.id).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = rows[-1][-1] if has_more and rows else None
+    return decode_dimensions([row[:-1] for row in rows], fields), next_cursor
+
+def stream_ndjson(query, fields, after=None):
+    """Yield one JSON document per record, reading rows in batches from the cursor"""
+    if after is not None:
+        query = query.filter(DataRecord.id > after)
+    
+    rows = iter(query.order_by(DataRecord.id).yield_per(STREAM_BATCH_SIZE))
+    while True:
+        batch = decode_dimensions(list(islice(rows, STREAM_BATCH_SIZE)), fields)
+        if not batch:
+            return
+        for row in batch:
+            yield json.dumps(serialize_row(row, fields)) + '\n'
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models.data_record import DataRecord
+from app.services.dimensions import dimension_column, lookup_ids
+
+# Request arguments that filter on a single DataRecord dimension (comma-separated values match any)
+COLUMN_FILTERS = {
+    name: dimension_column(name)
+    for name in ('category', 'brand', 'platform', 'source', 'location')
+}
+
+def parse_date(value, end_of_day=False):
+    """Parse a YYYY-MM-DD (or full ISO) date; with end_of_day the bound is exclusive of the next day"""
+    parsed = datetime.fromisoformat(value)
+    if end_of_day and len(value) <= 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+def purchase_date_range(args):
+    """Collect the (start, end) purchase_date bounds from the request arguments; end is exclusive"""
+    start = end = None
+    
+    if args.get('year'):
+        year = int(args['year'])
+        start, end = datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    if args.get('year_from'):
+        start = datetime(int(args['year_from']), 1, 1)
+    if args.get('year_to'):
+        end = datetime(int(args['year_to']) + 1, 1, 1)
+    if args.get('date_from'):
+        start = parse_date(args['date_from'])
+    if args.get('date_to'):
+        end = parse_date(args['date_to'], end_of_day=True)
+    
+    return start, end
+
+def apply_record_filters(query, args):
+    """
+    Narrow a DataRecord query with the server-side filters.
+    Raises ValueError for malformed years or dates.
+    """
+    for name, column in COLUMN_FILTERS.items():
+        value = args.get(name)
+        if not value:
+            continue
+        values = [item.strip() for item in value.split(',') if item.strip()]
+        # Names are resolved to lookup ids up front so the composite indexes still apply
+        ids = list(lookup_ids(name, values).values())
+        if len(ids) == 1:
+            query = query.filter(column == ids[0])
+        else:
+            query = query.filter(column.in_(ids))
+    
+    start, end = purchase_date_range(args)
+    if start:
+        query = query.filter(DataRecord.purchase_date >= start)
+    if end:
+        query = query.filter(DataRecord.purchase_date < end)
+    
+    return query
+
+def explain_query(query):
+    """Return the SQL and SQLite's EXPLAIN QUERY PLAN output for a query"""
+    compiled = query.statement.compile(dialect=db.engine.dialect)
+    params = compiled.construct_params()
+    # SQLite stores datetimes as text, so bind them the same way
+    values = tuple(
+        str(params[key]) if isinstance(params[key], datetime) else params[key]
+        for key in compiled.positiontup
+    )
+    
+    plan = db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", values)
+    return {
+        'query': str(compiled),
+        'plan': [row[-1] for row in plan]
+    }
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta
+from app import app, db
+from app.models.dataset_cache import DatasetCacheEntry
+from app.models.task import Task
+
+# filter_params keys that do not change the dataset
+NON_DATASET_KEYS = {'cache', 'virtual'}
+
+# Integer-valued parameters ("2022" and 2022 are the same request)
+INT_KEYS = {'year_from', 'year_to', 'num_records', 'seed'}
+
+# Sources used when a task does not list any
+DEFAULT_DATA_SOURCES = ['source_a', 'source_b']
+
+# Process-wide counters
+stats_lock = threading.Lock()
+cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+def canonical_params(filter_params):
+    """Normalize filter_params so equivalent requests serialize identically"""
+    params = {}
+    for key, value in filter_params.items():
+        if key in NON_DATASET_KEYS or value is None or value == '':
+            continue
+        if isinstance(value, list):
+            if not value and key != 'data_sources':
+                continue
+            value = sorted(set(str(item) for item in value))
+        elif key in INT_KEYS:
+            value = int(value)
+        params[key] = value
+    params.setdefault('data_sources', DEFAULT_DATA_SOURCES)
+    return json.dumps(params, sort_keys=True, separators=(',', ':'))
+
+def params_hash(filter_params):
+    """Content address of a dataset: SHA-256 of the canonical filter_params"""
+    return hashlib.sha256(canonical_params(filter_params).encode('utf-8')).hexdigest()
+
+def count(stat, amount=1):
+    with stats_lock:
+        cache_stats[stat] += amount
+
+def is_completed(task_id):
+    task = Task.query.get(task_id)
+    return task is not None and task.status == 'completed'
+
+def lookup_dataset(digest):
+    """
+    Return the id of the task holding a cached dataset for this hash, or None.
+    Entries older than DATASET_CACHE_TTL seconds, or whose task is gone or
+    not completed, are dropped on lookup.
+    """
+    entry = DatasetCacheEntry.query.get(digest)
+    if entry and (datetime.utcnow() - entry.created_at > timedelta(seconds=app.config['DATASET_CACHE_TTL'])
+                  or not is_completed(entry.task_id)):
+        db.session.delete(entry)
+        db.session.commit()
+        count('evictions')
+        entry = None
+    
+    if not entry:
+        count('misses')
+        return None
+    
+    entry.hits += 1
+    entry.last_used_at = datetime.utcnow()
+    db.session.commit()
+    count('hits')
+    return entry.task_id
+
+def store_dataset(digest, task_id):
+    """
+    Record that `task_id` holds the dataset for this hash, evicting least recently
+    used entries. The caller commits, together with the task's "completed" status,
+    so lookups never see an entry whose task is not completed yet.
+    """
+    entry = DatasetCacheEntry.query.get(digest)
+    if entry:
+        entry.task_id = task_id
+        entry.created_at = entry.last_used_at = datetime.utcnow()
+    else:
+        db.session.add(DatasetCacheEntry(digest, task_id))
+    db.session.flush()
+    
+    # Only the entries are evicted; tasks already pointing at a dataset keep their rows
+    overflow = DatasetCacheEntry.query.count() - app.config['DATASET_CACHE_MAX_ENTRIES']
+    if overflow > 0:
+        stale = DatasetCacheEntry.query.order_by(DatasetCacheEntry.last_used_at).limit(overflow).all()
+        for entry in stale:
+            db.session.delete(entry)
+        count('evictions', len(stale))
+
+def get_cache_stats():
+    """Hit/miss counters for this process plus the number of cached datasets"""
+    with stats_lock:
+        stats = dict(cache_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+    stats['entries'] = DatasetCacheEntry.query.count()
+    return stats
@@ -0,0 +1,105 @@
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import and_, exists, not_
+from sqlalchemy.orm import aliased
+from app import app, db
+from app.models.task import Task
+from app.models.data_record import DataRecord
+from app.models.task_rollup import TaskRollup
+from app.models.job import Job
+from app.models.dataset_cache import DatasetCacheEntry
+from app.services.record_export import RECORD_FIELDS, projected_query, stream_ndjson
+
+# Only finished tasks expire; queued and running ones are kept whatever their age
+EXPIRING_STATUSES = ('completed', 'failed')
+
+# Tasks removed per transaction, so the write lock is released between batches
+DELETE_BATCH_SIZE = 100
+
+def is_expired(task, cutoff):
+    return and_(task.created_at < cutoff, task.status.in_(EXPIRING_STATUSES))
+
+def expired_tasks(days):
+    """
+    Finished tasks created more than `days` days ago. A task whose records
+    are reused by a task that is kept (dataset_task_id) is kept with it.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    reader = aliased(Task)
+    kept_reader = exists().where(and_(reader.dataset_task_id == Task.id, not_(is_expired(reader, cutoff))))
+    return (Task.query
+            .filter(is_expired(Task, cutoff), ~kept_reader)
+            .order_by(Task.id))
+
+def archive_task(task, archive_dir):
+    """
+    Write a task to <archive_dir>/task_<id>.jsonl.gz: the task (as returned by
+    the API) on the first line, then one line per record it owns
+    """
+    path = os.path.join(archive_dir, f'task_{task.id}.jsonl.gz')
+    with gzip.open(path, 'wt', encoding='utf-8') as archive:
+        archive.write(json.dumps(task.to_dict()) + '\n')
+        if task.dataset_task_id is None:
+            query = projected_query(RECORD_FIELDS).filter(DataRecord.task_id == task.id)
+            archive.writelines(stream_ndjson(query, RECORD_FIELDS))
+    return path
+
+def delete_tasks(task_ids):
+    """Delete tasks with their records, rollup cubes, jobs and dataset cache entries. The caller commits."""
+    records = DataRecord.query.filter(DataRecord.task_id.in_(task_ids)).delete(synchronize_session=False)
+    TaskRollup.query.filter(TaskRollup.task_id.in_(task_ids)).delete(synchronize_session=False)
+    Job.query.filter(Job.task_id.in_(task_ids)).delete(synchronize_session=False)
+    DatasetCacheEntry.query.filter(DatasetCacheEntry.task_id.in_(task_ids)).delete(synchronize_session=False)
+    Task.query.filter(Task.id.in_(task_ids)).delete(synchronize_session=False)
+    return records
+
+def vacuum():
+    """
+    Return free pages to the file system. Databases created with
+    auto_vacuum=INCREMENTAL (see app/storage.py) release them incrementally;
+    older ones get a full VACUUM once, which also switches them to incremental.
+    Returns the number of pages freed.
+    """
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        page_count = cursor.execute('PRAGMA page_count').fetchone()[0]
+        if cursor.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+            # incremental_vacuum frees one page per step; executescript runs it to the end
+            cursor.executescript('PRAGMA incremental_vacuum;')
+        else:
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            cursor.execute('VACUUM')
+        freed = page_count - cursor.execute('PRAGMA page_count').fetchone()[0]
+        cursor.close()
+    finally:
+        connection.close()
+    return freed
+
+def apply_retention(days=None, archive_dir=None, dry_run=False):
+    """
+    Remove tasks older than `days` (default RETENTION_DAYS), archiving each
+    one to `archive_dir` first when given, then vacuum the database.
+    Returns a summary of what was (or, with dry_run, would be) removed.
+    """
+    days = app.config['RETENTION_DAYS'] if days is None else days
+    task_ids = [task_id for (task_id,) in expired_tasks(days).with_entities(Task.id)]
+    summary = {'days': days, 'tasks': len(task_ids), 'records': 0, 'archived': 0, 'pages_freed': 0}
+    if dry_run or not task_ids:
+        return summary
+
+    if archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
+    for start in range(0, len(task_ids), DELETE_BATCH_SIZE):
+        batch = task_ids[start:start + DELETE_BATCH_SIZE]
+        if archive_dir:
+            for task in Task.query.filter(Task.id.in_(batch)):
+                archive_task(task, archive_dir)
+                summary['archived'] += 1
+        summary['records'] += delete_tasks(batch)
+        db.session.commit()
+
+    summary['pages_freed'] = vacuum()
+    return summary
@@ -0,0 +1,164 @@
+import re
+from datetime import datetime
+from sqlalchemy import func, literal, select
+from app import db
+from app.models.task import Task
+from app.models.data_record import DataRecord
+from app.models.task_rollup import TaskRollup
+from app.models.dimension import DIMENSION_MODELS
+from app.services.aggregates import ORDER_VALUE
+from app.services.dimensions import dimension_column
+from app.services.virtual_tasks import build_virtual_rollup
+
+# Dimensions of the rollup cube that analytics queries can filter and group by
+DIMENSIONS = {
+    'category': TaskRollup.category,
+    'brand': TaskRollup.brand,
+    'month': TaskRollup.month,
+    'platform': TaskRollup.platform,
+    'source': TaskRollup.source
+}
+
+# Grouping by "task" keeps each requested task's figures separate
+GROUP_BY_CHOICES = ['task'] + list(DIMENSIONS)
+
+MONTH_PATTERN = re.compile(r'^\d{4}-(0[1-9]|1[0-2])$')
+
+def build_rollup(task):
+    """
+    Rebuild the rollup cube of the records stored under `task` with a single
+    INSERT ... SELECT ... GROUP BY (the cube keeps dimension names, not lookup
+    ids). The caller commits.
+    """
+    if task.virtual:
+        build_virtual_rollup(task)
+        return
+    TaskRollup.query.filter_by(task_id=task.id).delete()
+
+    month = func.strftime('%Y-%m', DataRecord.purchase_date)
+    names = ['category', 'brand', 'platform', 'source']
+    category_id, brand_id, platform_id, source_id = (dimension_column(name) for name in names)
+    dimensions = [category_id, brand_id, month.label('month'), platform_id, source_id]
+    cells = (select(*dimensions,
+                    func.sum(ORDER_VALUE).label('total_sales'),
+                    func.sum(DataRecord.quantity).label('total_quantity'),
+                    func.count(DataRecord.id).label('order_count'))
+             .where(DataRecord.task_id == task.id)
+             .group_by(*dimensions)
+             .subquery())
+
+    # Grouping by lookup id is the same as grouping by name; names are joined per cell
+    category, brand, platform, source = (DIMENSION_MODELS[name] for name in names)
+    named = (select(literal(task.id), category.name, brand.name, cells.c.month, platform.name, source.name,
+                    cells.c.total_sales, cells.c.total_quantity, cells.c.order_count)
+             .select_from(cells))
+    for name in names:
+        model = DIMENSION_MODELS[name]
+        named = named.outerjoin(model, model.id == cells.c[f'{name}_id'])
+
+    columns = ['task_id', 'category', 'brand', 'month', 'platform', 'source',
+               'total_sales', 'total_quantity', 'order_count']
+    db.session.execute(TaskRollup.__table__.insert().from_select(columns, named))
+    task.rollup_built_at = datetime.utcnow()
+
+def ensure_rollups(tasks):
+    """Build the cubes that are missing, e.g. for tasks completed before rollups existed"""
+    for data_task_id in {task.data_task_id for task in tasks}:
+        data_task = Task.query.get(data_task_id)
+        if data_task is not None and data_task.rollup_built_at is None:
+            build_rollup(data_task)
+    db.session.commit()
+
+def parse_group_by(value):
+    """Split the group_by argument; raises ValueError on an unknown dimension"""
+    if not value:
+        return ['task']
+    group_by = list(dict.fromkeys(item.strip() for item in value.split(',') if item.strip()))
+    unknown = [item for item in group_by if item not in GROUP_BY_CHOICES]
+    if unknown:
+        raise ValueError(f"Unknown group_by dimension: {', '.join(unknown)} "
+                         f"(choose from {', '.join(GROUP_BY_CHOICES)})")
+    return group_by
+
+def parse_month(value):
+    if not MONTH_PATTERN.match(value):
+        raise ValueError(f"Invalid month {value!r}, expected YYYY-MM")
+    return value
+
+def apply_rollup_filters(query, args):
+    """
+    Narrow a TaskRollup query with the same column filters as /data, plus a
+    month range (year, year_from/year_to or month_from/month_to as YYYY-MM).
+    Raises ValueError for malformed years or months.
+    """
+    for name in ('category', 'brand', 'platform', 'source'):
+        value = args.get(name)
+        if not value:
+            continue
+        values = [item.strip() for item in value.split(',') if item.strip()]
+        query = query.filter(DIMENSIONS[name].in_(values))
+
+    month_from = month_to = None
+    if args.get('year'):
+        year = int(args['year'])
+        month_from, month_to = f'{year:04d}-01', f'{year:04d}-12'
+    if args.get('year_from'):
+        month_from = f"{int(args['year_from']):04d}-01"
+    if args.get('year_to'):
+        month_to = f"{int(args['year_to']):04d}-12"
+    if args.get('month_from'):
+        month_from = parse_month(args['month_from'])
+    if args.get('month_to'):
+        month_to = parse_month(args['month_to'])
+
+    if month_from:
+        query = query.filter(TaskRollup.month >= month_from)
+    if month_to:
+        query = query.filter(TaskRollup.month <= month_to)
+    return query
+
+def query_rollups(tasks, args):
+    """
+    Slice and merge the rollup cubes of `tasks` (completed Task objects).
+    Tasks that reuse another task's dataset read that task's cube; when the
+    results are not grouped by task, a dataset shared by several of the
+    requested tasks is counted once.
+    Raises ValueError on bad arguments.
+    """
+    group_by = parse_group_by(args.get('group_by'))
+    dimensions = [name for name in group_by if name != 'task']
+    by_task = 'task' in group_by
+
+    keys = ([TaskRollup.task_id] if by_task else []) + [DIMENSIONS[name] for name in dimensions]
+    query = db.session.query(*keys,
+                             func.sum(TaskRollup.total_sales),
+                             func.sum(TaskRollup.total_quantity),
+                             func.sum(TaskRollup.order_count))
+    query = query.filter(TaskRollup.task_id.in_({task.data_task_id for task in tasks}))
+    query = apply_rollup_filters(query, args)
+    if keys:
+        query = query.group_by(*keys).order_by(*keys)
+
+    def cell(values, sales, quantity, orders):
+        row = dict(zip(dimensions, values))
+        row.update({
+            'total_sales': round(sales or 0, 2),
+            'total_quantity': quantity or 0,
+            'order_count': orders or 0,
+            'avg_order_value': round(sales / orders, 2) if orders else 0
+        })
+        return row
+
+    rows = query.all()
+    if not by_task:
+        return [cell(row[:-3], *row[-3:]) for row in rows]
+
+    # Fan each dataset's cells out to every requested task that reads it
+    cells_by_data_task = {}
+    for row in rows:
+        cells_by_data_task.setdefault(row[0], []).append(row)
+    return [
+        {'task_id': task.id, **cell(row[1:-3], *row[-3:])}
+        for task in tasks
+        for row in cells_by_data_task.get(task.data_task_id, [])
+    ]
@@ -0,0 +1,76 @@
+from sqlalchemy import inspect
+from app import db
+from app.models.data_record import DataRecord
+from app.models.dimension import DIMENSION_MODELS
+
+def upgrade_schema():
+    """
+    Bring an existing SQLite database up to date with the models.
+    db.create_all only creates missing tables, so this also adds columns and
+    indexes that were introduced after a table was first created.
+    """
+    db.create_all()
+    migrate_text_dimensions()
+    
+    inspector = inspect(db.engine)
+    for table in db.Model.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            db.session.execute(db.text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+        db.session.commit()
+        
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+def migrate_text_dimensions():
+    """
+    Move a data_record table from before the lookup tables (category, brand, ...
+    stored as text on every row) to the normalized layout: add the distinct
+    values to the lookup tables, then copy the rows into a new data_record
+    that stores their ids. SQLite cannot drop indexed columns in place.
+    Everything runs in one transaction on one connection (SQLite's DDL is
+    transactional), so an interrupted migration leaves the old table as it was.
+    Returns True if the table was migrated.
+    """
+    table = DataRecord.__tablename__
+    legacy = f'{table}_legacy'
+    with db.engine.begin() as connection:
+        inspector = inspect(connection)
+        existing = {column['name'] for column in inspector.get_columns(table)}
+        if 'source' not in existing or 'source_id' in existing:
+            return False
+        indexes = inspector.get_indexes(table)
+        
+        # The first statement is an INSERT, so the sqlite3 driver has opened the
+        # transaction before any of the DDL below runs
+        for field, model in DIMENSION_MODELS.items():
+            if field in existing:
+                connection.execute(db.text(f'INSERT OR IGNORE INTO {model.__tablename__} (name) '
+                                           f'SELECT DISTINCT {field} FROM {table} WHERE {field} IS NOT NULL'))
+        
+        # Index names stay with a renamed table, so drop them before the new table reuses them
+        for index in indexes:
+            connection.execute(db.text(f'DROP INDEX {index["name"]}'))
+        connection.execute(db.text(f'ALTER TABLE {table} RENAME TO {legacy}'))
+        DataRecord.__table__.create(bind=connection)
+        
+        columns, values, joins = [], [], []
+        for column in DataRecord.__table__.columns:
+            field = column.name[:-len('_id')]
+            columns.append(column.name)
+            if field in DIMENSION_MODELS and field in existing:
+                lookup = DIMENSION_MODELS[field].__tablename__
+                values.append(f'{lookup}.id')
+                joins.append(f'LEFT JOIN {lookup} ON {lookup}.name = {legacy}.{field}')
+            elif column.name in existing:
+                values.append(f'{legacy}.{column.name}')
+            else:
+                values.append('NULL')
+        connection.execute(db.text(f"INSERT INTO {table} ({', '.join(columns)}) "
+                                   f"SELECT {', '.join(values)} FROM {legacy} {' '.join(joins)}"))
+        connection.execute(db.text(f'DROP TABLE {legacy}'))
+    print(f"Migrated {table} to lookup tables for {', '.join(DIMENSION_MODELS)}")
+    return True
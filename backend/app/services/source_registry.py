@@ -0,0 +1,55 @@
+import os
+from app import app
+from app.services.data_source import fetch_data_from_source_a, fetch_data_from_source_b
+from app.services.file_sources import file_reader_for
+from app.services.synthetic_data import generate_chunks, iter_records
+
+# Registered data sources: name -> fetcher(filter_params) returning an iterable of records
+SOURCES = {}
+
+def register_source(name, fetcher):
+    """Register (or replace) the fetcher used for a data source name"""
+    SOURCES[name] = fetcher
+
+def resolve_source(name):
+    """Look up the fetcher for a data source name"""
+    if name not in SOURCES:
+        raise ValueError(f"Unknown data source: {name}")
+    return SOURCES[name]
+
+def is_synthetic_source(name):
+    """True if a source name is served by the vectorized generator (not a data file)"""
+    return getattr(SOURCES.get(name), 'synthetic', False)
+
+def synthetic_source(name, fetcher):
+    """
+    Wrap a simulated source: tasks that set `num_records` get rows from the
+    vectorized NumPy generator (reproducible with `seed`) instead of `fetcher`.
+    """
+    def fetch(filter_params):
+        if filter_params.get('num_records'):
+            chunks = generate_chunks(name, filter_params, int(filter_params['num_records']),
+                                     seed=filter_params.get('seed'))
+            return iter_records(chunks)
+        return fetcher(filter_params)
+    fetch.synthetic = True
+    return fetch
+
+def file_source(path):
+    """A source that streams records from a JSON-lines, JSON or CSV file"""
+    reader = file_reader_for(path)
+    
+    def fetch(filter_params):
+        return reader(path, filter_params)
+    return fetch
+
+def register_default_sources():
+    """Register the simulated sources, replacing them with data files where configured"""
+    register_source('source_a', synthetic_source('source_a', fetch_data_from_source_a))
+    register_source('source_b', synthetic_source('source_b', fetch_data_from_source_b))
+    
+    for name, path in app.config['SOURCE_FILES'].items():
+        if os.path.exists(path):
+            register_source(name, file_source(path))
+
+register_default_sources()
@@ -0,0 +1,112 @@
+import numpy as np
+from app.services.data_source import PRODUCT_CATEGORIES, BRANDS, LOCATIONS
+
+# Default number of rows generated per chunk
+DEFAULT_CHUNK_SIZE = 100000
+
+# Per-source generation settings, mirroring fetch_data_from_source_a / fetch_data_from_source_b
+SOURCE_PROFILES = {
+    'source_a': {
+        'platform': 'Online',
+        'price_range': (10, 1000),
+        'quantity_range': (1, 5),
+        'payment_methods': ['Credit Card', 'PayPal', 'Apple Pay', 'Google Pay'],
+        'product_prefix': 'P',
+        'has_rating': True,
+        'has_location': False
+    },
+    'source_b': {
+        'platform': 'Store',
+        'price_range': (15, 1200),
+        'quantity_range': (1, 3),
+        'payment_methods': ['Cash', 'Credit Card', 'Debit Card', 'Gift Card'],
+        'product_prefix': 'S',
+        'has_rating': False,
+        'has_location': True
+    }
+}
+
+def source_rng(source, seed=None):
+    """Random generator for a source; the same seed always yields the same rows per source"""
+    if seed is None:
+        return np.random.default_rng()
+    return np.random.default_rng([int(seed), list(SOURCE_PROFILES).index(source)])
+
+def allowed_pairs(source, filter_params):
+    """
+    (category, brand) pairs a source can produce once the brand and category
+    predicates are applied, so filtered-out rows are never generated.
+    """
+    companies = filter_params.get('companies') or []
+    categories = filter_params.get('categories') or []
+    selected_categories = [c for c in PRODUCT_CATEGORIES if not categories or c in categories]
+    
+    if source == 'source_b' and companies:
+        # Physical stores draw brands from every category that stocks a selected company
+        filtered_brands = [b for c in PRODUCT_CATEGORIES for b in BRANDS[c] if b in companies]
+        return [(c, b) for c in selected_categories for b in filtered_brands]
+    
+    return [(c, b) for c in selected_categories for b in BRANDS[c]
+            if not companies or b in companies]
+
+def generate_chunks(source, filter_params, num_records, seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Generate `num_records` synthetic rows for a source as columnar chunks:
+    each chunk is a dict of column name -> NumPy array of at most `chunk_size` rows.
+    The year, brand and category filters are applied while generating.
+    """
+    profile = SOURCE_PROFILES[source]
+    rng = source_rng(source, seed)
+    
+    pairs = allowed_pairs(source, filter_params)
+    if not pairs:
+        return
+    pair_categories = np.array([c for c, _ in pairs], dtype=object)
+    pair_brands = np.array([b for _, b in pairs], dtype=object)
+    
+    year_from = int(filter_params.get('year_from', 2020))
+    year_to = int(filter_params.get('year_to', 2025))
+    start_date = np.datetime64(f"{year_from}-01-01", 's')
+    days_between = int((np.datetime64(f"{year_to}-12-31") - np.datetime64(f"{year_from}-01-01")).astype(int))
+    
+    payment_methods = np.array(profile['payment_methods'], dtype=object)
+    locations = np.array(LOCATIONS, dtype=object)
+    low_price, high_price = profile['price_range']
+    low_quantity, high_quantity = profile['quantity_range']
+    
+    remaining = int(num_records)
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        remaining -= size
+        
+        pair_index = rng.integers(0, len(pairs), size)
+        days = rng.integers(0, max(days_between, 1), size)
+        product_numbers = rng.integers(1000, 10000, size)
+        
+        chunk = {
+            'category': pair_categories[pair_index],
+            'brand': pair_brands[pair_index],
+            'price': np.round(rng.uniform(low_price, high_price, size), 2),
+            'purchase_date': start_date + days.astype('timedelta64[D]'),
+            'quantity': rng.integers(low_quantity, high_quantity + 1, size),
+            'rating': np.round(rng.uniform(1, 5, size), 1) if profile['has_rating'] else None,
+            'platform': np.full(size, profile['platform'], dtype=object),
+            'location': locations[rng.integers(0, len(locations), size)] if profile['has_location'] else None,
+            'payment_method': payment_methods[rng.integers(0, len(payment_methods), size)],
+            'product_id': np.char.add(profile['product_prefix'], product_numbers.astype(str)).astype(object)
+        }
+        yield chunk
+
+def iter_records(chunks):
+    """Flatten columnar chunks into record dicts (purchase_date as datetime) for ingest"""
+    for chunk in chunks:
+        size = len(chunk['category'])
+        columns = {
+            name: values.tolist() if values is not None else [None] * size
+            for name, values in chunk.items()
+        }
+        # datetime64[s] converts to datetime.datetime rather than date
+        columns['purchase_date'] = chunk['purchase_date'].astype('datetime64[s]').tolist()
+        names = list(columns)
+        for values in zip(*columns.values()):
+            yield dict(zip(names, values))
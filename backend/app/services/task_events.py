@@ -0,0 +1,129 @@
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from app import app, db
+from app.models.task import Task
+
+# Seconds between keep-alive comments on an idle stream (also how disconnects are noticed)
+KEEPALIVE_INTERVAL = 15
+
+# Statuses after which a task never changes again
+TERMINAL_STATUSES = ('completed', 'failed')
+
+# Open event streams: each subscriber is (queue, task_id or None for all tasks)
+subscribers = set()
+subscribers_lock = threading.Lock()
+
+# Last status and progress pushed per task, so the same update is never pushed twice
+# (it may be seen both locally and by the relay). Bounded to the most recent tasks.
+last_published = OrderedDict()
+MAX_TRACKED_TASKS = 10000
+
+# Relay thread picking up status changes made by worker processes
+relay_thread = None
+
+class Subscription:
+    """Queue of task events for one open stream"""
+    def __init__(self, task_id=None):
+        self.task_id = task_id
+        self.events = queue.Queue()
+
+def subscribe(task_id=None):
+    """
+    Start collecting events (for one task, or all tasks when task_id is None).
+    Subscribe before reading the task's current state so no transition is missed.
+    """
+    subscription = Subscription(task_id)
+    with subscribers_lock:
+        subscribers.add(subscription)
+    start_relay()
+    return subscription
+
+def unsubscribe(subscription):
+    with subscribers_lock:
+        subscribers.discard(subscription)
+
+def publish_task_event(task):
+    """
+    Push a task's current state to every stream watching it. Progress-only
+    updates (one per ingested batch) go to the streams of that task alone;
+    the all-tasks stream gets creations and status changes.
+    """
+    event = task.to_dict()
+    version = (event['status'], task.progress)
+    with subscribers_lock:
+        previous = last_published.get(event['id'])
+        if previous == version:
+            return
+        status_changed = previous is None or previous[0] != event['status']
+        last_published[event['id']] = version
+        last_published.move_to_end(event['id'])
+        while len(last_published) > MAX_TRACKED_TASKS:
+            last_published.popitem(last=False)
+        targets = [s for s in subscribers
+                   if s.task_id == event['id'] or (s.task_id is None and status_changed)]
+    for subscription in targets:
+        subscription.events.put(event)
+
+def start_relay():
+    """Start the relay thread once, the first time someone subscribes"""
+    global relay_thread
+    with subscribers_lock:
+        if relay_thread is None or not relay_thread.is_alive():
+            relay_thread = threading.Thread(target=relay_task_changes, name="task-event-relay")
+            relay_thread.daemon = True
+            relay_thread.start()
+
+def relay_task_changes():
+    """
+    Tasks may be processed by standalone worker processes whose events never reach
+    this process, so poll for recently updated tasks (one query per interval for
+    all open streams) while anyone is subscribed.
+    """
+    since = datetime.utcnow()
+    with app.app_context():
+        while True:
+            time.sleep(app.config['EVENT_RELAY_INTERVAL'])
+            with subscribers_lock:
+                if not subscribers:
+                    continue
+            try:
+                changed = Task.query.filter(Task.updated_at > since).order_by(Task.updated_at).all()
+                for task in changed:
+                    publish_task_event(task)
+                    since = max(since, task.updated_at)
+            except Exception as e:
+                print(f"Task event relay error: {e}")
+            finally:
+                db.session.remove()
+
+def format_event(data):
+    """Encode one Server-Sent Event"""
+    return f"data: {json.dumps(data)}\n\n"
+
+def event_stream(subscription, initial=None):
+    """
+    Generate the SSE stream for a subscription. A per-task stream starts with the
+    task's current state and ends once the task reaches a terminal status.
+    """
+    # Send something right away so the response headers are flushed to the client
+    yield ": connected\n\n"
+    
+    if initial is not None:
+        yield format_event(initial)
+        if subscription.task_id is not None and initial['status'] in TERMINAL_STATUSES:
+            return
+    
+    while True:
+        try:
+            event = subscription.events.get(timeout=KEEPALIVE_INTERVAL)
+        except queue.Empty:
+            yield ": keep-alive\n\n"
+            continue
+        
+        yield format_event(event)
+        if subscription.task_id is not None and event['status'] in TERMINAL_STATUSES:
+            return
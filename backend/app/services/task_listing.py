@@ -0,0 +1,71 @@
+from datetime import datetime
+from sqlalchemy import func, or_, and_
+from sqlalchemy.orm import load_only
+from app import db
+from app.models.task import Task
+
+TASK_STATUSES = ('pending', 'in_progress', 'completed', 'failed')
+
+# Default and largest page of the task listing
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Columns needed by Task.to_summary_dict (the JSON columns are never loaded)
+SUMMARY_COLUMNS = ('id', 'name', 'status', 'created_at', 'updated_at', 'dataset_task_id', 'virtual',
+                  'priority', 'owner')
+
+def encode_cursor(task):
+    return f"{task.created_at.isoformat()}_{task.id}"
+
+def decode_cursor(cursor):
+    """Split an `after` cursor into (created_at, id); raises ValueError if malformed"""
+    try:
+        created_at, task_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(created_at), int(task_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+def filter_tasks(query, args):
+    """
+    Apply the listing filters: `status` (comma-separated) and `name`
+    (case-insensitive substring). Raises ValueError on an unknown status.
+    """
+    status = args.get('status')
+    if status:
+        statuses = [value.strip() for value in status.split(',') if value.strip()]
+        unknown = [value for value in statuses if value not in TASK_STATUSES]
+        if unknown:
+            raise ValueError(f"Unknown status: {', '.join(unknown)}")
+        query = query.filter(Task.status.in_(statuses))
+    
+    name = args.get('name')
+    if name:
+        escaped = name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        query = query.filter(Task.name.ilike(f'%{escaped}%', escape='\\'))
+    return query
+
+def list_tasks(args, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of tasks, newest first, keyset-paginated on (created_at, id).
+    Returns (tasks, next_cursor); next_cursor is None on the last page.
+    """
+    query = filter_tasks(Task.query.options(load_only(*SUMMARY_COLUMNS)), args)
+    
+    after = args.get('after')
+    if after:
+        created_at, task_id = decode_cursor(after)
+        query = query.filter(or_(
+            Task.created_at < created_at,
+            and_(Task.created_at == created_at, Task.id < task_id)
+        ))
+    
+    tasks = query.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(tasks[limit - 1]) if len(tasks) > limit else None
+    return tasks[:limit], next_cursor
+
+def count_tasks_by_status(args):
+    """Number of tasks per status (answered from the status index, no rows are loaded)"""
+    query = filter_tasks(db.session.query(Task.status, func.count(Task.id)), args)
+    counts = dict.fromkeys(TASK_STATUSES, 0)
+    counts.update(query.group_by(Task.status).all())
+    return {'counts': counts, 'total': sum(counts.values())}
@@ -1,59 +1,238 @@
-import queue
 import threading
 import time
 import json
-from datetime import datetime
 import random
-from app import db
+from concurrent.futures import ThreadPoolExecutor
+from app import app, db
+from app.storage import use_worker_engine
 from app.models.task import Task
 from app.models.data_record import DataRecord
-from app.services.data_source import fetch_data_from_source_a, fetch_data_from_source_b
+from app.models.task_rollup import TaskRollup
+from app.services.ingest import ingest_records, PrefetchedSource
+from app.services.rollups import build_rollup
+from app.services.virtual_tasks import build_virtual_rollup
+from app.services.hot_cache import get_task_columns
+from app.services.metrics import StageTimer, TASKS_PROCESSED
+from app.services.job_queue import (new_job, enqueue_job, claim_job, complete_job, fail_job,
+                                    fail_abandoned_jobs, LeaseKeeper, LeaseLost, worker_identity, get_job_counts)
+from app.services.result_cache import params_hash, lookup_dataset, store_dataset
+from app.services.task_events import publish_task_event
+from app.services.source_registry import resolve_source
 
-# In-memory queue for tasks
-task_queue = queue.Queue()
-is_worker_running = False
+# Worker threads in this process; jobs themselves live in the durable job table
+workers = []
+workers_lock = threading.Lock()
+busy_workers = 0
 
-def queue_task(task_id):
-    """Add a task to the queue for processing"""
-    task_queue.put(task_id)
-    
-    # Start the worker if it's not already running
-    global is_worker_running
-    if not is_worker_running:
-        is_worker_running = True
-        thread = threading.Thread(target=process_tasks)
-        thread.daemon = True
-        thread.start()
+# Wakes idle local workers as soon as a job is enqueued by this process
+work_available = threading.Event()
+
+def queue_task(task):
+    """Persist a job for the task and wake the local workers"""
+    enqueue_job(task)
+    work_available.set()
+    start_workers()
+
+def queue_tasks(tasks):
+    """Insert new tasks together with their jobs in a single transaction and wake the local workers"""
+    db.session.add_all(tasks)
+    db.session.flush()  # assigns the task ids the jobs refer to
+    task_ids = [task.id for task in tasks]
+    db.session.add_all([new_job(task) for task in tasks])
+    db.session.commit()
+    # The commit expired the tasks; reload them with one query rather than one per task
+    Task.query.filter(Task.id.in_(task_ids)).all()
+    work_available.set()
+    start_workers()
+
+def start_workers():
+    """Make sure the configured number of worker threads are running"""
+    with workers_lock:
+        # Replace any worker that died unexpectedly
+        workers[:] = [worker for worker in workers if worker.is_alive()]
+        while len(workers) < app.config['WORKER_COUNT']:
+            worker = threading.Thread(target=process_tasks, name=f"task-worker-{len(workers) + 1}")
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+
+def get_queue_stats():
+    """Snapshot of the job queue (all processes) and this process's worker pool"""
+    with workers_lock:
+        alive = sum(1 for worker in workers if worker.is_alive())
+        busy = busy_workers
+    job_counts = get_job_counts()
+    return {
+        'queue_depth': job_counts.get('queued', 0),
+        'running_jobs': job_counts.get('running', 0),
+        'failed_jobs': job_counts.get('failed', 0),
+        'worker_count': app.config['WORKER_COUNT'],
+        'running_workers': alive,
+        'active_workers': busy
+    }
 
 def process_tasks():
-    """Process tasks from the queue"""
-    global is_worker_running
-    
-    while True:
-        try:
-            # Get the next task from the queue (with timeout to check if we should stop)
+    """Worker loop: claim jobs from the job table inside this thread's own app context"""
+    # Each worker has its own app context and therefore its own scoped session,
+    # bound to the worker engine so ingest never holds the connections API requests use
+    use_worker_engine()
+    with app.app_context():
+        owner = worker_identity()
+        while True:
             try:
-                task_id = task_queue.get(timeout=1)
-            except queue.Empty:
-                # If the queue is empty for more than 1 second, break the loop
-                if task_queue.empty():
-                    is_worker_running = False
-                    break
-                continue
-                
-            # Process the task
-            process_task(task_id)
+                for task_id in fail_abandoned_jobs():
+                    print(f"Task {task_id} failed: its worker stopped during the last attempt")
+                job, token = claim_job(owner)
+            except Exception as e:
+                # e.g. the database is locked by another writer; try again after the poll interval
+                print(f"Error claiming a job: {e}")
+                db.session.rollback()
+                job = None
             
-            # Mark the task as done
-            task_queue.task_done()
+            if job is None:
+                db.session.remove()
+                work_available.wait(app.config['JOB_POLL_INTERVAL'])
+                work_available.clear()
+                continue
             
-        except Exception as e:
-            print(f"Error processing task: {e}")
-            # Sleep a bit to avoid high CPU usage in case of repeated errors
-            time.sleep(1)
+            run_job(job.id, job.task_id, token, final_attempt=job.attempts >= job.max_attempts)
 
-def process_task(task_id):
-    """Process a single task"""
+def run_job(job_id, task_id, token, final_attempt=True):
+    """Process a claimed job's task while keeping its lease alive, then settle the job"""
+    global busy_workers
+    with workers_lock:
+        busy_workers += 1
+    try:
+        with LeaseKeeper(job_id, token) as lease:
+            process_task(task_id, final_attempt=final_attempt, lease=lease)
+        complete_job(job_id, token)
+    except LeaseLost as e:
+        # Another worker may be processing the task now; leave the job and task to it
+        print(f"Abandoned task {task_id}: {e}")
+        db.session.rollback()
+    except Exception as e:
+        print(f"Error processing task: {e}")
+        db.session.rollback()
+        if fail_job(job_id, token, e):
+            print(f"Task {task_id} will be retried")
+    finally:
+        # Discard the session so the next job starts from a clean state
+        db.session.remove()
+        with workers_lock:
+            busy_workers -= 1
+
+def fetch_sources(filter_params, data_sources):
+    """
+    Fetch the selected data sources concurrently, returning {source: records}.
+    File-backed and generated sources are lazy: each is read ahead on its own
+    thread (PrefetchedSource) while the sources before it are being ingested.
+    """
+    # Resolve every source first so an unknown name fails the task before any work is done
+    selected = {source: resolve_source(source) for source in dict.fromkeys(data_sources)}
+    if not selected:
+        return {}
+    
+    with ThreadPoolExecutor(max_workers=len(selected)) as executor:
+        futures = {
+            source: executor.submit(fetcher, filter_params)
+            for source, fetcher in selected.items()
+        }
+        source_data = {source: future.result() for source, future in futures.items()}
+    
+    batch_size = app.config['INGEST_BATCH_SIZE']
+    return {
+        source: records if isinstance(records, list) else PrefetchedSource(source, records, batch_size)
+        for source, records in source_data.items()
+    }
+
+def set_status(task, status, lease=None):
+    """
+    Commit a task status change (with any other pending changes) and push it to
+    any open event streams. With a lease, the commit is made while the job is
+    confirmed to be held by this worker; otherwise LeaseLost is raised.
+    """
+    if lease:
+        lease.confirm()
+    task.status = status
+    db.session.commit()
+    publish_task_event(task)
+
+def set_progress(task, progress, lease=None):
+    """Commit the per-source ingest progress and push it to any open event streams"""
+    if lease:
+        lease.confirm()
+    task.progress = json.dumps(progress)
+    db.session.commit()
+    publish_task_event(task)
+
+def progress_updater(task, progress, source, lease=None):
+    """on_batch callback for ingest_records that records a source's stored rows"""
+    def update(rows_stored):
+        entry = progress[source]
+        entry['rows_stored'] = rows_stored
+        entry['rows_fetched'] = max(entry['rows_fetched'], rows_stored)
+        set_progress(task, progress, lease)
+    return update
+
+def store_sources(task, filter_params, data_sources, timer, lease=None):
+    """Fetch the task's sources and ingest their records, reporting progress per source"""
+    # Remove rows (and progress) left by an earlier attempt that was interrupted
+    with timer.stage('cleanup'):
+        if lease:
+            lease.confirm()
+        DataRecord.query.filter_by(task_id=task.id).delete()
+        TaskRollup.query.filter_by(task_id=task.id).delete()
+        task.progress = None
+        task.rollup_built_at = None
+        db.session.commit()
+    
+    # Fetch the selected sources in parallel
+    with timer.stage('fetch'):
+        source_data = fetch_sources(filter_params, data_sources)
+    
+    # Sources that returned a list have a known size; lazy ones are counted as they are read
+    progress = {
+        source: {
+            'rows_fetched': len(records) if isinstance(records, list) else 0,
+            'rows_stored': 0,
+            'done': False
+        }
+        for source, records in source_data.items()
+    }
+    set_progress(task, progress, lease)
+    
+    # Bulk insert the data in batches (one transaction per batch); the rows are
+    # visible to /data and /aggregates with partial=1 as soon as each batch commits
+    ingest_stats = []
+    try:
+        for source, records in source_data.items():
+            stats = ingest_records(task.id, source, records, timer=timer,
+                                   on_batch=progress_updater(task, progress, source, lease), lease=lease)
+            progress[source].update(rows_fetched=stats['rows'], done=True)
+            set_progress(task, progress, lease)
+            ingest_stats.append(stats)
+    finally:
+        # Stop the readers of sources that were not ingested because an earlier one failed
+        for records in source_data.values():
+            if isinstance(records, PrefetchedSource):
+                records.close()
+    total_rows = sum(stats['rows'] for stats in ingest_stats)
+    total_seconds = sum(stats['seconds'] for stats in ingest_stats)
+    if total_seconds > 0:
+        print(f"Task {task.id} ingest rate: {total_rows / total_seconds:.0f} rows/sec")
+
+def process_task(task_id, final_attempt=True, lease=None):
+    """
+    Process a single task. If it fails and another attempt will follow
+    (final_attempt=False) the task goes back to "pending" instead of "failed".
+    The time spent in each stage is stored on the task and exported as metrics.
+    With the LeaseKeeper of the job, the task is abandoned (LeaseLost) as soon
+    as the job is lost to another worker, before any further write: each commit
+    to the task, its rows or its progress (including the cleanup after a
+    failure) first confirms the lease.
+    """
+    task = None
+    timer = StageTimer()
     try:
         # Get the task from the database
         task = Task.query.get(task_id)
@@ -61,78 +240,107 @@ def process_task(task_id):
             print(f"Task {task_id} not found")
             return
             
+        # Reuse an identical dataset from the cache instead of fetching it again
+        with timer.stage('cache_lookup'):
+            filter_params = json.loads(task.filter_params)
+            use_cache = filter_params.get('cache', True) and not task.virtual
+            if lease:
+                lease.confirm()
+            task.params_hash = params_hash(filter_params)
+            db.session.commit()
+            dataset_task_id = lookup_dataset(task.params_hash) if use_cache else None
+        
+        if dataset_task_id:
+            task.dataset_task_id = dataset_task_id
+            task.stage_timings = json.dumps(timer.rounded())
+            set_status(task, "completed", lease)
+            TASKS_PROCESSED.inc(status="completed")
+            print(f"Task {task_id} reused the dataset of task {dataset_task_id}")
+            return
+        
         # Task is already in "pending" state from creation
         # The 'pending' state should stay for 3-4 seconds
         print(f"Task {task_id} is pending")
-        time.sleep(random.uniform(3, 4))
+        if app.config['SIMULATE_DELAYS']:
+            with timer.stage('pending_wait'):
+                time.sleep(random.uniform(3, 4))
         
         # Update task status to "in_progress"
-        task.status = "in_progress"
-        db.session.commit()
+        set_status(task, "in_progress", lease)
         print(f"Task {task_id} is now in progress")
         
         # The 'in_progress' state should stay for 4-6 seconds
-        time.sleep(random.uniform(4, 6))
-        
-        # Parse filter parameters
-        filter_params = json.loads(task.filter_params)
+        if app.config['SIMULATE_DELAYS']:
+            with timer.stage('in_progress_wait'):
+                time.sleep(random.uniform(4, 6))
         
         # Get selected data sources
         data_sources = filter_params.get('data_sources', ['source_a', 'source_b'])
         
-        source_a_data = []
-        source_b_data = []
-        
-        # Only fetch data from the selected sources
-        if 'source_a' in data_sources:
-            source_a_data = fetch_data_from_source_a(filter_params)
+        cells = None
+        if task.virtual:
+            # Nothing is stored: the rows are regenerated from the seed whenever they are read.
+            # One generation gives both the progress counts and the rollup cube.
+            with timer.stage('generate'):
+                counts, cells = get_task_columns(task).summarize()
+                set_progress(task, {
+                    source: {'rows_fetched': counts.get(source, 0), 'rows_stored': counts.get(source, 0), 'done': True}
+                    for source in data_sources
+                }, lease)
+        else:
+            store_sources(task, filter_params, data_sources, timer, lease)
             
-        if 'source_b' in data_sources:
-            source_b_data = fetch_data_from_source_b(filter_params)
-        
-        # Save data to database
-        for record in source_a_data:
-            db_record = DataRecord(
-                task_id=task.id,
-                source="source_a",
-                category=record.get("category"),
-                brand=record.get("brand"),
-                price=record.get("price"),
-                purchase_date=datetime.fromisoformat(record.get("purchase_date")) if record.get("purchase_date") else None,
-                quantity=record.get("quantity", 1),
-                rating=record.get("rating"),
-                platform=record.get("platform"),
-                payment_method=record.get("payment_method"),
-                product_id=record.get("product_id")
-            )
-            db.session.add(db_record)
-            
-        for record in source_b_data:
-            db_record = DataRecord(
-                task_id=task.id,
-                source="source_b",
-                category=record.get("category"),
-                brand=record.get("brand"),
-                price=record.get("price"),
-                purchase_date=datetime.fromisoformat(record.get("purchase_date")) if record.get("purchase_date") else None,
-                quantity=record.get("quantity", 1),
-                platform=record.get("platform"),
-                location=record.get("location"),
-                payment_method=record.get("payment_method"),
-                product_id=record.get("product_id")
-            )
-            db.session.add(db_record)
+        # Summarize the records into the task's rollup cube for cross-task analytics
+        with timer.stage('rollup'):
+            if lease:
+                lease.confirm()
+            if task.virtual:
+                build_virtual_rollup(task, cells)
+            else:
+                build_rollup(task)
+            db.session.commit()
             
-        # Update task status to "completed"
-        task.status = "completed"
-        db.session.commit()
+        # Make the dataset available to later tasks with the same parameters
+        with timer.stage('finalize'):
+            if use_cache:
+                store_dataset(task.params_hash, task.id)
+        
+        # Update task status to "completed", committed with the dataset entry and
+        # the stage timings (recorded once the last stage has closed)
+        task.stage_timings = json.dumps(timer.rounded())
+        set_status(task, "completed", lease)
+        TASKS_PROCESSED.inc(status="completed")
         print(f"Task {task_id} is now completed")
         
+    except LeaseLost:
+        # Another worker owns the job now: its rows and status are no longer ours to touch
+        db.session.rollback()
+        TASKS_PROCESSED.inc(status="abandoned")
+        raise
     except Exception as e:
         # Update task status to "failed" in case of error
         if task:
-            task.status = "failed"
-            db.session.commit()
+            db.session.rollback()
+            try:
+                # Confirm the lease before deleting: if the job was taken over, the
+                # rows belong to the new holder. The deletes and the status change
+                # are committed together while the lease is held.
+                if lease:
+                    lease.confirm()
+                # Drop any batches (and the rollup) committed before the failure
+                DataRecord.query.filter_by(task_id=task_id).delete()
+                TaskRollup.query.filter_by(task_id=task_id).delete()
+                task.rollup_built_at = None
+                task.stage_timings = json.dumps(timer.rounded())
+                status = "failed" if final_attempt else "pending"
+                set_status(task, status)
+            except LeaseLost:
+                db.session.rollback()
+                TASKS_PROCESSED.inc(status="abandoned")
+                raise
+            TASKS_PROCESSED.inc(status="failed" if final_attempt else "retried")
         print(f"Error processing task {task_id}: {e}")
         # Raise the exception to be caught by the higher-level handler
-        raise 
\ No newline at end of file
+        raise
+    finally:
+        timer.export()
\ No newline at end of file
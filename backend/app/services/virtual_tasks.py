@@ -0,0 +1,58 @@
+import random
+from datetime import datetime
+from app import db
+from app.models.task_rollup import TaskRollup
+from app.services.hot_cache import get_task_columns
+from app.services.result_cache import DEFAULT_DATA_SOURCES
+from app.services.source_registry import is_synthetic_source
+
+# Upper bound (exclusive) of virtual task seeds, and of the seeds picked for tasks created without one
+MAX_SEED = 2 ** 31
+
+def wants_virtual(filter_params):
+    return str(filter_params.get('virtual', '')).lower() in ('1', 'true')
+
+def parse_seed(value):
+    """A generator seed: an integer (or integer string) in [0, MAX_SEED); raises ValueError otherwise"""
+    try:
+        seed = int(value)
+    except (TypeError, ValueError):
+        seed = None
+    if isinstance(value, (bool, float)) or seed is None or not 0 <= seed < MAX_SEED:
+        raise ValueError(f"seed must be an integer from 0 to {MAX_SEED - 1}, got {value!r}")
+    return seed
+
+def prepare_virtual_params(filter_params):
+    """
+    Check that a task can be virtual and pin its seed, so the same rows are
+    regenerated on every read. Only the vectorized generator is reproducible,
+    so every source must be synthetic and num_records must be set. Tasks of any
+    size are accepted: one that does not fit HOT_CACHE_MAX_BYTES is served
+    chunk by chunk (hot_cache.ChunkedColumns) instead of from memory.
+    Returns the filter_params to store; raises ValueError otherwise.
+    """
+    if not filter_params.get('num_records'):
+        raise ValueError("Virtual tasks need num_records")
+    data_sources = filter_params.get('data_sources') or DEFAULT_DATA_SOURCES
+    stored = [source for source in data_sources if not is_synthetic_source(source)]
+    if stored:
+        raise ValueError(f"Virtual tasks only support simulated sources, not {', '.join(stored)}")
+    
+    params = dict(filter_params, virtual=True)
+    if params.get('seed') in (None, ''):
+        params['seed'] = random.randrange(MAX_SEED)
+    else:
+        params['seed'] = parse_seed(params['seed'])
+    return params
+
+def build_virtual_rollup(task, cells=None):
+    """
+    Rebuild a virtual task's rollup cube from its regenerated columns (the
+    counterpart of rollups.build_rollup), or from `cells` already computed
+    by summarize(). The caller commits.
+    """
+    TaskRollup.query.filter_by(task_id=task.id).delete()
+    if cells is None:
+        _, cells = get_task_columns(task).summarize()
+    db.session.bulk_insert_mappings(TaskRollup, [{'task_id': task.id, **cell} for cell in cells])
+    task.rollup_built_at = datetime.utcnow()
@@ -0,0 +1,67 @@
+import io
+from datetime import datetime
+
+# Binary formats and their MIME types (need pandas + pyarrow)
+BINARY_FORMATS = {
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+def to_wire_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def encode_column(values):
+    """
+    Dictionary-encode text columns (low-cardinality strings and dates repeat on
+    almost every row); numeric columns are sent as plain arrays.
+    """
+    values = [to_wire_value(value) for value in values]
+    if not any(isinstance(value, str) for value in values):
+        return values
+    
+    dictionary = []
+    positions = {}
+    codes = []
+    for value in values:
+        if value is None:
+            codes.append(None)
+            continue
+        code = positions.get(value)
+        if code is None:
+            code = positions[value] = len(dictionary)
+            dictionary.append(value)
+        codes.append(code)
+    return {'dictionary': dictionary, 'codes': codes}
+
+def encode_columnar(rows, fields):
+    """Turn row tuples into {field: column} with dictionary-encoded text columns"""
+    columns = list(zip(*rows)) if rows else [[] for _ in fields]
+    return {field: encode_column(column) for field, column in zip(fields, columns)}
+
+def to_dataframe(rows, fields):
+    """Rows as a pandas DataFrame with text columns stored as categoricals"""
+    import pandas as pd
+    
+    frame = pd.DataFrame.from_records(rows, columns=fields)
+    for field in fields:
+        if frame[field].dtype == object and frame[field].map(lambda v: isinstance(v, str)).any():
+            frame[field] = frame[field].astype('category')
+    return frame
+
+def encode_binary(rows, fields, output_format):
+    """
+    Serialize rows as an Arrow IPC stream or a Parquet file.
+    Raises ImportError when pandas/pyarrow are not installed.
+    """
+    frame = to_dataframe(rows, fields)
+    buffer = io.BytesIO()
+    
+    if output_format == 'parquet':
+        frame.to_parquet(buffer, index=False)
+    else:
+        import pyarrow as pa
+        
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        with pa.ipc.new_stream(buffer, table.schema) as writer:
+            writer.write_table(table)
+    return buffer.getvalue()
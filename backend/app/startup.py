@@ -0,0 +1,17 @@
+from app import app
+from app.services.schema import upgrade_schema
+from app.services.job_queue import recover_jobs
+
+def prepare_database():
+    """
+    Create the tables (adding columns and indexes missing from older databases)
+    and re-enqueue tasks left pending or in progress by a previous run. Every
+    process that serves requests or runs workers calls this once at startup.
+    """
+    with app.app_context():
+        upgrade_schema()
+        print("Database tables created successfully")
+        
+        recovered = recover_jobs()
+        if recovered:
+            print(f"Re-enqueued {recovered} stranded tasks")
@@ -0,0 +1,84 @@
+import sqlite3
+import threading
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import event, orm
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+# Bind key of the engine used by task worker threads (same database, separate connection pool)
+WORKER_BIND = 'worker'
+
+# PRAGMA statements run on every new SQLite connection, filled in by configure_storage
+connection_pragmas = []
+
+# Marks threads whose sessions should use the worker engine
+thread_role = threading.local()
+
+def configure_storage(app):
+    """
+    Engine options for the configured SQLite database. File-backed SQLite gets a
+    QueuePool (Flask-SQLAlchemy would otherwise open a new connection, and
+    re-run the pragmas, for every session) and a second engine for worker
+    threads, so API reads never queue behind ingest for a pooled connection.
+    """
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    # Ingest writes through the sqlite3 cursor, and the dimension inserts, date
+    # grouping and schema upgrades use SQLite SQL, so fail here rather than on the first task
+    if not uri.startswith('sqlite'):
+        raise RuntimeError(f"Unsupported DATABASE_URL {uri!r}: only SQLite databases are supported")
+
+    connection_pragmas[:] = [
+        # Only takes effect on a new database; retention.py converts older ones with one VACUUM
+        "auto_vacuum=INCREMENTAL",
+        f"journal_mode={app.config['SQLITE_JOURNAL_MODE']}",
+        f"synchronous={app.config['SQLITE_SYNCHRONOUS']}",
+        f"busy_timeout={app.config['SQLITE_BUSY_TIMEOUT']}",
+        f"cache_size={-app.config['SQLITE_CACHE_SIZE']}",  # negative: size in KiB rather than pages
+        f"mmap_size={app.config['SQLITE_MMAP_SIZE']}"
+    ]
+
+    # In-memory databases are private to one connection; keep Flask-SQLAlchemy's StaticPool
+    if uri in ('sqlite://', 'sqlite:///:memory:'):
+        return
+
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {
+        'poolclass': QueuePool,
+        'pool_size': app.config['DB_POOL_SIZE'],
+        'max_overflow': app.config['DB_MAX_OVERFLOW'],
+        # Pooled connections are handed between threads (never used by two at once)
+        'connect_args': {'check_same_thread': False}
+    })
+    app.config.setdefault('SQLALCHEMY_BINDS', {})[WORKER_BIND] = uri
+
+@event.listens_for(Engine, 'connect')
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Run the configured PRAGMAs on each new SQLite connection"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for pragma in connection_pragmas:
+        cursor.execute(f'PRAGMA {pragma}')
+    cursor.close()
+
+def use_worker_engine():
+    """Route the sessions this thread opens from now on to the worker engine"""
+    thread_role.worker = True
+
+class RoutingSession(SignallingSession):
+    """Session bound to the worker engine in worker threads and the default engine otherwise"""
+    def __init__(self, db, **options):
+        app = db.get_app()
+        if getattr(thread_role, 'worker', False) and WORKER_BIND in app.config.get('SQLALCHEMY_BINDS', {}):
+            options['bind'] = db.get_engine(app, bind=WORKER_BIND)
+            options['binds'] = {}
+        super().__init__(db, **options)
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+def dispose_engines(app, db):
+    """Close every pooled connection (e.g. after forking a worker process)"""
+    db.engine.dispose()
+    if WORKER_BIND in app.config.get('SQLALCHEMY_BINDS', {}):
+        db.get_engine(app, bind=WORKER_BIND).dispose()
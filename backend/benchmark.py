@@ -0,0 +1,224 @@
+"""
+In-process benchmark suite for the data generation, ingest, query and
+serialization paths. Runs against a temporary SQLite database with the
+simulated task delays disabled and prints (or writes) the results as JSON.
+
+    python benchmark.py --sizes 1000 100000 1000000 --output bench.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Configure the app before it is imported: throwaway database, no background workers, no sleeps
+BENCH_DIR = tempfile.mkdtemp(prefix='datasourcing-bench-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(BENCH_DIR, 'bench.db')
+os.environ['WORKER_COUNT'] = '0'
+os.environ['SIMULATE_DELAYS'] = '0'
+
+from app import app, db
+from app.models.task import Task
+from app.models.data_record import DataRecord
+from app.services.data_source import fetch_data_from_source_a, fetch_data_from_source_b
+from app.services.schema import upgrade_schema
+from app.services.synthetic_data import generate_chunks
+from app.services.task_queue import process_task
+from app.services.http_cache import body_cache
+from app.services.hot_cache import hot_cache, TaskColumns, dataset_key
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+
+# Parameters shared by every benchmark task (wide enough that no rows are filtered out)
+BASE_PARAMS = {'year_from': 2020, 'year_to': 2025, 'cache': False}
+
+def timed(func, *args, **kwargs):
+    """Run func once and return (result, seconds)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def rate(rows, seconds):
+    return round(rows / seconds, 1) if seconds > 0 else None
+
+def bench_legacy_fetch(fetcher, rows):
+    """Call a per-record fetcher repeatedly until it has produced `rows` records"""
+    produced = 0
+    start = time.perf_counter()
+    while produced < rows:
+        produced += len(fetcher(BASE_PARAMS))
+    seconds = time.perf_counter() - start
+    return {'rows': produced, 'seconds': round(seconds, 4), 'rows_per_sec': rate(produced, seconds)}
+
+def bench_vectorized(source, rows):
+    """Generate `rows` records with the NumPy generator"""
+    start = time.perf_counter()
+    produced = sum(len(chunk['category']) for chunk in generate_chunks(source, BASE_PARAMS, rows, seed=1))
+    seconds = time.perf_counter() - start
+    return {'rows': produced, 'seconds': round(seconds, 4), 'rows_per_sec': rate(produced, seconds)}
+
+def bench_generation(size):
+    """Throughput of the legacy fetchers and the vectorized generator for one size"""
+    return {
+        'source_a': {
+            'legacy': bench_legacy_fetch(fetch_data_from_source_a, size),
+            'vectorized': bench_vectorized('source_a', size)
+        },
+        'source_b': {
+            'legacy': bench_legacy_fetch(fetch_data_from_source_b, size),
+            'vectorized': bench_vectorized('source_b', size)
+        }
+    }
+
+def bench_ingest(size):
+    """Create a task with `size` rows (split across both sources) and time process_task"""
+    params = dict(BASE_PARAMS, num_records=size // 2, seed=size)
+    with app.app_context():
+        task = Task(name=f'benchmark-{size}', filter_params=params)
+        db.session.add(task)
+        db.session.commit()
+        task_id = task.id
+
+        # process_task logs progress with print; keep stdout clean for the JSON report
+        with contextlib.redirect_stdout(sys.stderr):
+            _, seconds = timed(process_task, task_id)
+        status = Task.query.get(task_id).status
+        stored = DataRecord.query.filter_by(task_id=task_id).count()
+        db.session.remove()
+
+    return task_id, {
+        'status': status,
+        'rows': stored,
+        'seconds': round(seconds, 4),
+        'rows_per_sec': rate(stored, seconds)
+    }
+
+def bench_endpoint(client, url, repeat):
+    """Median latency and payload size of a GET request"""
+    latencies = []
+    size = 0
+    for _ in range(repeat):
+        # Measure the query and serialization path, not a response body cache hit
+        body_cache.clear()
+        start = time.perf_counter()
+        response = client.get(url)
+        body = response.get_data()
+        latencies.append(time.perf_counter() - start)
+        size = len(body)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {response.status_code}")
+    return {
+        'median_ms': round(statistics.median(latencies) * 1000, 2),
+        'min_ms': round(min(latencies) * 1000, 2),
+        'bytes': size
+    }
+
+@contextlib.contextmanager
+def hot_cache_disabled():
+    """Serve every request from SQLite: the hot column store is emptied and gets no budget"""
+    max_bytes = app.config['HOT_CACHE_MAX_BYTES']
+    app.config['HOT_CACHE_MAX_BYTES'] = 0
+    hot_cache.clear()
+    try:
+        yield
+    finally:
+        app.config['HOT_CACHE_MAX_BYTES'] = max_bytes
+
+def load_hot_columns(task_id):
+    """Load a task into the hot column store up front; returns its size in bytes (None if it does not fit)"""
+    hot_cache.clear()
+    with app.app_context():
+        columns = TaskColumns.load(dataset_key(Task.query.get(task_id)))
+        db.session.remove()
+    if columns.nbytes > app.config['HOT_CACHE_MAX_BYTES']:
+        return None
+    hot_cache.put(columns)
+    return columns.nbytes
+
+def bench_queries(client, task_id, repeat, include_full):
+    """Latency and payload size of the data and aggregate endpoints for a task"""
+    base = f'/api/tasks/{task_id}'
+    endpoints = {
+        'data_page_1000': f'{base}/data?limit=1000',
+        'data_page_1000_projected': f'{base}/data?limit=1000&fields=category,brand,price,quantity',
+        'data_page_1000_columnar': f'{base}/data?limit=1000&format=columnar',
+        'data_filtered_category': f'{base}/data?category=Books&limit=1000',
+        'data_ndjson': f'{base}/data?format=ndjson',
+        'aggregates': f'{base}/aggregates',
+        'aggregates_filtered': f'{base}/aggregates?platform=Online&year=2022',
+        'analytics_by_month': f'/api/analytics?task_ids={task_id}&group_by=month,platform'
+    }
+    if include_full:
+        endpoints['data_full_json'] = f'{base}/data'
+    return {name: bench_endpoint(client, url, repeat) for name, url in endpoints.items()}
+
+def bench_hot_queries(client, task_id, repeat, include_full):
+    """The same endpoints answered from the in-memory column store"""
+    nbytes = load_hot_columns(task_id)
+    if nbytes is None:
+        return {'skipped': 'task does not fit HOT_CACHE_MAX_BYTES'}
+    return {'column_store_bytes': nbytes, **bench_queries(client, task_id, repeat, include_full)}
+
+def run(sizes, repeat, include_full):
+    with app.app_context():
+        upgrade_schema()
+    client = app.test_client()
+
+    results = []
+    for size in sizes:
+        print(f"Benchmarking {size} rows...", file=sys.stderr)
+        task_id, ingest = bench_ingest(size)
+        with hot_cache_disabled():
+            queries = bench_queries(client, task_id, repeat, include_full)
+        results.append({
+            'size': size,
+            'generation': bench_generation(size),
+            'ingest': ingest,
+            'queries': queries,
+            'hot_queries': bench_hot_queries(client, task_id, repeat, include_full)
+        })
+
+    return {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'ingest_batch_size': app.config['INGEST_BATCH_SIZE']
+        },
+        'results': results
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark generation, ingest and query paths')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='row counts to benchmark (default: 1000 100000 1000000)')
+    parser.add_argument('--repeat', type=int, default=5, help='requests per endpoint (median is reported)')
+    parser.add_argument('--skip-full', action='store_true',
+                        help='skip the unpaginated /data request (large at 1M rows)')
+    parser.add_argument('--output', help='write the JSON results to this file instead of stdout')
+    args = parser.parse_args()
+
+    try:
+        report = run(args.sizes, args.repeat, include_full=not args.skip_full)
+    finally:
+        # The benchmark database is hundreds of MB at 1M rows; never leave it behind
+        db.engine.dispose()
+        shutil.rmtree(BENCH_DIR, ignore_errors=True)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+import argparse
+import json
+from app import app
+from app.services.schema import upgrade_schema
+from app.services.retention import apply_retention
+
+def main():
+    parser = argparse.ArgumentParser(description='Delete (or archive) old finished tasks and vacuum the database')
+    parser.add_argument('--days', type=int, default=app.config['RETENTION_DAYS'],
+                        help='keep tasks created within this many days')
+    parser.add_argument('--archive-dir', default=app.config['ARCHIVE_DIR'],
+                        help='write each task and its records to this directory before deleting it')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='only report how many tasks would be removed')
+    args = parser.parse_args()
+    
+    with app.app_context():
+        upgrade_schema()
+        summary = apply_retention(args.days, args.archive_dir, args.dry_run)
+    print(json.dumps(summary, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -22,7 +22,9 @@ def test_create_task():
         'filter_params': {
             'year_from': '2022',
             'year_to': '2023',
-            'companies': ['Toyota', 'Honda']
+            'companies': ['Samsung', 'Nike'],
+            'categories': ['Electronics', 'Clothing'],
+            'data_sources': ['source_a', 'source_b']
         }
     }
     
@@ -37,8 +39,11 @@ def test_create_task():
 def test_get_tasks():
     response = requests.get(f'{BASE_URL}/api/tasks')
     print(f'Get Tasks: {response.status_code}')
-    tasks = response.json()
-    print(f'Total tasks: {len(tasks)}')
+    tasks = response.json()['tasks']
+    print(f'Tasks on first page: {len(tasks)}')
+    
+    response = requests.get(f'{BASE_URL}/api/tasks/summary')
+    print(f'Task counts: {response.json()}')
     print('-' * 50)
 
 def test_get_task(task_id):
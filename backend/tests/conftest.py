@@ -0,0 +1,96 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# Configure the app before it is imported: throwaway database, no background workers, no sleeps
+TEST_DIR = tempfile.mkdtemp(prefix='datasourcing-test-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(TEST_DIR, 'test.db')
+os.environ['WORKER_COUNT'] = '0'
+os.environ['SIMULATE_DELAYS'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app as flask_app, db
+from app.models.task import Task
+from app.services.job_queue import new_job, claim_job
+from app.services.schema import upgrade_schema
+from app.services.task_queue import process_task
+from app.services.http_cache import body_cache
+from app.services.hot_cache import hot_cache
+from app.services import dimensions
+
+def drop_tables():
+    """Drop every table, including ones the models no longer know about"""
+    tables = db.session.execute(db.text("SELECT name FROM sqlite_master WHERE type = 'table'")).scalars().all()
+    for table in tables:
+        db.session.execute(db.text(f'DROP TABLE "{table}"'))
+    db.session.commit()
+
+@pytest.fixture
+def app():
+    """The app inside an app context, with an empty database and empty in-process caches"""
+    body_cache.clear()
+    hot_cache.clear()
+    for cache in (dimensions.ids_by_name, dimensions.names_by_id):
+        for mapping in cache.values():
+            mapping.clear()
+    with flask_app.app_context():
+        drop_tables()
+        yield flask_app
+        db.session.remove()
+
+@pytest.fixture
+def schema(app):
+    """An empty database with the current schema"""
+    upgrade_schema()
+    return app
+
+@pytest.fixture
+def client(schema):
+    return schema.test_client()
+
+@pytest.fixture
+def create_task(client):
+    """Factory that creates a task through the API and processes it in this thread; returns its id"""
+    def create(filter_params, name='test', **fields):
+        response = client.post('/api/tasks', json={'name': name, 'filter_params': filter_params, **fields})
+        assert response.status_code == 201, response.get_json()
+        task_id = response.get_json()['id']
+        process_task(task_id)
+        return task_id
+    return create
+
+@pytest.fixture
+def completed_task(create_task):
+    """A completed task with a few hundred stored rows from both simulated sources"""
+    return create_task({'num_records': 200, 'seed': 7, 'cache': False})
+
+@pytest.fixture
+def make_job(schema):
+    """Factory of queued jobs for new tasks; returns the job id"""
+    def make(priority=0, owner='alice'):
+        task = Task(name='test', filter_params={'num_records': 10, 'seed': 1, 'cache': False})
+        task.priority = priority
+        task.owner = owner
+        db.session.add(task)
+        db.session.flush()
+        job = new_job(task)
+        db.session.add(job)
+        db.session.commit()
+        return job.id
+    return make
+
+@pytest.fixture
+def claim(schema):
+    """Claim the next job as a worker would; returns (job id, lease token) or (None, None)"""
+    def claim_next():
+        job, token = claim_job('test-worker')
+        return (job.id, token) if job else (None, None)
+    return claim_next
+
+def pytest_sessionfinish(session, exitstatus):
+    with flask_app.app_context():
+        db.engine.dispose()
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
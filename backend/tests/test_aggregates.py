@@ -0,0 +1,60 @@
+from collections import defaultdict
+
+import pytest
+
+def all_rows(client, task_id, query=''):
+    return client.get(f'/api/tasks/{task_id}/data?limit=10000&{query}').get_json()['data']
+
+def value(row):
+    return row['price'] * row['quantity'] if row['price'] is not None else 0
+
+@pytest.fixture
+def sql_only(schema, monkeypatch):
+    """Answer every request from SQLite, not the in-memory column store"""
+    monkeypatch.setitem(schema.config, 'HOT_CACHE_MAX_BYTES', 0)
+
+@pytest.mark.parametrize('query', ['', 'platform=Online&year_from=2022', 'category=Books,Toys'])
+def test_aggregates_match_the_records(client, completed_task, sql_only, query):
+    rows = all_rows(client, completed_task, query)
+    assert rows
+    aggregates = client.get(f'/api/tasks/{completed_task}/aggregates?{query}').get_json()
+    
+    summary = aggregates['summary']
+    assert summary['record_count'] == len(rows)
+    assert summary['task_record_count'] == 400
+    assert summary['total_sales'] == pytest.approx(sum(value(row) for row in rows), abs=0.05)
+    
+    sources = defaultdict(int)
+    monthly = defaultdict(float)
+    categories = defaultdict(float)
+    for row in rows:
+        sources[row['source']] += 1
+        monthly[row['purchase_date'][:7]] += value(row)
+        categories[row['category']] += value(row)
+    assert summary['source_counts'] == dict(sources)
+    
+    months = [item['month'] for item in aggregates['monthly_sales']]
+    assert months == sorted(monthly)
+    for item in aggregates['monthly_sales']:
+        assert item['sales'] == pytest.approx(monthly[item['month']], abs=0.01)
+    
+    sales = [item['total_sales'] for item in aggregates['category_sales']]
+    assert sales == sorted(sales, reverse=True)
+    assert {item['category'] for item in aggregates['category_sales']} == set(categories)
+    
+    platforms = aggregates['platforms']
+    assert sum(item['order_count'] for item in platforms) == len(rows)
+    assert sum(item['total_items'] for item in platforms) == sum(row['quantity'] for row in rows)
+
+def test_brand_options_ignore_the_filters(client, completed_task, sql_only):
+    brands = {row['brand'] for row in all_rows(client, completed_task) if row['brand']}
+    filtered = client.get(f'/api/tasks/{completed_task}/aggregates?category=Books').get_json()
+    assert filtered['brands'] == sorted(brands)
+
+def test_bad_filter_is_rejected(client, completed_task, sql_only):
+    response = client.get(f'/api/tasks/{completed_task}/aggregates?date_from=yesterday')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Bad request'
+
+def test_unknown_task_is_404(client):
+    assert client.get('/api/tasks/12345/aggregates').status_code == 404
@@ -0,0 +1,51 @@
+import pytest
+
+from app import db
+from app.models.task import Task
+
+PARAMS = {'num_records': 300, 'seed': 11}
+
+def get(client, query):
+    return client.get(f'/api/analytics?{query}')
+
+def test_rollup_totals_match_the_task_aggregates(client, completed_task):
+    aggregates = client.get(f'/api/tasks/{completed_task}/aggregates').get_json()
+    rows = get(client, f'task_ids={completed_task}').get_json()['rows']
+    assert len(rows) == 1
+    assert rows[0]['task_id'] == completed_task
+    assert rows[0]['order_count'] == aggregates['summary']['record_count']
+    assert rows[0]['total_sales'] == pytest.approx(aggregates['summary']['total_sales'], abs=0.01)
+
+def test_grouped_and_filtered_cells_match_the_aggregates(client, completed_task):
+    aggregates = client.get(f'/api/tasks/{completed_task}/aggregates?year=2022&platform=Online').get_json()
+    rows = get(client, f'task_ids={completed_task}&group_by=category&year=2022&platform=Online').get_json()['rows']
+    by_category = {row['category']: row['total_sales'] for row in rows}
+    expected = {row['category']: row['total_sales'] for row in aggregates['category_sales']}
+    assert by_category.keys() == expected.keys()
+    for category, sales in expected.items():
+        assert by_category[category] == pytest.approx(sales, abs=0.01)
+
+def test_a_shared_dataset_is_counted_once_when_merged(client, create_task):
+    first = create_task(PARAMS)
+    second = create_task(PARAMS)
+    assert client.get(f'/api/tasks/{second}').get_json()['dataset_task_id'] == first
+    
+    alone = get(client, f'task_ids={first}&group_by=source').get_json()['rows']
+    merged = get(client, f'task_ids={first},{second}&group_by=source').get_json()['rows']
+    assert merged == alone
+    
+    per_task = get(client, f'task_ids={first},{second}').get_json()['rows']
+    assert [row['task_id'] for row in per_task] == [first, second]
+    assert per_task[0]['total_sales'] == per_task[1]['total_sales']
+
+def test_invalid_requests(client, completed_task):
+    pending = Task(name='pending', filter_params={})
+    db.session.add(pending)
+    db.session.commit()
+    
+    assert get(client, '').status_code == 400
+    assert get(client, 'task_ids=one').status_code == 400
+    assert get(client, f'task_ids={completed_task}&group_by=colour').status_code == 400
+    assert get(client, f'task_ids={completed_task}&month_from=2022-13').status_code == 400
+    assert get(client, f'task_ids={completed_task},99999').status_code == 404
+    assert get(client, f'task_ids={pending.id}').status_code == 409
@@ -0,0 +1,23 @@
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_benchmark_reports_every_path_as_json(tmp_path):
+    output = tmp_path / 'bench.json'
+    subprocess.run([sys.executable, 'benchmark.py', '--sizes', '200', '--repeat', '1', '--output', str(output)],
+                   cwd=BACKEND_DIR, check=True, capture_output=True, timeout=120)
+    report = json.loads(output.read_text())
+    
+    assert report['meta']['repeat'] == 1
+    [result] = report['results']
+    assert result['size'] == 200
+    assert result['ingest']['status'] == 'completed' and result['ingest']['rows'] == 200
+    assert set(result['generation']) == {'source_a', 'source_b'}
+    assert 'aggregates' in result['queries'] and 'data_ndjson' in result['queries']
+    assert result['hot_queries']['column_store_bytes'] > 0
+    assert set(result['hot_queries']) - {'column_store_bytes'} == set(result['queries'])
+    for timing in result['queries'].values():
+        assert timing['median_ms'] >= 0 and timing['bytes'] > 0
@@ -0,0 +1,59 @@
+from app.models.job import Job
+from app.models.task import Task
+from app.services.job_queue import complete_job
+
+def test_claim_prefers_higher_priority(make_job, claim):
+    low = make_job(priority=0)
+    high = make_job(priority=10)
+    
+    assert claim()[0] == high
+    assert claim()[0] == low
+    assert claim() == (None, None)
+
+def test_claim_takes_oldest_job_of_an_owner_first(make_job, claim):
+    jobs = [make_job() for _ in range(3)]
+    
+    assert [claim()[0] for _ in jobs] == jobs
+
+def test_owners_take_turns(make_job, claim):
+    # alice submits a batch before bob's single task
+    alice = [make_job(owner='alice') for _ in range(3)]
+    bob = make_job(owner='bob')
+    
+    first, first_token = claim()
+    assert first == alice[0]
+    # alice already has a running job, so bob goes next
+    second, second_token = claim()
+    assert second == bob
+    
+    complete_job(first, first_token)
+    complete_job(second, second_token)
+    bob_again = make_job(owner='bob')
+    # Neither owner has a running job: alice was served least recently
+    assert claim()[0] == alice[1]
+    assert claim()[0] == bob_again
+    assert claim()[0] == alice[2]
+
+def test_batch_is_queued_behind_interactive_tasks(client, claim):
+    response = client.post('/api/tasks/batch', json={
+        'owner': 'nightly',
+        'tasks': [{'name': f'batch {i}', 'filter_params': {'num_records': 10}} for i in range(3)]
+    })
+    assert response.status_code == 201
+    batch_ids = [task['id'] for task in response.get_json()['tasks']]
+    interactive_id = client.post('/api/tasks', json={'name': 'now', 'filter_params': {'num_records': 10}}).get_json()['id']
+    
+    assert [Task.query.get(task_id).owner for task_id in batch_ids] == ['nightly'] * 3
+    claimed = [Job.query.get(claim()[0]).task_id for _ in range(4)]
+    assert claimed == [interactive_id] + batch_ids
+
+def test_invalid_batch_creates_nothing(client):
+    response = client.post('/api/tasks/batch', json={
+        'tasks': [{'name': 'ok', 'filter_params': {}}, {'name': 'bad', 'priority': 'high'}]
+    })
+    assert response.status_code == 400
+    assert response.get_json()['message'].startswith('tasks[1]: ')
+    assert Task.query.count() == 0 and Job.query.count() == 0
+    
+    for body in ([], [1], {'tasks': []}, {'tasks': [[1]]}, {'tasks': [{'filter_params': [1]}]}):
+        assert client.post('/api/tasks/batch', json=body).status_code == 400
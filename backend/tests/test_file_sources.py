@@ -0,0 +1,61 @@
+import csv
+import json
+
+import pytest
+
+from app.models.data_record import DataRecord
+from app.services.file_sources import file_reader_for
+from app.services.source_registry import SOURCES, file_source
+
+RECORDS = [
+    {'category': 'Books', 'brand': 'Penguin', 'price': 12.5, 'purchase_date': '2021-05-01T10:00:00',
+     'quantity': 2, 'rating': 4.5, 'platform': 'Online', 'location': '', 'payment_method': 'PayPal', 'product_id': 'P1'},
+    {'category': 'Toys', 'brand': 'Lego', 'price': 30.0, 'purchase_date': '2019-01-01T09:00:00',
+     'quantity': 1, 'rating': '', 'platform': 'Store', 'location': 'Austin', 'payment_method': 'Cash', 'product_id': 'S2'},
+    {'category': 'Toys', 'brand': 'Lego', 'price': 8.25, 'purchase_date': '2022-12-31T23:00:00',
+     'quantity': 3, 'rating': 3.0, 'platform': 'Store', 'location': 'Boston', 'payment_method': 'Cash', 'product_id': 'S3'},
+]
+
+def write(tmp_path, layout):
+    if layout == 'csv':
+        path = tmp_path / 'records.csv'
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(RECORDS[0]))
+            writer.writeheader()
+            writer.writerows(RECORDS)
+    elif layout == 'array':
+        path = tmp_path / 'records.json'
+        path.write_text(json.dumps(RECORDS))
+    else:
+        path = tmp_path / f'records.{layout}'
+        path.write_text(''.join(json.dumps(record) + '\n\n' for record in RECORDS))
+    return str(path)
+
+@pytest.mark.parametrize('layout', ['csv', 'array', 'jsonl', 'ndjson', 'json'])
+def test_every_layout_reads_the_same_records(tmp_path, layout):
+    path = write(tmp_path, layout)
+    rows = list(file_reader_for(path)(path, {}))
+    assert [row['product_id'] for row in rows] == ['P1', 'S2', 'S3']
+    assert rows[0]['price'] == 12.5 and rows[0]['quantity'] == 2
+    assert rows[0]['location'] is None and rows[1]['rating'] is None
+    
+    kept = list(file_reader_for(path)(path, {'year_from': 2020, 'year_to': 2025, 'companies': ['Lego']}))
+    assert [row['product_id'] for row in kept] == ['S3']
+
+def test_empty_json_lines_file_has_no_records(tmp_path):
+    path = tmp_path / 'empty.jsonl'
+    path.write_text('')
+    assert list(file_reader_for(str(path))(str(path), {})) == []
+
+def test_unsupported_extension_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        file_reader_for(str(tmp_path / 'records.xml'))
+
+def test_task_ingests_a_registered_file_source(client, create_task, tmp_path, monkeypatch):
+    monkeypatch.setitem(SOURCES, 'outlet', file_source(write(tmp_path, 'csv')))
+    
+    task_id = create_task({'data_sources': ['outlet'], 'year_from': 2020, 'year_to': 2025, 'cache': False})
+    assert client.get(f'/api/tasks/{task_id}').get_json()['status'] == 'completed'
+    rows = client.get(f'/api/tasks/{task_id}/data').get_json()['data']
+    assert [(row['source'], row['product_id']) for row in rows] == [('outlet', 'P1'), ('outlet', 'S3')]
+    assert DataRecord.query.filter_by(task_id=task_id).count() == 2
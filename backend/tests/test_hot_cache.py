@@ -0,0 +1,64 @@
+import json
+
+from app.models.task import Task
+from app.services.http_cache import body_cache
+from app.services.hot_cache import hot_cache, TaskColumns, dataset_key
+
+# Every query is answered both from SQLite and from the in-memory column store
+QUERIES = [
+    'data',
+    'data?limit=25',
+    'data?limit=25&after={cursor}',
+    'data?fields=category,brand,price&platform=Online&limit=100',
+    'data?category=Books,Toys&year=2023',
+    'data?format=columnar&limit=40&source=source_b',
+    'aggregates',
+    'aggregates?platform=Online&year_from=2022',
+    'aggregates?category=No such category'
+]
+
+def fetch_all(client, task_id, cursor):
+    bodies = []
+    for query in QUERIES:
+        # Skip the response body cache so each path renders its own body
+        body_cache.clear()
+        response = client.get(f'/api/tasks/{task_id}/' + query.format(cursor=cursor))
+        assert response.status_code == 200, query
+        bodies.append(response.get_data())
+    return bodies
+
+def test_hot_and_sql_paths_serve_identical_bodies(schema, client, completed_task, monkeypatch):
+    cursor = client.get(f'/api/tasks/{completed_task}/data?limit=25').get_json()['next_cursor']
+    assert cursor is not None
+    
+    monkeypatch.setitem(schema.config, 'HOT_CACHE_MAX_BYTES', 0)
+    from_sql = fetch_all(client, completed_task, cursor)
+    
+    monkeypatch.setitem(schema.config, 'HOT_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+    key = dataset_key(Task.query.get(completed_task))
+    hot_cache.put(TaskColumns.load(key))
+    assert hot_cache.get(key) is not None
+    hits = hot_cache.hits
+    from_memory = fetch_all(client, completed_task, cursor)
+    assert hot_cache.hits - hits == len(QUERIES)
+    
+    # Byte for byte: both are served under the same strong ETag
+    for query, sql_body, memory_body in zip(QUERIES, from_sql, from_memory):
+        assert memory_body == sql_body, query
+    
+    # The filter matching nothing still reports money as floats
+    summary = json.loads(from_sql[-1])['summary']
+    assert summary['record_count'] == 0 and isinstance(summary['total_sales'], float)
+
+def test_task_too_large_for_the_budget_is_served_from_sqlite(schema, client, completed_task, monkeypatch):
+    monkeypatch.setitem(schema.config, 'HOT_CACHE_MAX_BYTES', 1024)
+    key = dataset_key(Task.query.get(completed_task))
+    hot_cache.mark_oversized(key, 10 * 1024)
+    
+    response = client.get(f'/api/tasks/{completed_task}/data?limit=5')
+    assert response.status_code == 200 and len(response.get_json()['data']) == 5
+    assert hot_cache.get(key) is None and hot_cache.too_large(key)
+    
+    # Raising the budget lets it in again
+    monkeypatch.setitem(schema.config, 'HOT_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+    assert not hot_cache.too_large(key)
@@ -0,0 +1,81 @@
+import gzip
+import json
+
+from app import db
+from app.models.task import Task
+from app.services.http_cache import BodyCache, body_cache
+
+GZIP = {'Accept-Encoding': 'gzip'}
+
+def test_matching_etag_with_gzip_suffix_gets_304(client, completed_task):
+    url = f'/api/tasks/{completed_task}/data?limit=500'
+    first = client.get(url, headers=GZIP)
+    assert first.status_code == 200
+    assert first.headers['Content-Encoding'] == 'gzip'
+    etag = first.headers['ETag']
+    assert etag.endswith('-gzip"')
+    assert first.headers['Cache-Control'].startswith('public, max-age=')
+    assert len(json.loads(gzip.decompress(first.get_data()))['data']) == 400
+    
+    repeat = client.get(url, headers={**GZIP, 'If-None-Match': etag})
+    assert repeat.status_code == 304
+    assert repeat.headers['ETag'] == etag
+    assert repeat.get_data() == b''
+
+def test_encoded_validator_does_not_match_an_identity_request(client, completed_task):
+    url = f'/api/tasks/{completed_task}/data?limit=500'
+    etag = client.get(url, headers=GZIP).headers['ETag']
+    
+    plain = client.get(url, headers={'If-None-Match': etag})
+    assert plain.status_code == 200
+    assert 'Content-Encoding' not in plain.headers
+    assert client.get(url, headers={'If-None-Match': plain.headers['ETag']}).status_code == 304
+
+def test_etag_depends_on_the_query_arguments(client, completed_task):
+    url = f'/api/tasks/{completed_task}/aggregates'
+    etag = client.get(url).headers['ETag']
+    other = client.get(f'{url}?category=Books', headers={'If-None-Match': etag})
+    assert other.status_code == 200
+    assert other.headers['ETag'] != etag
+
+def test_unfinished_task_detail_is_revalidated(client):
+    task = Task(name='pending', filter_params={})
+    db.session.add(task)
+    db.session.commit()
+    
+    first = client.get(f'/api/tasks/{task.id}')
+    assert first.headers['Cache-Control'] == 'no-cache'
+    assert client.get(f'/api/tasks/{task.id}', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    
+    task.status = 'in_progress'
+    db.session.commit()
+    assert client.get(f'/api/tasks/{task.id}', headers={'If-None-Match': first.headers['ETag']}).status_code == 200
+
+def test_repeat_views_are_served_from_the_body_cache(client, completed_task):
+    url = f'/api/tasks/{completed_task}/aggregates'
+    first = client.get(url, headers=GZIP)
+    hits = body_cache.stats()['hits']
+    
+    second = client.get(url, headers=GZIP)
+    assert body_cache.stats()['hits'] == hits + 1
+    assert second.get_data() == first.get_data()
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert second.headers['Content-Encoding'] == 'gzip'
+
+def test_body_cache_evicts_least_recently_used_first(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'RESPONSE_CACHE_MAX_BYTES', 400)
+    cache = BodyCache()
+    for key in ('a', 'b', 'c'):
+        cache.put(key, b'x' * 100, [])
+    cache.get('a')
+    cache.put('d', b'x' * 100, [])
+    cache.put('e', b'x' * 100, [])
+    
+    assert cache.get('b') is None
+    assert all(cache.get(key) is not None for key in ('a', 'c', 'd', 'e'))
+    assert cache.stats()['bytes'] == 400
+    assert cache.stats()['evictions'] == 1
+    
+    # Bodies over a quarter of the budget are not kept at all
+    cache.put('big', b'x' * 101, [])
+    assert cache.get('big') is None
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.models.data_record import DataRecord
+from app.models.dimension import Brand
+from app.models.task import Task
+from app.services import dimensions
+from app.services.dimensions import ensure_ids, lookup_names
+from app.services.ingest import ingest_records
+from app.services.job_queue import LeaseLost
+
+RECORDS = [
+    {'category': 'Books', 'brand': 'Lego', 'price': 12.5, 'quantity': 2, 'rating': 4.0,
+     'platform': 'Online', 'location': 'Berlin', 'payment_method': 'Card',
+     'purchase_date': '2023-04-05T10:30:00', 'product_id': 'P1'},
+    {'category': 'Toys', 'brand': None, 'price': 3.0, 'quantity': None, 'rating': None,
+     'platform': None, 'location': 'Paris', 'payment_method': 'Cash',
+     'purchase_date': datetime(2022, 1, 2, 3, 4, 5), 'product_id': 'P2'},
+]
+
+class LostLease:
+    def confirm(self):
+        raise LeaseLost("job was reclaimed")
+
+@pytest.fixture
+def task_id(schema):
+    task = Task(name='ingest', filter_params={})
+    db.session.add(task)
+    db.session.commit()
+    return task.id
+
+def stored_names(field):
+    return {name for (name,) in db.session.query(dimensions.DIMENSION_MODELS[field].name)}
+
+def test_rows_are_stored_with_dimension_ids_and_dates(task_id):
+    stats = ingest_records(task_id, 'source_a', iter(RECORDS), batch_size=1)
+    assert stats['rows'] == 2
+    
+    rows = DataRecord.query.filter_by(task_id=task_id).order_by(DataRecord.id).all()
+    assert [row.product_id for row in rows] == ['P1', 'P2']
+    assert lookup_names('category', [row.category_id for row in rows]) == {
+        rows[0].category_id: 'Books', rows[1].category_id: 'Toys'}
+    assert rows[1].brand_id is None and rows[1].platform_id is None
+    assert rows[1].quantity == 1
+    assert rows[0].purchase_date == datetime(2023, 4, 5, 10, 30)
+    assert rows[1].purchase_date == datetime(2022, 1, 2, 3, 4, 5)
+    assert lookup_names('source', [rows[0].source_id]) == {rows[0].source_id: 'source_a'}
+
+def test_new_names_are_cached_only_once_committed(schema):
+    ids = ensure_ids('brand', ['Acme'])
+    assert 'Acme' in ids
+    assert 'Acme' not in dimensions.ids_by_name['brand']
+    
+    db.session.commit()
+    assert dimensions.ids_by_name['brand']['Acme'] == ids['Acme']
+    assert dimensions.names_by_id['brand'][ids['Acme']] == 'Acme'
+
+def test_rolled_back_names_are_neither_stored_nor_cached(schema):
+    ensure_ids('brand', ['Acme'])
+    db.session.rollback()
+    
+    assert 'Acme' not in stored_names('brand')
+    assert 'Acme' not in dimensions.ids_by_name['brand']
+    assert not any(name == 'Acme' for name in dimensions.names_by_id['brand'].values())
+
+def test_a_batch_that_is_not_written_leaves_no_lookup_rows(task_id):
+    with pytest.raises(LeaseLost):
+        ingest_records(task_id, 'source_a', RECORDS, lease=LostLease())
+    db.session.rollback()
+    
+    assert Brand.query.count() == 0
+    assert DataRecord.query.count() == 0
+    assert dimensions.ids_by_name['brand'] == {}
@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.data_record import DataRecord
+from app.models.job import Job
+from app.models.task import Task
+from app.services.job_queue import (heartbeat, complete_job, fail_job,
+                                    fail_abandoned_jobs, recover_jobs, LeaseKeeper, LeaseLost)
+from app.services.ingest import ingest_records
+from app.services import task_queue
+from app.services.task_queue import process_task
+
+def expire_lease(job_id):
+    Job.query.filter_by(id=job_id).update({Job.lease_expires_at: datetime.utcnow() - timedelta(seconds=1)})
+    db.session.commit()
+
+def test_claimed_job_is_not_claimed_again(schema, make_job, claim):
+    job_id = make_job()
+    
+    claimed, token = claim()
+    assert claimed == job_id
+    assert claim() == (None, None)
+    
+    job = Job.query.get(job_id)
+    assert job.status == 'running' and job.attempts == 1 and job.lease_token == token
+
+def test_expired_lease_is_reclaimed(schema, make_job, claim):
+    job_id = make_job()
+    _, old_token = claim()
+    expire_lease(job_id)
+    
+    claimed, token = claim()
+    assert claimed == job_id and token != old_token
+    assert Job.query.get(job_id).attempts == 2
+    # The previous holder can no longer renew or settle the job
+    assert not heartbeat(job_id, old_token)
+    assert heartbeat(job_id, token)
+    assert not fail_job(job_id, old_token, 'late failure')
+    assert Job.query.get(job_id).status == 'running'
+
+def test_job_whose_worker_died_on_the_last_attempt_fails(schema, make_job, claim):
+    job_id = make_job()
+    task_id = Job.query.get(job_id).task_id
+    for attempt in range(3):
+        # The worker is killed mid-task: nothing settles the job, the lease just expires
+        assert claim()[0] == job_id
+        ingest_records(task_id, 'source_a', [{'category': 'Books', 'price': 1.0}])
+        expire_lease(job_id)
+    
+    # Out of attempts: not handed out again, but failed along with its task
+    assert claim() == (None, None)
+    assert fail_abandoned_jobs() == [task_id]
+    job = Job.query.get(job_id)
+    assert job.status == 'failed' and job.attempts == job.max_attempts == 3
+    assert Task.query.get(task_id).status == 'failed'
+    assert DataRecord.query.filter_by(task_id=task_id).count() == 0
+    assert fail_abandoned_jobs() == []
+
+def test_failed_job_is_retried_with_exponential_backoff(schema, make_job, claim, monkeypatch):
+    monkeypatch.setitem(schema.config, 'JOB_RETRY_BACKOFF', 5)
+    job_id = make_job()
+    
+    for attempt, backoff in [(1, 5), (2, 10)]:
+        claimed, token = claim()
+        assert claimed == job_id
+        started = datetime.utcnow()
+        assert fail_job(job_id, token, f'error {attempt}')
+        
+        job = Job.query.get(job_id)
+        assert job.status == 'queued' and job.attempts == attempt
+        assert job.last_error == f'error {attempt}' and job.lease_token is None
+        delay = (job.available_at - started).total_seconds()
+        assert backoff - 1 < delay <= backoff + 1
+        # Not claimable before the backoff has passed
+        assert claim() == (None, None)
+        job.available_at = datetime.utcnow()
+        db.session.commit()
+    
+    claimed, token = claim()
+    assert not fail_job(job_id, token, 'error 3')
+    job = Job.query.get(job_id)
+    assert job.status == 'failed' and job.attempts == job.max_attempts == 3
+    assert claim() == (None, None)
+
+def test_lease_keeper_notices_a_lost_lease(schema, make_job, claim, monkeypatch):
+    monkeypatch.setitem(schema.config, 'JOB_LEASE_SECONDS', 1)
+    job_id = make_job()
+    _, token = claim()
+    
+    with LeaseKeeper(job_id, token) as lease:
+        lease.check()
+        # Another worker takes the job over
+        Job.query.filter_by(id=job_id).update({Job.lease_token: 'someone-else'})
+        db.session.commit()
+        assert lease.lost.wait(5)
+        with pytest.raises(LeaseLost):
+            lease.check()
+
+def test_process_task_stops_without_the_lease(schema, make_job, claim):
+    job_id = make_job()
+    task_id = Job.query.get(job_id).task_id
+    _, token = claim()
+    lease = LeaseKeeper(job_id, token)
+    lease.lost.set()
+    
+    with pytest.raises(LeaseLost):
+        process_task(task_id, lease=lease)
+    
+    assert Task.query.get(task_id).status != 'completed'
+    assert DataRecord.query.filter_by(task_id=task_id).count() == 0
+
+def test_stale_worker_leaves_the_new_holders_rows_alone(schema, make_job, claim, monkeypatch):
+    job_id = make_job()
+    task_id = Job.query.get(job_id).task_id
+    _, token = claim()
+    lease = LeaseKeeper(job_id, token)
+    
+    def taken_over_then_fail(filter_params, data_sources):
+        # Meanwhile the lease expires, another worker claims the job and stores rows...
+        Job.query.filter_by(id=job_id).update({Job.lease_token: 'new-holder'})
+        db.session.commit()
+        ingest_records(task_id, 'source_a', [{'category': 'Books', 'price': 1.0}] * 5)
+        # ...and this worker then fails with an ordinary error
+        raise RuntimeError('source unavailable')
+    monkeypatch.setattr(task_queue, 'fetch_sources', taken_over_then_fail)
+    
+    with pytest.raises(LeaseLost):
+        process_task(task_id, lease=lease)
+    
+    assert DataRecord.query.filter_by(task_id=task_id).count() == 5
+    assert Task.query.get(task_id).status == 'in_progress'
+
+def test_recovery_queues_one_job_per_stranded_task(schema, make_job, claim):
+    stranded = Task(name='stranded', filter_params={})
+    stranded.status = 'in_progress'
+    done = Task(name='done', filter_params={})
+    done.status = 'completed'
+    db.session.add_all([stranded, done])
+    db.session.commit()
+    queued_id = make_job()
+    
+    # Processes starting together each run the recovery
+    assert recover_jobs() == 1
+    assert recover_jobs() == 0
+    
+    assert Job.query.filter_by(task_id=stranded.id).count() == 1
+    assert Job.query.filter_by(task_id=done.id).count() == 0
+    assert Job.query.filter_by(task_id=Job.query.get(queued_id).task_id).count() == 1
+    assert Task.query.get(stranded.id).status == 'pending'
+    job = Job.query.filter_by(task_id=stranded.id).one()
+    assert job.status == 'queued' and job.attempts == 0 and job.max_attempts == 3
@@ -0,0 +1,26 @@
+from urllib.request import urlopen
+
+from app.services.metrics import render_metrics, serve_metrics
+
+def test_stage_timings_include_the_finalize_stage(client, create_task):
+    task_id = create_task({'num_records': 50, 'seed': 3})
+    timings = client.get(f'/api/tasks/{task_id}').get_json()['stage_timings']
+    assert {'fetch', 'build_rows', 'finalize'} <= set(timings)
+
+def test_metrics_endpoint_reports_tasks_and_served_rows(client, completed_task):
+    client.get(f'/api/tasks/{completed_task}/data?limit=5')
+    body = client.get('/api/metrics').get_data(as_text=True)
+    assert 'task_stage_duration_seconds_bucket{stage="finalize"' in body
+    assert 'http_rows_served_total' in body
+
+def test_worker_metrics_server_serves_the_process_metrics():
+    server = serve_metrics(0, host='127.0.0.1')
+    try:
+        with urlopen(f'http://127.0.0.1:{server.server_address[1]}/metrics') as response:
+            body = response.read().decode('utf-8')
+        assert response.status == 200
+        assert 'task_stage_duration_seconds' in body
+        assert body.splitlines()[0] == render_metrics().splitlines()[0]
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,47 @@
+from app import db
+from app.models.task import Task
+from app.services import task_queue
+from app.services.ingest import ingest_records
+from app.services.synthetic_data import generate_chunks, iter_records
+
+def test_progress_is_reported_per_source_and_batch(client, create_task, monkeypatch):
+    monkeypatch.setitem(client.application.config, 'INGEST_BATCH_SIZE', 40)
+    snapshots = []
+    publish = task_queue.publish_task_event
+    def record(task):
+        snapshots.append(task.to_dict())
+        publish(task)
+    monkeypatch.setattr(task_queue, 'publish_task_event', record)
+    
+    task_id = create_task({'num_records': 100, 'seed': 4, 'cache': False})
+    
+    stored = [event['progress']['source_a']['rows_stored']
+              for event in snapshots if event['progress'] and event['status'] == 'in_progress']
+    assert [count for count in dict.fromkeys(stored) if count] == [40, 80, 100]
+    progress = client.get(f'/api/tasks/{task_id}').get_json()['progress']
+    assert progress == {source: {'rows_fetched': 100, 'rows_stored': 100, 'done': True}
+                        for source in ('source_a', 'source_b')}
+
+def test_unfinished_task_serves_rows_only_on_request(client):
+    task_id = client.post('/api/tasks', json={'name': 'partial', 'filter_params': {'num_records': 50, 'seed': 1}}).get_json()['id']
+    task = Task.query.get(task_id)
+    task.status = 'in_progress'
+    db.session.commit()
+    ingest_records(task_id, 'source_a', iter_records(generate_chunks('source_a', {}, 50, seed=1)), batch_size=20)
+    
+    for endpoint in ('data', 'aggregates'):
+        refused = client.get(f'/api/tasks/{task_id}/{endpoint}')
+        assert refused.status_code == 409
+        assert 'partial=1' in refused.get_json()['message']
+    
+    rows = client.get(f'/api/tasks/{task_id}/data?partial=1').get_json()
+    assert rows['partial'] is True and len(rows['data']) == 50
+    aggregates = client.get(f'/api/tasks/{task_id}/aggregates?partial=true').get_json()
+    assert aggregates['partial'] is True and aggregates['summary']['record_count'] == 50
+    
+    # Partial responses are never cached: the next batch changes them
+    response = client.get(f'/api/tasks/{task_id}/data?partial=1')
+    assert response.headers['Cache-Control'] == 'no-cache' and 'ETag' not in response.headers
+
+def test_completed_task_reports_complete_results(client, completed_task):
+    assert client.get(f'/api/tasks/{completed_task}/data?partial=1&limit=5').get_json()['partial'] is False
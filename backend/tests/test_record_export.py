@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from app.services.record_export import RECORD_FIELDS
+
+@pytest.fixture(params=['sqlite', 'memory'])
+def serving(request, schema, monkeypatch):
+    """Run each test against SQLite and against the in-memory column store"""
+    monkeypatch.setitem(schema.config, 'HOT_CACHE_MAX_BYTES', 0 if request.param == 'sqlite' else 64 * 1024 * 1024)
+    return request.param
+
+def data(client, task_id, query):
+    response = client.get(f'/api/tasks/{task_id}/data?{query}')
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+def test_pages_walk_every_record_once_in_id_order(client, completed_task, serving):
+    full = data(client, completed_task, '')
+    assert full['next_cursor'] is None
+    
+    ids = []
+    cursor = None
+    while True:
+        page = data(client, completed_task, 'limit=75' + (f'&after={cursor}' if cursor else ''))
+        assert len(page['data']) <= 75
+        ids.extend(row['id'] for row in page['data'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+        assert cursor == ids[-1]
+    assert ids == [row['id'] for row in full['data']]
+    assert len(ids) == 400
+
+def test_fields_project_the_records(client, completed_task, serving):
+    full = data(client, completed_task, 'limit=10')['data']
+    projected = data(client, completed_task, 'limit=10&fields=brand,price')
+    assert projected['data'] == [{'brand': row['brand'], 'price': row['price']} for row in full]
+    assert set(full[0]) == set(RECORD_FIELDS)
+    # The cursor works even when the id is not projected
+    assert projected['next_cursor'] == full[-1]['id']
+
+def test_ndjson_streams_the_same_records(client, completed_task, serving):
+    response = client.get(f'/api/tasks/{completed_task}/data?format=ndjson&category=Books&after=50')
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    expected = data(client, completed_task, 'category=Books&after=50')['data']
+    assert lines == expected
+    assert all(row['id'] > 50 for row in lines)
+
+@pytest.mark.parametrize('query', ['fields=colour', 'limit=ten', 'after=abc', 'format=xml'])
+def test_bad_arguments_are_rejected(client, completed_task, query):
+    response = client.get(f'/api/tasks/{completed_task}/data?{query}')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Bad request'
@@ -0,0 +1,35 @@
+import pytest
+
+def all_rows(client, task_id, query=''):
+    response = client.get(f'/api/tasks/{task_id}/data?limit=10000&{query}')
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['data']
+
+@pytest.fixture
+def sql_only(schema, monkeypatch):
+    monkeypatch.setitem(schema.config, 'HOT_CACHE_MAX_BYTES', 0)
+
+FILTERS = [
+    ('category=Books', lambda row: row['category'] == 'Books'),
+    ('category=Books, Toys', lambda row: row['category'] in ('Books', 'Toys')),
+    ('platform=Online&source=source_a', lambda row: row['platform'] == 'Online' and row['source'] == 'source_a'),
+    ('year=2022', lambda row: row['purchase_date'].startswith('2022')),
+    ('year_from=2021&year_to=2022', lambda row: '2021' <= row['purchase_date'][:4] <= '2022'),
+    ('date_from=2022-03-01&date_to=2022-03-31', lambda row: '2022-03-01' <= row['purchase_date'][:10] <= '2022-03-31'),
+    ('category=No such category', lambda row: False),
+]
+
+@pytest.mark.parametrize('query, keep', FILTERS, ids=[query for query, _ in FILTERS])
+def test_filters_select_the_matching_records(client, completed_task, sql_only, query, keep):
+    everything = all_rows(client, completed_task)
+    assert all_rows(client, completed_task, query) == [row for row in everything if keep(row)]
+
+@pytest.mark.parametrize('query', ['year=last', 'date_from=03/01/2022', 'year_to=soon'])
+def test_malformed_dates_are_rejected(client, completed_task, query):
+    response = client.get(f'/api/tasks/{completed_task}/data?{query}')
+    assert response.status_code == 400
+
+def test_explain_uses_an_index(client, completed_task):
+    explained = client.get(f'/api/tasks/{completed_task}/data?category=Books&explain=1').get_json()
+    assert explained['query'].startswith('SELECT')
+    assert any('INDEX' in step for step in explained['plan'])
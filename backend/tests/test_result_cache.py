@@ -0,0 +1,56 @@
+from app import db
+from app.models.data_record import DataRecord
+from app.models.dataset_cache import DatasetCacheEntry
+from app.models.task import Task
+from app.services.result_cache import params_hash
+
+PARAMS = {'num_records': 100, 'seed': 5, 'year_from': 2021, 'data_sources': ['source_b', 'source_a']}
+
+def stored_rows(task_id):
+    return DataRecord.query.filter_by(task_id=task_id).count()
+
+def test_identical_task_reuses_the_dataset(client, create_task):
+    first = create_task(PARAMS)
+    # Same request spelled differently: string year, other source order, cache flag
+    second = create_task({**PARAMS, 'year_from': '2021', 'data_sources': ['source_a', 'source_b'], 'cache': True})
+    
+    detail = client.get(f'/api/tasks/{second}').get_json()
+    assert detail['status'] == 'completed'
+    assert detail['dataset_task_id'] == first
+    assert stored_rows(first) == 200
+    assert stored_rows(second) == 0
+    
+    first_page = client.get(f'/api/tasks/{first}/data?limit=50').get_json()
+    second_page = client.get(f'/api/tasks/{second}/data?limit=50').get_json()
+    assert [row['id'] for row in second_page['data']] == [row['id'] for row in first_page['data']]
+    
+    stats = client.get('/api/cache').get_json()
+    assert stats['hits'] >= 1 and stats['entries'] == 1
+
+def test_different_parameters_or_cache_false_fetch_fresh_data(client, create_task):
+    first = create_task(PARAMS)
+    other = create_task({**PARAMS, 'seed': 6})
+    fresh = create_task({**PARAMS, 'cache': False})
+    
+    for task_id in (other, fresh):
+        assert client.get(f'/api/tasks/{task_id}').get_json()['dataset_task_id'] is None
+        assert stored_rows(task_id) == 200
+    assert stored_rows(first) == 200
+
+def test_expired_entry_is_dropped_on_lookup(client, create_task, monkeypatch):
+    first = create_task(PARAMS)
+    monkeypatch.setitem(client.application.config, 'DATASET_CACHE_TTL', -1)
+    second = create_task(PARAMS)
+    
+    assert client.get(f'/api/tasks/{second}').get_json()['dataset_task_id'] is None
+    entry = DatasetCacheEntry.query.get(params_hash(PARAMS))
+    assert entry.task_id == second
+
+def test_failed_dataset_is_not_reused(client, create_task):
+    first = create_task(PARAMS)
+    Task.query.get(first).status = 'failed'
+    db.session.commit()
+    
+    second = create_task(PARAMS)
+    assert client.get(f'/api/tasks/{second}').get_json()['dataset_task_id'] is None
+    assert stored_rows(second) == 200
@@ -0,0 +1,75 @@
+import gzip
+import json
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.data_record import DataRecord
+from app.models.dataset_cache import DatasetCacheEntry
+from app.models.job import Job
+from app.models.task import Task
+from app.models.task_rollup import TaskRollup
+from app.services.retention import apply_retention
+
+PARAMS = {'num_records': 50, 'seed': 2}
+
+def age(task_id, days):
+    Task.query.get(task_id).created_at = datetime.utcnow() - timedelta(days=days)
+    db.session.commit()
+
+def remaining(model, task_id):
+    return model.query.filter_by(task_id=task_id).count()
+
+def test_old_finished_tasks_are_deleted_with_everything_they_own(create_task):
+    old = create_task(PARAMS)
+    new = create_task({**PARAMS, 'seed': 3})
+    age(old, 40)
+    
+    summary = apply_retention(days=30)
+    assert summary['tasks'] == 1
+    assert summary['records'] == 100
+    assert Task.query.get(old) is None
+    for model in (DataRecord, TaskRollup, Job, DatasetCacheEntry):
+        assert remaining(model, old) == 0
+    assert Task.query.get(new).status == 'completed'
+    assert remaining(DataRecord, new) == 100
+
+def test_owner_is_kept_while_a_newer_task_reads_its_dataset(create_task):
+    owner = create_task(PARAMS)
+    reader = create_task(PARAMS)
+    assert Task.query.get(reader).dataset_task_id == owner
+    age(owner, 40)
+    
+    assert apply_retention(days=30)['tasks'] == 0
+    assert remaining(DataRecord, owner) == 100
+    
+    # Once the reader expires too, both go
+    age(reader, 40)
+    assert apply_retention(days=30)['tasks'] == 2
+    assert Task.query.count() == 0
+
+def test_unfinished_tasks_are_never_expired(schema):
+    task = Task(name='queued', filter_params={})
+    task.created_at = datetime.utcnow() - timedelta(days=400)
+    db.session.add(task)
+    db.session.commit()
+    
+    assert apply_retention(days=30)['tasks'] == 0
+    assert Task.query.get(task.id) is not None
+
+def test_dry_run_only_counts(create_task):
+    old = create_task(PARAMS)
+    age(old, 40)
+    assert apply_retention(days=30, dry_run=True)['tasks'] == 1
+    assert remaining(DataRecord, old) == 100
+
+def test_archive_holds_the_task_and_its_records(create_task, tmp_path):
+    old = create_task(PARAMS)
+    age(old, 40)
+    
+    summary = apply_retention(days=30, archive_dir=str(tmp_path))
+    assert summary['archived'] == 1
+    with gzip.open(tmp_path / f'task_{old}.jsonl.gz', 'rt', encoding='utf-8') as archive:
+        lines = [json.loads(line) for line in archive]
+    assert lines[0]['id'] == old
+    assert len(lines) == 101
+    assert {record['source'] for record in lines[1:]} == {'source_a', 'source_b'}
@@ -0,0 +1,118 @@
+import pytest
+from sqlalchemy import event, inspect
+from app import db
+from app.models.data_record import DataRecord
+from app.models.task import Task
+from app.services.schema import upgrade_schema, migrate_text_dimensions
+
+# Tables as created by the first release: dimensions stored as text on every record
+LEGACY_TABLES = [
+    """CREATE TABLE task (
+        id INTEGER PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        status VARCHAR(20),
+        created_at DATETIME,
+        updated_at DATETIME,
+        filter_params TEXT NOT NULL
+    )""",
+    """CREATE TABLE data_record (
+        id INTEGER PRIMARY KEY,
+        task_id INTEGER NOT NULL REFERENCES task (id),
+        source VARCHAR(50) NOT NULL,
+        category VARCHAR(100),
+        brand VARCHAR(100),
+        price FLOAT,
+        purchase_date DATETIME,
+        quantity INTEGER,
+        rating FLOAT,
+        platform VARCHAR(50),
+        location VARCHAR(100),
+        payment_method VARCHAR(50),
+        product_id VARCHAR(20),
+        created_at DATETIME
+    )""",
+    "CREATE INDEX ix_legacy_source ON data_record (source)"
+]
+
+LEGACY_RECORDS = [
+    (10, 'source_a', 'Books', 'Penguin', 12.5, 'Online', 'Paris', 'Card', 'P-1'),
+    (11, 'source_b', 'Toys', 'Lego', 80.0, 'In-store', None, None, 'P-2'),
+    (12, 'source_a', 'Books', 'Lego', 9.99, 'Online', 'Oslo', 'Cash', None)
+]
+
+def create_legacy_database():
+    for statement in LEGACY_TABLES:
+        db.session.execute(db.text(statement))
+    db.session.execute(db.text(
+        "INSERT INTO task (id, name, status, created_at, updated_at, filter_params) "
+        "VALUES (1, 'legacy', 'completed', '2024-01-01 00:00:00', '2024-01-01 00:00:00', '{}')"))
+    for record in LEGACY_RECORDS:
+        db.session.execute(db.text(
+            "INSERT INTO data_record (id, task_id, source, category, brand, price, purchase_date, "
+            "quantity, platform, location, payment_method, product_id, created_at) "
+            "VALUES (:id, 1, :source, :category, :brand, :price, '2023-05-01 00:00:00', "
+            "2, :platform, :location, :payment_method, :product_id, '2024-01-01 00:00:00')"),
+            dict(zip(('id', 'source', 'category', 'brand', 'price', 'platform', 'location',
+                      'payment_method', 'product_id'), record)))
+    db.session.commit()
+
+def test_upgrade_migrates_legacy_text_dimensions(app):
+    create_legacy_database()
+    
+    upgrade_schema()
+    
+    columns = {column['name'] for column in inspect(db.engine).get_columns('data_record')}
+    assert 'source_id' in columns and 'category_id' in columns
+    assert 'source' not in columns and 'category' not in columns
+    assert not inspect(db.engine).has_table('data_record_legacy')
+    
+    records = {record.id: record.to_dict() for record in DataRecord.query.all()}
+    assert sorted(records) == [10, 11, 12]
+    for record_id, source, category, brand, price, platform, location, payment_method, product_id in LEGACY_RECORDS:
+        record = records[record_id]
+        assert record['task_id'] == 1
+        assert (record['source'], record['category'], record['brand']) == (source, category, brand)
+        assert (record['platform'], record['location'], record['payment_method']) == (platform, location, payment_method)
+        assert record['price'] == price and record['quantity'] == 2 and record['product_id'] == product_id
+    
+    # Each distinct value is stored once and shared by the records using it
+    assert DataRecord.query.filter_by(brand_id=DataRecord.query.get(11).brand_id).count() == 2
+    
+    # Columns added since the first release exist on the old task table
+    task = Task.query.get(1)
+    assert task.name == 'legacy' and task.status == 'completed'
+    task_columns = {column['name'] for column in inspect(db.engine).get_columns('task')}
+    assert {column.name for column in Task.__table__.columns} <= task_columns
+    
+    # The new indexes exist and the legacy index is gone
+    indexes = {index['name'] for index in inspect(db.engine).get_indexes('data_record')}
+    assert {index.name for index in DataRecord.__table__.indexes} <= indexes
+    assert 'ix_legacy_source' not in indexes
+
+def test_interrupted_migration_leaves_the_legacy_table_intact(app):
+    create_legacy_database()
+    
+    def crash(target, connection, **kw):
+        raise RuntimeError('killed while copying')
+    event.listen(DataRecord.__table__, 'after_create', crash)
+    try:
+        with pytest.raises(RuntimeError):
+            upgrade_schema()
+    finally:
+        event.remove(DataRecord.__table__, 'after_create', crash)
+    
+    # The rename was rolled back with the rest
+    columns = {column['name'] for column in inspect(db.engine).get_columns('data_record')}
+    assert 'source' in columns and 'source_id' not in columns
+    assert not inspect(db.engine).has_table('data_record_legacy')
+    assert db.session.execute(db.text('SELECT COUNT(*) FROM data_record')).scalar() == len(LEGACY_RECORDS)
+    
+    # The next start migrates it
+    upgrade_schema()
+    assert sorted(record.id for record in DataRecord.query.all()) == [10, 11, 12]
+
+def test_upgrade_is_idempotent(schema):
+    assert migrate_text_dimensions() is False
+    upgrade_schema()
+    columns = {column['name'] for column in inspect(db.engine).get_columns('data_record')}
+    assert columns == {column.name for column in DataRecord.__table__.columns}
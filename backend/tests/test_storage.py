@@ -0,0 +1,27 @@
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from app import app, db
+from app.storage import configure_storage, connection_pragmas
+
+def test_only_sqlite_databases_are_accepted():
+    other = Flask(__name__)
+    other.config['SQLALCHEMY_DATABASE_URI'] = 'postgresql://localhost/datasourcing'
+    with pytest.raises(RuntimeError, match='only SQLite'):
+        configure_storage(other)
+
+def test_new_connections_get_the_configured_pragmas(schema):
+    assert f"journal_mode={app.config['SQLITE_JOURNAL_MODE']}" in connection_pragmas
+    connection = db.engine.raw_connection()
+    try:
+        assert isinstance(connection.connection, sqlite3.Connection)
+        cursor = connection.cursor()
+        cursor.execute('PRAGMA busy_timeout')
+        assert cursor.fetchone()[0] == app.config['SQLITE_BUSY_TIMEOUT']
+        cursor.execute('PRAGMA journal_mode')
+        assert cursor.fetchone()[0].lower() == app.config['SQLITE_JOURNAL_MODE'].lower()
+        cursor.close()
+    finally:
+        connection.close()
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.data_source import BRANDS, make_record_filter
+from app.services.synthetic_data import generate_chunks, iter_records
+
+FILTERS = {'year_from': 2021, 'year_to': 2022, 'categories': ['Books', 'Toys'], 'companies': ['Lego', 'Penguin']}
+
+def records(source, filter_params, num_records, seed, chunk_size=1000):
+    return list(iter_records(generate_chunks(source, filter_params, num_records, seed=seed, chunk_size=chunk_size)))
+
+@pytest.mark.parametrize('source', ['source_a', 'source_b'])
+def test_same_seed_generates_the_same_rows(source):
+    first = records(source, {}, 2500, seed=42)
+    assert len(first) == 2500
+    assert records(source, {}, 2500, seed=42) == first
+    assert records(source, {}, 2500, seed=43) != first
+
+def test_chunks_are_bounded_and_sources_differ():
+    sizes = [len(chunk['price']) for chunk in generate_chunks('source_a', {}, 2500, seed=1, chunk_size=1000)]
+    assert sizes == [1000, 1000, 500]
+    assert records('source_a', {}, 100, seed=1) != records('source_b', {}, 100, seed=1)
+
+@pytest.mark.parametrize('source', ['source_a', 'source_b'])
+def test_generated_rows_pass_the_task_filters(source):
+    rows = records(source, FILTERS, 1000, seed=3)
+    assert len(rows) == 1000
+    predicate = make_record_filter(FILTERS)
+    assert all(predicate(row) for row in rows)
+    assert all(isinstance(row['purchase_date'], datetime) for row in rows)
+
+def test_source_profiles_shape_the_rows():
+    online = records('source_a', {}, 500, seed=5)
+    store = records('source_b', {}, 500, seed=5)
+    assert {row['platform'] for row in online} == {'Online'}
+    assert {row['platform'] for row in store} == {'Store'}
+    assert all(row['location'] is None and 1 <= row['rating'] <= 5 for row in online)
+    assert all(row['rating'] is None and row['location'] for row in store)
+    assert all(1 <= row['quantity'] <= 3 for row in store)
+    for row in online:
+        assert row['brand'] in BRANDS[row['category']]
+
+def test_filters_matching_nothing_generate_nothing():
+    assert records('source_a', {'categories': ['Books'], 'companies': ['Nike']}, 100, seed=1) == []
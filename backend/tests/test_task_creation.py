@@ -0,0 +1,36 @@
+import pytest
+
+from app.models.job import Job
+from app.models.task import Task
+
+@pytest.mark.parametrize('filter_params, message', [
+    ([1], 'filter_params must be a JSON object'),
+    ({'data_sources': 'source_a'}, 'data_sources must be a list'),
+    ({'data_sources': ['source_a', 'nope']}, 'Unknown data source: nope'),
+    ({'num_records': 'abc'}, 'num_records must be an integer'),
+    ({'num_records': 0}, 'num_records must be an integer'),
+    ({'num_records': 10 ** 9}, 'num_records must be an integer'),
+    ({'num_records': 2.5}, 'num_records must be an integer'),
+    ({'seed': 'abc'}, 'seed must be an integer'),
+    ({'year_from': 'last year'}, 'year_from must be a year'),
+])
+def test_invalid_filter_params_are_rejected(client, filter_params, message):
+    for url, body in (('/api/tasks', {'filter_params': filter_params}),
+                      ('/api/tasks/batch', {'tasks': [{'filter_params': filter_params}]})):
+        response = client.post(url, json=body)
+        assert response.status_code == 400
+        assert message in response.get_json()['message']
+    assert Task.query.count() == 0 and Job.query.count() == 0
+
+def test_valid_task_is_queued(client):
+    response = client.post('/api/tasks', json={'name': 'ok', 'filter_params': {
+        'data_sources': ['source_b'], 'num_records': '100', 'seed': 3, 'year_from': '2022', 'year_to': 2023
+    }})
+    assert response.status_code == 201
+    task = response.get_json()
+    assert task['status'] == 'pending' and task['priority'] == 0
+    assert Job.query.filter_by(task_id=task['id']).one().status == 'queued'
+
+@pytest.mark.parametrize('body', [[1, 2], 'text', {'filter_params': {}, 'priority': 'high'}])
+def test_malformed_body_is_rejected(client, body):
+    assert client.post('/api/tasks', json=body).status_code == 400
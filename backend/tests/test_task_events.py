@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from app.models.task import Task
+from app.services import task_events
+from app.services.task_events import subscribe, unsubscribe, event_stream
+from app.services.task_queue import process_task
+
+@pytest.fixture(autouse=True)
+def fresh_events(schema):
+    """Task ids restart with every test database, so forget what was pushed before"""
+    task_events.last_published.clear()
+    yield
+    with task_events.subscribers_lock:
+        task_events.subscribers.clear()
+
+def parse(stream):
+    return [json.loads(chunk[len('data: '):]) for chunk in stream if chunk.startswith('data: ')]
+
+def create(client, **filter_params):
+    response = client.post('/api/tasks', json={'name': 'events', 'filter_params': {'num_records': 50, **filter_params}})
+    return response.get_json()['id']
+
+def test_task_stream_follows_the_task_until_it_completes(client):
+    task_id = create(client, seed=1)
+    subscription = subscribe(task_id)
+    initial = Task.query.get(task_id).to_dict()
+    process_task(task_id)
+    
+    events = parse(event_stream(subscription, initial))
+    unsubscribe(subscription)
+    statuses = [event['status'] for event in events]
+    assert statuses[0] == 'pending' and statuses[-1] == 'completed'
+    assert 'in_progress' in statuses
+    assert all(event['id'] == task_id for event in events)
+    # Ingest progress is pushed on the per-task stream
+    assert any(event['progress'] for event in events if event['status'] == 'in_progress')
+
+def test_all_tasks_stream_gets_creations_and_status_changes_only(client):
+    subscription = subscribe()
+    task_id = create(client, seed=2)
+    process_task(task_id)
+    unsubscribe(subscription)
+    
+    events = []
+    while not subscription.events.empty():
+        events.append(subscription.events.get())
+    assert [event['status'] for event in events] == ['pending', 'in_progress', 'completed']
+
+def test_stream_of_a_finished_task_ends_after_its_state(client):
+    task_id = create(client, seed=3)
+    process_task(task_id)
+    
+    response = client.get(f'/api/tasks/{task_id}/events')
+    assert response.mimetype == 'text/event-stream'
+    body = response.get_data(as_text=True)
+    assert body.startswith(': connected')
+    assert [event['status'] for event in parse(body.split('\n\n'))] == ['completed']
+
+def test_stream_of_an_unknown_task_is_404(client):
+    assert client.get('/api/tasks/999/events').status_code == 404
+    assert not task_events.subscribers
@@ -0,0 +1,53 @@
+from app import db
+from app.models.task import Task
+
+def add_tasks(*names_and_statuses):
+    tasks = []
+    for name, status in names_and_statuses:
+        task = Task(name=name, filter_params={})
+        task.status = status
+        tasks.append(task)
+    db.session.add_all(tasks)
+    db.session.commit()
+    return [task.id for task in tasks]
+
+def test_pages_follow_the_cursor_newest_first(client):
+    ids = add_tasks(*[(f'task {i}', 'pending') for i in range(5)])
+    
+    seen = []
+    cursor = None
+    while True:
+        query = '/api/tasks?limit=2' + (f'&after={cursor}' if cursor else '')
+        page = client.get(query).get_json()
+        assert len(page['tasks']) <= 2
+        seen.extend(task['id'] for task in page['tasks'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert seen == sorted(ids, reverse=True)
+
+def test_status_and_name_filters_apply_to_list_and_summary(client):
+    add_tasks(('Daily sales', 'completed'), ('daily returns', 'failed'), ('Weekly sales', 'completed'))
+    
+    listed = client.get('/api/tasks?status=completed&name=DAILY').get_json()['tasks']
+    assert [task['name'] for task in listed] == ['Daily sales']
+    
+    summary = client.get('/api/tasks/summary?name=daily').get_json()
+    assert summary['total'] == 2
+    assert summary['counts']['completed'] == 1 and summary['counts']['failed'] == 1
+
+def test_like_wildcards_in_the_name_are_literal(client):
+    add_tasks(('100% done', 'completed'), ('1000 rows', 'completed'))
+    listed = client.get('/api/tasks?name=0%25').get_json()['tasks']
+    assert [task['name'] for task in listed] == ['100% done']
+
+def test_bad_listing_arguments_are_rejected(client):
+    for query in ('limit=abc', 'limit=1.5', 'after=yesterday', 'status=done'):
+        response = client.get(f'/api/tasks?{query}')
+        assert response.status_code == 400, query
+        assert response.get_json()['error'] == 'Bad request'
+
+def test_limit_is_clamped_to_the_page_bounds(client):
+    add_tasks(*[(f'task {i}', 'pending') for i in range(3)])
+    assert len(client.get('/api/tasks?limit=0').get_json()['tasks']) == 1
+    assert len(client.get('/api/tasks?limit=').get_json()['tasks']) == 3
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from app.models.data_record import DataRecord
+from app.models.task import Task
+from app.services.http_cache import body_cache
+from app.services.hot_cache import hot_cache
+from app.services.synthetic_data import generate_chunks
+
+# Several generated chunks per source (see small_chunks)
+NUM_RECORDS = 5000
+CHUNK_SIZE = 2000
+
+PAGES = ['limit=5', 'limit=50&after=4990', 'limit=100&category=Books&after=1000',
+         'limit=7&source=source_b', 'limit=10&year=2023&platform=Online&after=7000']
+AGGREGATES = ['', 'platform=Online&year=2022', 'category=Books,Electronics',
+              'source=source_b&date_from=2021-03-01&date_to=2021-06-30']
+
+def without_task(row):
+    return {key: value for key, value in row.items() if key not in ('task', 'task_id', 'created_at')}
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    """
+    Generate small chunks so a few thousand rows span several of them. The
+    chunk size changes the generated rows, but both tasks use the same one.
+    """
+    seed, _ = generate_chunks.__defaults__
+    monkeypatch.setattr(generate_chunks, '__defaults__', (seed, CHUNK_SIZE))
+
+@pytest.fixture
+def stored_and_virtual(create_task, small_chunks):
+    """A stored task and a virtual task with the same parameters and seed"""
+    stored = create_task({'num_records': NUM_RECORDS, 'seed': 9, 'cache': False})
+    virtual = create_task({'num_records': NUM_RECORDS, 'seed': 9, 'virtual': True})
+    return stored, virtual
+
+@pytest.mark.parametrize('budget', [256 * 1024 * 1024, 1024], ids=['in memory', 'chunked'])
+def test_virtual_task_serves_the_rows_of_the_stored_task(schema, client, stored_and_virtual, monkeypatch, budget):
+    stored, virtual = stored_and_virtual
+    assert DataRecord.query.filter_by(task_id=virtual).count() == 0
+    monkeypatch.setitem(schema.config, 'HOT_CACHE_MAX_BYTES', budget)
+    hot_cache.clear()
+    body_cache.clear()
+    
+    def page(task_id, query):
+        body = client.get(f'/api/tasks/{task_id}/data?{query}').get_json()
+        return [without_task(row) for row in body['data']], body['next_cursor']
+    
+    def aggregates(task_id, query):
+        return without_task(client.get(f'/api/tasks/{task_id}/aggregates?{query}').get_json())
+    
+    def ndjson(task_id):
+        lines = client.get(f'/api/tasks/{task_id}/data?format=ndjson&category=Books').get_data(as_text=True)
+        return [without_task(json.loads(line)) for line in lines.splitlines()]
+    
+    for query in PAGES:
+        assert page(virtual, query) == page(stored, query), query
+    for query in AGGREGATES:
+        assert aggregates(virtual, query) == aggregates(stored, query), query
+    assert ndjson(virtual) == ndjson(stored)
+    
+    # Kept in memory only when it fits
+    assert (virtual in hot_cache.stats()['tasks']) == (budget > 1024)
+
+def test_virtual_task_larger_than_the_hot_cache_is_accepted(schema, client, monkeypatch):
+    monkeypatch.setitem(schema.config, 'HOT_CACHE_MAX_BYTES', 1024)
+    response = client.post('/api/tasks', json={'name': 'large', 'filter_params': {'num_records': 10 ** 6, 'virtual': True}})
+    assert response.status_code == 201
+
+@pytest.mark.parametrize('seed', ['abc', -1, 2 ** 31, 1.5, True, [1]])
+def test_invalid_seed_is_rejected(client, seed):
+    response = client.post('/api/tasks', json={'filter_params': {'num_records': 10, 'virtual': True, 'seed': seed}})
+    assert response.status_code == 400
+    assert response.get_json()['message'].startswith('seed must be an integer')
+
+def test_seed_is_pinned(client):
+    given = client.post('/api/tasks', json={'filter_params': {'num_records': 10, 'virtual': True, 'seed': '42'}})
+    picked = client.post('/api/tasks', json={'filter_params': {'num_records': 10, 'virtual': True}})
+    
+    assert given.get_json()['filter_params']['seed'] == 42
+    assert isinstance(picked.get_json()['filter_params']['seed'], int)
+
+def test_virtual_tasks_need_simulated_sources(client):
+    for filter_params in ({'virtual': True}, {'virtual': True, 'num_records': 10, 'data_sources': ['source_c']}):
+        response = client.post('/api/tasks', json={'filter_params': filter_params})
+        assert response.status_code == 400
+    assert Task.query.count() == 0
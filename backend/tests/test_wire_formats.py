@@ -0,0 +1,73 @@
+import gzip
+import io
+import json
+
+import pytest
+
+from app.services import compression
+from app.services.compression import accepted_encodings, choose_encoding
+
+def page(client, task_id, query, **headers):
+    response = client.get(f'/api/tasks/{task_id}/data?{query}', headers=headers)
+    assert response.status_code == 200
+    return response
+
+def decode_column(column):
+    if isinstance(column, dict):
+        return [None if code is None else column['dictionary'][code] for code in column['codes']]
+    return column
+
+def test_columnar_decodes_to_the_json_rows(client, completed_task):
+    rows = page(client, completed_task, 'limit=60').get_json()
+    columnar = page(client, completed_task, 'limit=60&format=columnar').get_json()
+    assert columnar['count'] == 60 and columnar['next_cursor'] == rows['next_cursor']
+    
+    columns = {field: decode_column(column) for field, column in columnar['columns'].items()}
+    assert isinstance(columnar['columns']['category'], dict)
+    assert isinstance(columnar['columns']['price'], list)
+    assert [dict(zip(columns, values)) for values in zip(*columns.values())] == rows['data']
+
+@pytest.mark.parametrize('output_format', ['arrow', 'parquet'])
+def test_binary_formats_hold_the_same_rows(client, completed_task, output_format):
+    pyarrow = pytest.importorskip('pyarrow')
+    import pyarrow.parquet
+    
+    rows = page(client, completed_task, 'limit=30&fields=id,category,price').get_json()
+    response = page(client, completed_task, f'limit=30&fields=id,category,price&format={output_format}')
+    assert response.headers['X-Next-Cursor'] == str(rows['next_cursor'])
+    
+    buffer = io.BytesIO(response.get_data())
+    if output_format == 'arrow':
+        table = pyarrow.ipc.open_stream(buffer).read_all()
+    else:
+        table = pyarrow.parquet.read_table(buffer)
+    assert table.to_pylist() == rows['data']
+
+def test_large_bodies_are_gzipped_and_small_ones_are_not(client, completed_task):
+    large = page(client, completed_task, 'limit=200', **{'Accept-Encoding': 'gzip'})
+    assert large.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in large.headers['Vary']
+    plain = page(client, completed_task, 'limit=200').get_data()
+    assert gzip.decompress(large.get_data()) == plain
+    assert len(large.get_data()) < len(plain) / 3
+    
+    small = page(client, completed_task, 'limit=1&fields=id', **{'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+
+def test_ndjson_streams_are_not_compressed(client, completed_task):
+    response = page(client, completed_task, 'format=ndjson', **{'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert len(response.get_data(as_text=True).splitlines()) == 400
+
+def test_brotli_is_preferred_when_available(client, completed_task):
+    brotli = pytest.importorskip('brotli')
+    response = page(client, completed_task, 'limit=200', **{'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(response.get_data()))['data']
+
+def test_encoding_negotiation(monkeypatch):
+    assert accepted_encodings('gzip;q=0, br , deflate;q=0.5') == {'br', 'deflate'}
+    monkeypatch.setattr(compression, 'brotli', None)
+    assert choose_encoding('br, gzip') == 'gzip'
+    assert choose_encoding('br') is None
+    assert choose_encoding(None) is None
@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+from app.services import task_queue
+from app.services.task_queue import start_workers, get_queue_stats
+
+@pytest.fixture
+def idle_workers(app, monkeypatch):
+    """Worker threads that run a stand-in loop until released, in an empty pool"""
+    release = threading.Event()
+    monkeypatch.setattr(task_queue, 'workers', [])
+    monkeypatch.setattr(task_queue, 'process_tasks', lambda: release.wait(10))
+    yield release
+    release.set()
+    for worker in task_queue.workers:
+        worker.join(5)
+
+def test_pool_starts_the_configured_number_of_workers(app, idle_workers, monkeypatch):
+    monkeypatch.setitem(app.config, 'WORKER_COUNT', 3)
+    start_workers()
+    start_workers()
+    assert len(task_queue.workers) == 3
+    assert all(worker.is_alive() and worker.daemon for worker in task_queue.workers)
+    assert len({worker.name for worker in task_queue.workers}) == 3
+
+def test_dead_workers_are_replaced(app, idle_workers, monkeypatch):
+    monkeypatch.setitem(app.config, 'WORKER_COUNT', 2)
+    start_workers()
+    idle_workers.set()
+    for worker in task_queue.workers:
+        worker.join(5)
+    
+    idle_workers.clear()
+    start_workers()
+    assert len(task_queue.workers) == 2
+    assert all(worker.is_alive() for worker in task_queue.workers)
+
+def test_queue_stats_count_jobs_and_workers(client, make_job, claim, idle_workers, monkeypatch):
+    monkeypatch.setitem(client.application.config, 'WORKER_COUNT', 2)
+    start_workers()
+    make_job()
+    make_job()
+    claim()
+    
+    stats = client.get('/api/queue').get_json()
+    assert stats == get_queue_stats()
+    assert stats['queue_depth'] == 1
+    assert stats['running_jobs'] == 1
+    assert stats['failed_jobs'] == 0
+    assert stats['worker_count'] == 2 and stats['running_workers'] == 2
@@ -0,0 +1,61 @@
+import argparse
+import multiprocessing
+import time
+from app import app, db
+from app.storage import dispose_engines
+from app.startup import prepare_database
+from app.services.task_queue import start_workers
+from app.services.metrics import serve_metrics
+
+# Seconds between checks that every worker thread is still alive
+SUPERVISE_INTERVAL = 30
+
+def run_worker(threads, metrics_port=None):
+    """
+    Run a pool of worker threads in this process, claiming jobs from the job table.
+    With metrics_port, the process's metrics are served on that port.
+    """
+    app.config['WORKER_COUNT'] = threads
+    if metrics_port:
+        serve_metrics(metrics_port)
+        print(f"Serving worker metrics on port {metrics_port}")
+    
+    # Never reuse SQLite connections inherited from the parent process
+    with app.app_context():
+        dispose_engines(app, db)
+    
+    start_workers()
+    while True:
+        time.sleep(SUPERVISE_INTERVAL)
+        start_workers()
+
+def main():
+    parser = argparse.ArgumentParser(description='Standalone task worker')
+    parser.add_argument('--threads', type=int, default=app.config['WORKER_COUNT'],
+                        help='worker threads per process')
+    parser.add_argument('--processes', type=int, default=1,
+                        help='worker processes to start')
+    parser.add_argument('--metrics-port', type=int, default=app.config['WORKER_METRICS_PORT'],
+                        help='serve Prometheus metrics on this port (process N uses port + N - 1)')
+    args = parser.parse_args()
+    
+    prepare_database()
+    
+    if args.processes <= 1:
+        run_worker(args.threads, args.metrics_port)
+        return
+    
+    processes = [
+        multiprocessing.Process(target=run_worker,
+                                args=(args.threads, args.metrics_port and args.metrics_port + i),
+                                name=f"task-worker-process-{i + 1}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    print(f"Started {len(processes)} worker processes with {args.threads} threads each")
+    for process in processes:
+        process.join()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,15 @@
+"""
+Entry point for production WSGI servers:
+
+    gunicorn --workers 2 wsgi:app
+
+(`import app` finds the app/ package rather than app.py, so app.py cannot be
+used as `app:app`.) Loading this module prepares the database and starts the
+task worker threads of the server process.
+"""
+from app import app
+from app.startup import prepare_database
+from app.services.task_queue import start_workers
+
+prepare_database()
+start_workers()
@@ -0,0 +1,53 @@
+import React from 'react';
+
+// Display names of the built-in data sources
+const SOURCE_NAMES = {
+  source_a: 'Online Store (JSON)',
+  source_b: 'Physical Store (CSV)'
+};
+
+function TaskProgress({ task }) {
+  const sources = Object.entries(task.progress || {});
+
+  // Real progress once some sources report their size, otherwise the status placeholder
+  const known = sources.filter(([_, entry]) => entry.done || entry.rows_fetched > entry.rows_stored);
+  const fetched = sources.reduce((total, [_, entry]) => total + entry.rows_fetched, 0);
+  const stored = sources.reduce((total, [_, entry]) => total + entry.rows_stored, 0);
+  const width = task.status === 'pending' ? '30%' :
+                task.status === 'in_progress' && known.length === sources.length && fetched > 0
+                  ? `${Math.round((stored / fetched) * 100)}%` :
+                task.status === 'in_progress' ? '70%' : '100%';
+
+  return (
+    <div className="card">
+      <p>Waiting for task to complete...</p>
+      <p>Current status: <strong>{task.status}</strong></p>
+      <div className="progress-bar">
+        <div
+          className={`progress-value progress-${task.status}`}
+          style={{ width }}
+        ></div>
+      </div>
+      {sources.length > 0 && (
+        <ul>
+          {sources.map(([source, entry]) => (
+            <li key={source}>
+              {SOURCE_NAMES[source] || source}: {entry.rows_stored.toLocaleString()} rows stored
+              {entry.done ? ' (done)' : entry.rows_fetched > entry.rows_stored
+                ? ` of ${entry.rows_fetched.toLocaleString()}` : ''}
+            </li>
+          ))}
+        </ul>
+      )}
+      <p className="status-message">
+        {task.status === 'pending' ?
+          'Task is queued and will begin processing shortly...' :
+          stored > 0 ?
+            'Task is being processed. The charts below show the records stored so far and refresh as more arrive...' :
+            'Task is being processed. Retrieving data from selected sources...'}
+      </p>
+    </div>
+  );
+}
+
+export default TaskProgress;
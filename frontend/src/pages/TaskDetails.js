@@ -1,18 +1,26 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { useParams, Link } from 'react-router-dom';
-import { fetchTask, fetchTaskData } from '../services/api';
+import { fetchTask, fetchTaskDataColumnar, fetchTaskAggregates, subscribeToTask } from '../services/api';
 import * as d3 from 'd3';
 import Loader from '../components/Loader';
 import ErrorMessage from '../components/ErrorMessage';
 import StatusBadge from '../components/StatusBadge';
+import TaskProgress from '../components/TaskProgress';
 
 // Product categories for filtering
 const PRODUCT_CATEGORIES = ['Electronics', 'Clothing', 'Home & Kitchen', 'Beauty', 'Books', 'Sports', 'Toys'];
 
+// Number of records shown in the data table
+const TABLE_PAGE_SIZE = 100;
+
+// How often partial results are refreshed while a task is in progress (ms)
+const PARTIAL_REFRESH_INTERVAL = 3000;
+
 function TaskDetails() {
   const { taskId } = useParams();
   const [task, setTask] = useState(null);
   const [taskData, setTaskData] = useState({ data: [] });
+  const [aggregates, setAggregates] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [filters, setFilters] = useState({
@@ -27,16 +35,14 @@ function TaskDetails() {
   const barChart1Ref = useRef(null);
   const barChart2Ref = useRef(null);
 
-  // Fetch task details and data
+  // Fetch task details, then follow status changes pushed by the server
   useEffect(() => {
-    let intervalId;
     let isMounted = true; // Add flag to prevent state updates after unmount
+    let unsubscribe = null;
     
     const loadTaskDetails = async () => {
-      if (!isMounted) return;
-      
       try {
-        if (isMounted) setLoading(true);
+        setLoading(true);
         
         // Fetch the task details
         const taskDetails = await fetchTask(taskId);
@@ -44,24 +50,15 @@ function TaskDetails() {
         // Only update state if component is still mounted
         if (!isMounted) return;
         
-        // Only update state if data actually changed to prevent re-renders
-        if (!task || task.status !== taskDetails.status) {
-          setTask(taskDetails);
-        }
+        setTask(taskDetails);
+        setError(null);
         
-        // If task is completed, fetch the data (only once)
-        if (taskDetails.status === 'completed' && (!taskData.data || taskData.data.length === 0)) {
-          const data = await fetchTaskData(taskId);
-          if (isMounted) setTaskData(data);
-          
-          // If task is completed, clear the interval
-          if (intervalId) {
-            clearInterval(intervalId);
-            intervalId = null;
-          }
+        // Subscribe to status pushes until the task finishes
+        if (taskDetails.status !== 'completed' && taskDetails.status !== 'failed') {
+          unsubscribe = subscribeToTask(taskId, (update) => {
+            if (isMounted) setTask(update);
+          });
         }
-        
-        if (isMounted) setError(null);
       } catch (err) {
         if (isMounted) {
           setError('Failed to load task details. Please try again later.');
@@ -72,113 +69,93 @@ function TaskDetails() {
       }
     };
     
-    // Initial data load
     loadTaskDetails();
     
-    // Set up polling - will be cleared once task is completed
-    intervalId = setInterval(() => {
-      loadTaskDetails();
-    }, 2000); // Poll every 2 seconds
-    
     // Cleanup function
     return () => {
       isMounted = false;
-      if (intervalId) {
-        clearInterval(intervalId);
+      if (unsubscribe) {
+        unsubscribe();
       }
     };
   }, [taskId]); // Only depend on taskId which is stable
 
-  // Apply filters to the data
-  const filteredData = React.useMemo(() => {
-    if (!taskData.data) return [];
-    
-    return taskData.data.filter((record) => {
-      // Apply category filter
-      if (filters.category && record.category !== filters.category) {
-        return false;
-      }
-      
-      // Apply brand filter
-      if (filters.brand && record.brand !== filters.brand) {
-        return false;
-      }
-      
-      // Apply platform filter
-      if (filters.platform && record.platform !== filters.platform) {
-        return false;
-      }
-      
-      // Apply year filter
-      if (filters.year && new Date(record.purchase_date).getFullYear() !== parseInt(filters.year, 10)) {
-        return false;
-      }
-      
-      return true;
-    });
-  }, [taskData, filters]);
+  // Rows stored so far by an in-progress task (committed batch by batch)
+  const isCompleted = task && task.status === 'completed';
+  const isInProgress = task && task.status === 'in_progress';
+  const storedRows = task && task.progress
+    ? Object.values(task.progress).reduce((total, entry) => total + entry.rows_stored, 0)
+    : 0;
+  const showPartial = isInProgress && storedRows > 0;
+
+  // While the task runs, refresh the partial results every few seconds
+  const [refreshTick, setRefreshTick] = useState(0);
+  useEffect(() => {
+    if (!showPartial) return;
+    const timer = setInterval(() => setRefreshTick(tick => tick + 1), PARTIAL_REFRESH_INTERVAL);
+    return () => clearInterval(timer);
+  }, [showPartial]);
+
+  // Fetch server-side aggregates and the first page of filtered records whenever the filters change
+  useEffect(() => {
+    if (!isCompleted && !showPartial) return;
+    let isMounted = true;
+    const params = isCompleted ? filters : { ...filters, partial: 1 };
+    
+    Promise.all([
+      fetchTaskAggregates(taskId, params),
+      fetchTaskDataColumnar(taskId, { ...params, limit: TABLE_PAGE_SIZE })
+    ])
+      .then(([aggregateResult, dataResult]) => {
+        if (!isMounted) return;
+        setAggregates(aggregateResult);
+        setTaskData(dataResult);
+      })
+      .catch(err => console.error(err));
+    
+    return () => {
+      isMounted = false;
+    };
+  }, [taskId, isCompleted, showPartial, filters, refreshTick]);
+
+  // Records are filtered on the server
+  const filteredData = taskData.data || [];
 
-  // Get unique brands from data for filtering
-  const uniqueBrands = React.useMemo(() => {
-    if (!taskData.data) return [];
-    return [...new Set(taskData.data.map(record => record.brand))].filter(Boolean).sort();
-  }, [taskData]);
+  // Brands available in this task (computed by the server)
+  const uniqueBrands = aggregates ? aggregates.brands : [];
 
-  // Add this line after the filteredData useMemo to memoize chart data
+  // Map the server-side aggregates into the shapes the charts expect
   const chartData = React.useMemo(() => {
-    if (!filteredData.length) return { 
+    if (!aggregates) return { 
       timeSeriesData: [], 
       categorySalesData: [], 
       platformData: [] 
     };
     
-    // For time series chart
-    const parseDate = d3.timeParse('%Y-%m-%d');
-    const dateData = filteredData.map(d => ({
-      ...d,
-      date: parseDate(d.purchase_date.split('T')[0])
-    }));
-    
     // Time series data - sales by month
-    const monthData = d3.rollup(
-      dateData,
-      v => d3.sum(v, d => d.price * d.quantity),
-      d => d3.timeMonth(d.date)
-    );
+    const parseMonth = d3.timeParse('%Y-%m');
+    const timeSeriesData = aggregates.monthly_sales.map(d => ({
+      date: parseMonth(d.month),
+      sales: d.sales
+    }));
     
-    const timeSeriesData = Array.from(monthData, ([date, sales]) => ({ date, sales }))
-      .sort((a, b) => a.date - b.date);
-      
     // Category data - sales by category
-    const categoryData = d3.rollup(
-      filteredData,
-      v => d3.sum(v, d => d.price * d.quantity),
-      d => d.category
-    );
+    const categorySalesData = aggregates.category_sales.map(d => ({
+      category: d.category,
+      totalSales: d.total_sales
+    }));
     
-    const categorySalesData = Array.from(categoryData, ([category, totalSales]) => ({ category, totalSales }))
-      .sort((a, b) => b.totalSales - a.totalSales);
-      
     // Platform comparison data
-    const platformData = Array.from(
-      d3.rollup(
-        filteredData,
-        v => ({
-          totalSales: d3.sum(v, d => d.price * d.quantity),
-          avgOrderValue: d3.mean(v, d => d.price * d.quantity),
-          totalItems: d3.sum(v, d => d.quantity),
-          orderCount: v.length
-        }),
-        d => d.platform
-      ),
-      ([platform, metrics]) => ({
-        platform,
-        ...metrics
-      })
-    );
+    const platformData = aggregates.platforms.map(d => ({
+      platform: d.platform,
+      totalSales: d.total_sales,
+      avgOrderValue: d.avg_order_value,
+      totalItems: d.total_items,
+      orderCount: d.order_count
+    }));
     
     return { timeSeriesData, categorySalesData, platformData };
-  }, [filteredData]);
+  }, [aggregates]);
 
   // Update Time Series Chart (First Chart)
   useEffect(() => {
@@ -664,8 +641,12 @@ function TaskDetails() {
         </div>
       </div>
       
-      {task.status === 'completed' && taskData.data && taskData.data.length > 0 ? (
+      {isCompleted && !aggregates ? (
+        <Loader />
+      ) : (isCompleted || showPartial) && aggregates && aggregates.summary.task_record_count > 0 ? (
         <div>
+          {!isCompleted && <TaskProgress task={task} />}
+          
           <div className="filters card">
             <h2>Data Filters</h2>
             <div className="filter-controls">
@@ -734,10 +715,10 @@ function TaskDetails() {
             </div>
             
             <div className="data-summary">
-              <p><strong>Records Found:</strong> {filteredData.length}</p>
-              <p><strong>Online Store Records:</strong> {filteredData.filter(d => d.source === 'source_a').length}</p>
-              <p><strong>Physical Store Records:</strong> {filteredData.filter(d => d.source === 'source_b').length}</p>
-              <p><strong>Total Value:</strong> ${filteredData.reduce((sum, item) => sum + (item.price * item.quantity), 0).toLocaleString()}</p>
+              <p><strong>Records Found:</strong> {aggregates.summary.record_count}</p>
+              <p><strong>Online Store Records:</strong> {aggregates.summary.source_counts.source_a || 0}</p>
+              <p><strong>Physical Store Records:</strong> {aggregates.summary.source_counts.source_b || 0}</p>
+              <p><strong>Total Value:</strong> ${aggregates.summary.total_sales.toLocaleString()}</p>
             </div>
           </div>
           
@@ -779,7 +760,7 @@ function TaskDetails() {
                   </tr>
                 </thead>
                 <tbody>
-                  {filteredData.slice(0, 100).map((record, index) => (
+                  {filteredData.map((record, index) => (
                     <tr key={index}>
                       <td>{record.source === 'source_a' ? 'Online' : 'Store'}</td>
                       <td>{record.category}</td>
@@ -795,8 +776,8 @@ function TaskDetails() {
                   ))}
                 </tbody>
               </table>
-              {filteredData.length > 100 && (
-                <div className="table-note">Showing first 100 records of {filteredData.length} total</div>
+              {aggregates.summary.record_count > filteredData.length && (
+                <div className="table-note">Showing first {filteredData.length} records of {aggregates.summary.record_count} total</div>
               )}
             </div>
           </div>
@@ -806,24 +787,7 @@ function TaskDetails() {
           <p>No data available for this task. The filters may be too restrictive.</p>
         </div>
       ) : (
-        <div className="card">
-          <p>Waiting for task to complete...</p>
-          <p>Current status: <strong>{task.status}</strong></p>
-          <div className="progress-bar">
-            <div 
-              className={`progress-value progress-${task.status}`}
-              style={{ 
-                width: task.status === 'pending' ? '30%' : 
-                       task.status === 'in_progress' ? '70%' : '100%' 
-              }}
-            ></div>
-          </div>
-          <p className="status-message">
-            {task.status === 'pending' ? 
-              'Task is queued and will begin processing shortly...' : 
-              'Task is being processed. Retrieving data from selected sources...'}
-          </p>
-        </div>
+        <TaskProgress task={task} />
       )}
     </div>
   );
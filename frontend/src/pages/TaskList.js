@@ -1,40 +1,111 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { Link } from 'react-router-dom';
-import { fetchTasks } from '../services/api';
+import { fetchTasks, fetchTaskSummary, subscribeToTasks } from '../services/api';
 import Loader from '../components/Loader';
 import ErrorMessage from '../components/ErrorMessage';
 import StatusBadge from '../components/StatusBadge';
 
+// Tasks loaded per page
+const PAGE_SIZE = 50;
+
+const STATUSES = ['pending', 'in_progress', 'completed', 'failed'];
+
 function TaskList() {
   const [tasks, setTasks] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [summary, setSummary] = useState(null);
+  const [filters, setFilters] = useState({ status: '', name: '' });
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState(null);
+  // Last status seen per task, so the summary is only refetched when a count can change
+  const knownStatuses = useRef({});
 
+  const refreshSummary = useCallback(() => {
+    fetchTaskSummary({ name: filters.name })
+      .then(setSummary)
+      .catch(err => console.error(err));
+  }, [filters.name]);
+
+  // Load the first page whenever the filters change
   useEffect(() => {
+    let isMounted = true;
+    
     const loadTasks = async () => {
       try {
         setLoading(true);
-        const tasksData = await fetchTasks();
-        setTasks(tasksData);
+        const page = await fetchTasks({ ...filters, limit: PAGE_SIZE });
+        if (!isMounted) return;
+        setTasks(page.tasks);
+        page.tasks.forEach(task => { knownStatuses.current[task.id] = task.status; });
+        setNextCursor(page.next_cursor);
         setError(null);
       } catch (err) {
+        if (!isMounted) return;
         setError('Failed to load tasks. Please try again later.');
         console.error(err);
       } finally {
-        setLoading(false);
+        if (isMounted) setLoading(false);
       }
     };
 
     loadTasks();
+    refreshSummary();
+    
+    return () => {
+      isMounted = false;
+    };
+  }, [filters, refreshSummary]);
+
+  useEffect(() => {
+    // Apply task creations and status changes pushed by the server
+    const matchesFilters = (task) =>
+      (!filters.status || task.status === filters.status) &&
+      (!filters.name || task.name.toLowerCase().includes(filters.name.toLowerCase()));
     
-    // Poll for updates every 5 seconds
-    const intervalId = setInterval(loadTasks, 5000);
+    const unsubscribe = subscribeToTasks((update) => {
+      setTasks(prev => {
+        const exists = prev.some(task => task.id === update.id);
+        if (!matchesFilters(update)) {
+          return exists ? prev.filter(task => task.id !== update.id) : prev;
+        }
+        return exists
+          ? prev.map(task => (task.id === update.id ? update : task))
+          : [update, ...prev];
+      });
+      // New tasks and status changes move the counts; other updates do not
+      if (knownStatuses.current[update.id] !== update.status) {
+        knownStatuses.current[update.id] = update.status;
+        refreshSummary();
+      }
+    });
     
-    // Clean up interval on component unmount
-    return () => clearInterval(intervalId);
-  }, []);
+    // Close the event stream on component unmount
+    return () => unsubscribe();
+  }, [filters, refreshSummary]);
+
+  const loadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const page = await fetchTasks({ ...filters, limit: PAGE_SIZE, after: nextCursor });
+      setTasks(prev => [...prev, ...page.tasks]);
+      page.tasks.forEach(task => { knownStatuses.current[task.id] = task.status; });
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      setError('Failed to load tasks. Please try again later.');
+      console.error(err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
-  if (loading && tasks.length === 0) {
+  // Handle filter changes
+  const handleFilterChange = (e) => {
+    const { name, value } = e.target;
+    setFilters(prev => ({ ...prev, [name]: value }));
+  };
+
+  if (loading && tasks.length === 0 && !summary) {
     return <Loader size="large" />;
   }
 
@@ -49,6 +120,40 @@ function TaskList() {
         <Link to="/tasks/new" className="button">Create New Task</Link>
       </div>
       
+      <div className="filters">
+        <div className="filter-controls">
+          <div className="form-group">
+            <label htmlFor="status">Filter by Status</label>
+            <select
+              id="status"
+              name="status"
+              value={filters.status}
+              onChange={handleFilterChange}
+              className="filter-select"
+            >
+              <option value="">All Statuses{summary ? ` (${summary.total})` : ''}</option>
+              {STATUSES.map(status => (
+                <option key={status} value={status}>
+                  {status.replace('_', ' ')}{summary ? ` (${summary.counts[status]})` : ''}
+                </option>
+              ))}
+            </select>
+          </div>
+          
+          <div className="form-group">
+            <label htmlFor="name">Search by Name</label>
+            <input
+              id="name"
+              name="name"
+              type="text"
+              value={filters.name}
+              onChange={handleFilterChange}
+              placeholder="Task name"
+            />
+          </div>
+        </div>
+      </div>
+      
       {tasks && tasks.length > 0 ? (
         <div className="card">
           <div className="table-container">
@@ -81,14 +186,24 @@ function TaskList() {
               </tbody>
             </table>
           </div>
+          
+          {nextCursor && (
+            <button className="button" onClick={loadMore} disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Load More'}
+            </button>
+          )}
         </div>
       ) : (
         <div className="card">
-          <p className="status-message">No tasks found. Create a new task to get started.</p>
+          <p className="status-message">
+            {filters.status || filters.name
+              ? 'No tasks match the current filters.'
+              : 'No tasks found. Create a new task to get started.'}
+          </p>
         </div>
       )}
     </div>
   );
 }
 
-export default TaskList; 
\ No newline at end of file
+export default TaskList;
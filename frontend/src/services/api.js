@@ -3,9 +3,16 @@ import axios from 'axios';
 const API_URL = '/api';
 
 // Task-related API calls
-export const fetchTasks = async () => {
+const toQueryString = (params) => Object.entries(params)
+  .filter(([_, value]) => value) // Filter out empty values
+  .map(([key, value]) => `${key}=${encodeURIComponent(value)}`)
+  .join('&');
+
+// One page of tasks, newest first: { tasks, next_cursor }
+export const fetchTasks = async (params = {}) => {
   try {
-    const response = await axios.get(`${API_URL}/tasks`);
+    const queryString = toQueryString(params);
+    const response = await axios.get(`${API_URL}/tasks${queryString ? `?${queryString}` : ''}`);
     return response.data;
   } catch (error) {
     console.error('Error fetching tasks:', error);
@@ -13,6 +20,18 @@ export const fetchTasks = async () => {
   }
 };
 
+// Task counts per status: { counts, total }
+export const fetchTaskSummary = async (params = {}) => {
+  try {
+    const queryString = toQueryString(params);
+    const response = await axios.get(`${API_URL}/tasks/summary${queryString ? `?${queryString}` : ''}`);
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching task summary:', error);
+    throw error;
+  }
+};
+
 export const fetchTask = async (taskId) => {
   try {
     const response = await axios.get(`${API_URL}/tasks/${taskId}`);
@@ -37,11 +56,7 @@ export const createTask = async (taskData) => {
 export const fetchTaskData = async (taskId, filters = {}) => {
   try {
     // Convert filters object to query string parameters
-    const queryString = Object.entries(filters)
-      .filter(([_, value]) => value) // Filter out empty values
-      .map(([key, value]) => `${key}=${encodeURIComponent(value)}`)
-      .join('&');
-    
+    const queryString = toQueryString(filters);
     const url = `${API_URL}/tasks/${taskId}/data${queryString ? `?${queryString}` : ''}`;
     const response = await axios.get(url);
     return response.data;
@@ -49,4 +64,73 @@ export const fetchTaskData = async (taskId, filters = {}) => {
     console.error(`Error fetching data for task ${taskId}:`, error);
     throw error;
   }
-}; 
\ No newline at end of file
+};
+
+// Rebuild record objects from a `format=columnar` response (dictionary-encoded text columns)
+export const decodeColumnar = ({ columns, count }) => {
+  const decoded = Object.entries(columns).map(([field, column]) => [
+    field,
+    Array.isArray(column)
+      ? column
+      : column.codes.map((code) => (code === null ? null : column.dictionary[code]))
+  ]);
+  
+  return Array.from({ length: count }, (_, index) => {
+    const record = {};
+    decoded.forEach(([field, values]) => {
+      record[field] = values[index];
+    });
+    return record;
+  });
+};
+
+// Same as fetchTaskData, but transferred in the compact columnar format
+export const fetchTaskDataColumnar = async (taskId, filters = {}) => {
+  const result = await fetchTaskData(taskId, { ...filters, format: 'columnar' });
+  return { ...result, data: decodeColumnar(result) };
+};
+
+export const fetchTaskAggregates = async (taskId, filters = {}) => {
+  try {
+    const queryString = toQueryString(filters);
+    const url = `${API_URL}/tasks/${taskId}/aggregates${queryString ? `?${queryString}` : ''}`;
+    const response = await axios.get(url);
+    return response.data;
+  } catch (error) {
+    console.error(`Error fetching aggregates for task ${taskId}:`, error);
+    throw error;
+  }
+};
+
+// Server-Sent Events subscriptions (return a function that closes the stream)
+const TERMINAL_STATUSES = ['completed', 'failed'];
+
+export const subscribeToTask = (taskId, onUpdate) => {
+  const source = new EventSource(`${API_URL}/tasks/${taskId}/events`);
+  
+  source.onmessage = (event) => {
+    const task = JSON.parse(event.data);
+    onUpdate(task);
+    
+    // The server ends the stream once the task is finished; close it so the browser does not reconnect
+    if (TERMINAL_STATUSES.includes(task.status)) {
+      source.close();
+    }
+  };
+  source.onerror = (error) => {
+    console.error(`Event stream error for task ${taskId}:`, error);
+  };
+  
+  return () => source.close();
+};
+
+export const subscribeToTasks = (onUpdate) => {
+  const source = new EventSource(`${API_URL}/tasks/events`);
+  
+  source.onmessage = (event) => onUpdate(JSON.parse(event.data));
+  source.onerror = (error) => {
+    console.error('Task event stream error:', error);
+  };
+  
+  return () => source.close();
+};
\ No newline at end of file